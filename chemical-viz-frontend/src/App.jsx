@@ -2,13 +2,15 @@ import { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import "./App.css";
 
-import { Bar, Doughnut } from "react-chartjs-2";
+import { Bar, Doughnut, Line, Scatter } from "react-chartjs-2";
 import {
   Chart as ChartJS,
   CategoryScale,
   LinearScale,
   BarElement,
   ArcElement,
+  LineElement,
+  PointElement,
   Tooltip,
   Legend,
 } from "chart.js";
@@ -28,10 +30,41 @@ ChartJS.register(
   LinearScale,
   BarElement,
   ArcElement,
+  LineElement,
+  PointElement,
   Tooltip,
   Legend
 );
 
+// The server downsamples time series (LTTB) to this many points.
+const TIME_SERIES_POINTS = 2000;
+
+// Uploads, reports and exports may be refused with 429 while the server is
+// busy. Wait for the Retry-After it sends and try again, a few times.
+const MAX_RETRIES = 3;
+const MAX_RETRY_WAIT_SECONDS = 30;
+
+const retryAfterSeconds = (response) =>
+  Math.min(Number(response?.headers?.["retry-after"]) || 1, MAX_RETRY_WAIT_SECONDS);
+
+const retryWhenBusy = (client) => {
+  client.interceptors.response.use(undefined, async (error) => {
+    const { config, response } = error;
+    const attempt = config?.retryAttempt || 0;
+    if (!config || response?.status !== 429 || attempt >= MAX_RETRIES) {
+      throw error;
+    }
+    await new Promise((resolve) => setTimeout(resolve, retryAfterSeconds(response) * 1000));
+    return client({ ...config, retryAttempt: attempt + 1 });
+  });
+  return client;
+};
+
+const errorText = (err, fallback) =>
+  err.response?.status === 429
+    ? `The server is busy; try again in ${retryAfterSeconds(err.response)} s.`
+    : err.response?.data?.error || fallback;
+
 export default function App() {
   const [username, setUsername] = useState("");
   const [password, setPassword] = useState("");
@@ -41,14 +74,16 @@ export default function App() {
   const [history, setHistory] = useState([]);
   const [selectedHistory, setSelectedHistory] = useState(null);
   const [summary, setSummary] = useState(null);
+  const [series, setSeries] = useState(null);
+  const [correlation, setCorrelation] = useState(null);
   const [activeTab, setActiveTab] = useState("charts");
   const [isRegistering, setIsRegistering] = useState(false);
   const fileInputRef = useRef(null);
   const [uploading, setUploading] = useState(false);
 
-  const api = axios.create({
+  const api = retryWhenBusy(axios.create({
     baseURL: import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:8000",
-  });
+  }));
 
   useEffect(() => {
     if (authenticated) fetchHistory();
@@ -141,8 +176,7 @@ export default function App() {
         await fetchSummary(newDataset.id);
       }
     } catch (err) {
-      const errorMsg = err.response?.data?.error || "Upload failed";
-      setAlert({ type: "error", text: errorMsg });
+      setAlert({ type: "error", text: errorText(err, "Upload failed") });
       console.error("Upload error:", err);
     } finally {
       setUploading(false);
@@ -164,11 +198,68 @@ export default function App() {
       });
 
       setSummary(res.data);
+      setSeries(null);
+      if (res.data.time_series) fetchSeries(id);
+      fetchCorrelation(id);
     } catch (err) {
       setAlert({ type: "error", text: "Failed to fetch summary" });
     }
   };
 
+  const fetchSeries = async (id, column = "pressure") => {
+    try {
+      const token = btoa(`${username}:${password}`);
+      const res = await api.get(`/api/timeseries/${id}/`, {
+        headers: { Authorization: `Basic ${token}` },
+        params: { column, points: TIME_SERIES_POINTS, window: "1h" },
+      });
+      setSeries(res.data);
+    } catch (err) {
+      setAlert({ type: "error", text: "Failed to fetch time series" });
+    }
+  };
+
+  // Scatter points come from the server's bounded sample, whatever the dataset size.
+  const fetchCorrelation = async (id) => {
+    try {
+      const token = btoa(`${username}:${password}`);
+      const res = await api.get(`/api/correlation/${id}/`, {
+        headers: { Authorization: `Basic ${token}` },
+      });
+      setCorrelation(res.data);
+    } catch (err) {
+      // Datasets uploaded before correlation data existed have none (404).
+      setCorrelation(null);
+    }
+  };
+
+  const buildScatterData = (data) => ({
+    datasets: [
+      {
+        label: `Flowrate vs Pressure (r = ${data.correlation?.[0][1]?.toFixed(2) ?? "n/a"})`,
+        data: data.sample.flowrate.map((x, i) => ({ x, y: data.sample.pressure[i] })),
+        backgroundColor: "rgba(96, 165, 250, 0.6)",
+        pointRadius: 2,
+      },
+    ],
+  });
+
+  const buildSeriesData = (data) => ({
+    labels: data.x.map((stamp) => stamp.slice(0, 16).replace("T", " ")),
+    datasets: [
+      {
+        label: data.column,
+        data: data.y,
+        borderColor: "#60a5fa",
+        borderWidth: 1,
+        pointRadius: 0,
+      },
+      ...(data.rolling_mean
+        ? [{ label: "Rolling mean", data: data.rolling_mean, borderColor: "#f59e0b", borderWidth: 2, pointRadius: 0 }]
+        : []),
+    ],
+  });
+
   const handleDownloadPDF = async (id) => {
     try {
       const token = btoa(`${username}:${password}`);
@@ -185,7 +276,27 @@ export default function App() {
       link.click();
       link.remove();
     } catch (err) {
-      setAlert({ type: "error", text: "Failed to download PDF" });
+      setAlert({ type: "error", text: errorText(err, "Failed to download PDF") });
+    }
+  };
+
+  const handleDownloadExport = async (id) => {
+    try {
+      const token = btoa(`${username}:${password}`);
+
+      const res = await api.get(`/api/export/${id}/xlsx/`, {
+        headers: { Authorization: `Basic ${token}` },
+        responseType: "blob",
+      });
+
+      const url = window.URL.createObjectURL(new Blob([res.data]));
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = `export-${id}.xlsx`;
+      link.click();
+      link.remove();
+    } catch (err) {
+      setAlert({ type: "error", text: errorText(err, "Failed to download Excel export") });
     }
   };
 
@@ -399,6 +510,16 @@ export default function App() {
                         >
                           <Download size={16} />
                         </button>
+                        <button
+                          onClick={(e) => {
+                            e.stopPropagation();
+                            handleDownloadExport(h.id);
+                          }}
+                          className="btn-icon"
+                          title="Download statistics as Excel"
+                        >
+                          <Table size={16} />
+                        </button>
                         <button
                           onClick={async (e) => {
                             e.stopPropagation();
@@ -547,6 +668,34 @@ export default function App() {
                 </div>
               </div>
 
+              {series && (
+                <div className="chart-card full-width">
+                  <div className="chart-title">
+                    {series.column} over time ({series.points} of {series.source_points} points)
+                  </div>
+                  <div className="chart-container">
+                    <Line
+                      data={buildSeriesData(series)}
+                      options={{ responsive: true, maintainAspectRatio: false, animation: false }}
+                    />
+                  </div>
+                </div>
+              )}
+
+              {correlation?.sample && (
+                <div className="chart-card full-width">
+                  <div className="chart-title">
+                    Flowrate vs Pressure ({correlation.sample_size} of {correlation.count} rows sampled)
+                  </div>
+                  <div className="chart-container">
+                    <Scatter
+                      data={buildScatterData(correlation)}
+                      options={{ responsive: true, maintainAspectRatio: false, animation: false }}
+                    />
+                  </div>
+                </div>
+              )}
+
               {summary?.averages && (
                 <div className="chart-card full-width">
                   <div className="chart-title">Parameter Averages</div>
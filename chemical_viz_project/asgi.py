@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chemical_viz_project.settings')
+# Serve data_api through its async views (see data_api.async_views)
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
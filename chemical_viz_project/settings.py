@@ -5,6 +5,7 @@ Generated by 'django-admin startproject' using Django 5.0.
 """
 
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 
@@ -42,7 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'data_api.middleware.AsyncWhiteNoiseMiddleware',
     
     'django.contrib.sessions.middleware.SessionMiddleware',
     
@@ -56,6 +57,8 @@ MIDDLEWARE = [
     
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+
+    'data_api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'chemical_viz_project.urls'
@@ -90,6 +93,18 @@ DATABASES = {
     )
 }
 
+# SQLite tuning applied to every new connection (see data_api/db.py)
+SQLITE_TUNING_ENABLED = os.environ.get('SQLITE_TUNING', 'True') == 'True'
+# busy_timeout goes first so the journal_mode switch itself waits for locks
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,         # ms to wait for a lock before raising "database is locked"
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,       # 256 MiB
+    'cache_size': -64000,         # negative = KiB, i.e. ~64 MiB page cache
+    'temp_store': 'MEMORY',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -166,6 +181,8 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+# Lets the frontend read how long to wait after a 429 from admission control.
+CORS_EXPOSE_HEADERS = ['Retry-After']
 
 
 # --- Media Configuration ---
@@ -174,4 +191,115 @@ CORS_ALLOW_HEADERS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 # Ensure the media directory exists
-os.makedirs(MEDIA_ROOT, exist_ok=True)
\ No newline at end of file
+os.makedirs(MEDIA_ROOT, exist_ok=True)
+
+# Raw uploads: hash-sharded under MEDIA_ROOT/raw/ and compressed (zstd if the zstandard
+# package is installed, else gzip). Any data_api.storage.RawFileStorage subclass can be used.
+RAW_STORAGE = {
+    'BACKEND': 'data_api.storage.LocalDiskStorage',
+    'OPTIONS': {
+        'compression': os.environ.get('RAW_STORAGE_COMPRESSION', 'auto'),  # auto, zstd, gzip or none
+    },
+}
+
+# CSV parsing: 'auto' uses pyarrow's multithreaded reader when pyarrow is installed and
+# pandas' C parser otherwise ('c' or 'pyarrow' force one). CSV_FLOAT32 halves the memory of
+# the numeric columns at the cost of precision beyond ~7 significant digits.
+CSV_PARSE_ENGINE = os.environ.get('CSV_PARSE_ENGINE', 'auto')
+CSV_FLOAT32 = os.environ.get('CSV_FLOAT32', 'False') == 'True'
+
+# Readings whose robust z-score within their equipment Type exceeds OUTLIER_THRESHOLD are
+# flagged at upload; the OUTLIER_INDEX_LIMIT strongest are kept per dataset (see data_api.outliers).
+OUTLIER_THRESHOLD = float(os.environ.get('OUTLIER_THRESHOLD', '3.5'))
+OUTLIER_INDEX_LIMIT = int(os.environ.get('OUTLIER_INDEX_LIMIT', '500'))
+
+# Scatter plots draw from a per-type sample of at most SCATTER_SAMPLE_SIZE rows, kept for
+# the SCATTER_SAMPLE_TYPES largest types of a dataset (see data_api.correlation).
+SCATTER_SAMPLE_SIZE = int(os.environ.get('SCATTER_SAMPLE_SIZE', '200'))
+SCATTER_SAMPLE_TYPES = int(os.environ.get('SCATTER_SAMPLE_TYPES', '20'))
+
+# Report charts show the REPORT_CHART_TYPES largest equipment types plus one "Other"
+# entry, and the type table lists at most REPORT_TABLE_TYPES rows (see data_api.reports).
+REPORT_CHART_TYPES = int(os.environ.get('REPORT_CHART_TYPES', '12'))
+REPORT_TABLE_TYPES = int(os.environ.get('REPORT_TABLE_TYPES', '100'))
+# Processes that render the charts of a consolidated report in parallel; below 2, charts
+# are rendered in the request's own process (see data_api.executor.get_chart_pool).
+REPORT_CHART_WORKERS = int(os.environ.get('REPORT_CHART_WORKERS', str(min(4, os.cpu_count() or 1))))
+# A consolidated report covers the last CONSOLIDATED_REPORT_DAYS days unless ?days= says
+# otherwise, and is refused (400) when that period holds more than
+# CONSOLIDATED_REPORT_MAX_DATASETS datasets: each one adds two charts, rendered in the request.
+CONSOLIDATED_REPORT_DAYS = int(os.environ.get('CONSOLIDATED_REPORT_DAYS', '30'))
+CONSOLIDATED_REPORT_MAX_DATASETS = int(os.environ.get('CONSOLIDATED_REPORT_MAX_DATASETS', '50'))
+
+# Exports read and clean the stored file this many rows at a time (see data_api.exports).
+EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', '50000'))
+
+# --- Performance Instrumentation ---
+
+# Adds a Server-Timing header and a JSON timing log line to upload, summary and report responses
+REQUEST_TIMING_ENABLED = os.environ.get('REQUEST_TIMING', 'False') == 'True'
+
+# Per-worker metric files live here and are merged by /api/metrics/
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'chemviz-metrics'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '1.0'))
+# Allow unauthenticated scrapes of /api/metrics/ (otherwise staff users only)
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'False') == 'True'
+
+# Request profiling: staff requests carrying PROFILE_HEADER run under cProfile, and
+# requests slower than PROFILE_SLOW_REQUEST_MS (0 = off) keep a sampled stack profile
+PROFILING_ENABLED = os.environ.get('PROFILING', 'False') == 'True'
+PROFILE_HEADER = 'X-Profile-Request'
+PROFILE_SLOW_REQUEST_MS = float(os.environ.get('PROFILE_SLOW_REQUEST_MS', '0'))
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_MAX_CAPTURES = int(os.environ.get('PROFILE_MAX_CAPTURES', '50'))
+
+# Import pandas/Matplotlib/ReportLab and prime their caches when the app loads, so the
+# first upload or report in a worker is not slowed down by it. gunicorn.conf.py warms
+# the master before forking instead, which lets workers share those pages.
+DATA_API_WARMUP = os.environ.get('DATA_API_WARMUP', 'False') == 'True'
+
+# Route the data_api endpoints to the async views (on by default under asgi.py). Their
+# CPU-bound parsing and PDF rendering runs in a bounded 'process' or 'thread' pool.
+ASYNC_VIEWS_ENABLED = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+ASYNC_EXECUTOR = os.environ.get('ASYNC_EXECUTOR', 'process')
+ASYNC_EXECUTOR_WORKERS = int(os.environ.get('ASYNC_EXECUTOR_WORKERS', '2'))
+
+# --- Admission Control ---
+
+# Uploads and PDF reports need a token from the user's bucket ({scope: (burst, per_minute)})
+# and a free concurrency slot, per user and for the whole host. State is shared by all
+# workers through the ADMISSION_DB SQLite file; see data_api/admission.py. With sync workers,
+# keep ADMISSION_GLOBAL_CONCURRENCY below the worker count so cheap requests always find a free one.
+# Off by default: a single-user deployment gains nothing from it. Turn it on (ADMISSION_CONTROL=True)
+# for a shared server; both clients wait out a 429's Retry-After and try again.
+ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL', 'False') == 'True'
+ADMISSION_DB = os.environ.get('ADMISSION_DB', os.path.join(tempfile.gettempdir(), 'chemviz-admission.sqlite3'))
+ADMISSION_GLOBAL_CONCURRENCY = int(os.environ.get('ADMISSION_GLOBAL_CONCURRENCY', '2'))
+ADMISSION_USER_CONCURRENCY = int(os.environ.get('ADMISSION_USER_CONCURRENCY', '1'))
+ADMISSION_RATES = {
+    'upload': (int(os.environ.get('ADMISSION_UPLOAD_BURST', '10')), float(os.environ.get('ADMISSION_UPLOAD_PER_MINUTE', '20'))),
+    'report': (int(os.environ.get('ADMISSION_REPORT_BURST', '10')), float(os.environ.get('ADMISSION_REPORT_PER_MINUTE', '30'))),
+}
+# Seconds a request waits for a free slot before it gets 429, and the Retry-After it is sent
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '0.5'))
+ADMISSION_POLL_INTERVAL = 0.05
+ADMISSION_BUSY_RETRY_AFTER = 2
+# Slots older than this are treated as leaked by a crashed worker
+ADMISSION_SLOT_TTL = 600
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'data_api': {
+            'handlers': ['console'],
+            'level': os.environ.get('DATA_API_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
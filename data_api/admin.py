@@ -1,3 +1,54 @@
+import io
+import os
+import pstats
+
 from django.contrib import admin
+from django.utils.html import format_html
+
+from .models import UploadedDataset, ProfileCapture
+
+
+@admin.register(UploadedDataset)
+class UploadedDatasetAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'timestamp', 'record_count', 'file_size']
+    list_filter = ['user']
+    search_fields = ['name', 'user__username']
+    list_select_related = ['user']
+
+
+@admin.register(ProfileCapture)
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = ['created', 'method', 'path', 'status_code', 'duration_ms', 'trigger', 'profiler', 'user']
+    list_filter = ['trigger', 'profiler']
+    search_fields = ['path']
+    list_select_related = ['user']
+    readonly_fields = [field.name for field in ProfileCapture._meta.fields] + ['profile_report']
+
+    # Captures are only ever created by ProfilingMiddleware.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        if os.path.exists(obj.file_path):
+            os.remove(obj.file_path)
+        super().delete_model(request, obj)
+
+    @admin.display(description='Profile')
+    def profile_report(self, obj):
+        if not os.path.exists(obj.file_path):
+            return 'Profile file no longer exists.'
+
+        if obj.profiler == ProfileCapture.PROFILER_CPROFILE:
+            output = io.StringIO()
+            stats = pstats.Stats(obj.file_path, stream=output)
+            stats.sort_stats('cumulative').print_stats(40)
+            text = output.getvalue()
+        else:
+            with open(obj.file_path) as fh:
+                lines = [next(fh, '') for _ in range(40)]
+            text = ''.join(lines)
 
-# Register your models here.
+        return format_html('<pre style="white-space: pre-wrap; font-size: 11px;">{}</pre>', text)
@@ -0,0 +1,209 @@
+"""
+Admission control for the expensive endpoints (uploads and PDF reports).
+
+Before a limited view runs, its request must be admitted. Admission needs:
+
+* a token from the user's bucket for that scope. Buckets are defined in
+  ADMISSION_RATES as {scope: (burst, per_minute)}.
+* a free concurrency slot, both for the user (ADMISSION_USER_CONCURRENCY)
+  and for the whole host (ADMISSION_GLOBAL_CONCURRENCY).
+
+An empty bucket is rejected immediately with 429 and a Retry-After set to
+when the next token arrives. When no slot is free, the request polls for up
+to ADMISSION_QUEUE_TIMEOUT seconds before it is rejected the same way.
+
+The counts live in a small SQLite file (ADMISSION_DB), so every gunicorn
+worker on the host shares them. Slots left behind by a worker that died are
+reaped by pid, or once they are older than ADMISSION_SLOT_TTL.
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+
+from . import metrics
+from .db import apply_sqlite_pragmas
+from .timing import NULL_TIMER
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS slots ("
+    " id INTEGER PRIMARY KEY, scope TEXT NOT NULL, user_id INTEGER, pid INTEGER NOT NULL, acquired REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)",
+]
+PRAGMAS = {'busy_timeout': 5000, 'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+
+RATE_LIMITED = 'rate'
+BUSY = 'busy'
+
+_local = threading.local()
+
+
+def _connection():
+    key = (os.getpid(), settings.ADMISSION_DB)
+    if getattr(_local, 'key', None) != key:
+        os.makedirs(os.path.dirname(settings.ADMISSION_DB) or '.', exist_ok=True)
+        conn = sqlite3.connect(settings.ADMISSION_DB, timeout=5, isolation_level=None)
+        cursor = conn.cursor()
+        apply_sqlite_pragmas(cursor, PRAGMAS)
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        _local.conn, _local.key = conn, key
+    return _local.conn
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _reap(cursor, now):
+    cursor.execute("DELETE FROM slots WHERE acquired < ?", (now - settings.ADMISSION_SLOT_TTL,))
+    for (pid,) in cursor.execute("SELECT DISTINCT pid FROM slots").fetchall():
+        if not _pid_alive(pid):
+            cursor.execute("DELETE FROM slots WHERE pid = ?", (pid,))
+
+
+def try_acquire(scope, user_id):
+    """
+    Make one admission attempt.
+    Returns (slot_id, None) when admitted, otherwise (None, (reason, retry_after_seconds)).
+    """
+    now = time.time()
+    cursor = _connection().cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        rate = settings.ADMISSION_RATES.get(scope)
+        if rate:
+            burst, per_minute = rate
+            bucket_key = f"{scope}:{user_id}"
+            row = cursor.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (bucket_key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * per_minute / 60)
+            if tokens < 1:
+                cursor.execute("ROLLBACK")
+                return None, (RATE_LIMITED, (1 - tokens) * 60 / per_minute)
+
+        _reap(cursor, now)
+        running, running_for_user = cursor.execute(
+            "SELECT COUNT(*), COALESCE(SUM(user_id = ?), 0) FROM slots", (user_id,)
+        ).fetchone()
+        if running >= settings.ADMISSION_GLOBAL_CONCURRENCY or running_for_user >= settings.ADMISSION_USER_CONCURRENCY:
+            cursor.execute("ROLLBACK")
+            return None, (BUSY, settings.ADMISSION_BUSY_RETRY_AFTER)
+
+        if rate:
+            cursor.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                           (bucket_key, tokens - 1, now))
+        cursor.execute("INSERT INTO slots (scope, user_id, pid, acquired) VALUES (?, ?, ?, ?)",
+                       (scope, user_id, os.getpid(), now))
+        slot_id = cursor.lastrowid
+        cursor.execute("COMMIT")
+        return slot_id, None
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
+
+
+def release(slot_id):
+    _connection().execute("DELETE FROM slots WHERE id = ?", (slot_id,))
+
+
+def _rejected(scope, rejection, deadline):
+    """Raise Throttled if the request should give up now; otherwise the caller polls again."""
+    reason, retry_after = rejection
+    if reason == RATE_LIMITED or time.monotonic() >= deadline:
+        metrics.ADMISSIONS.inc(scope=scope, result='rate_limited' if reason == RATE_LIMITED else 'busy')
+        raise Throttled(wait=max(1, math.ceil(retry_after)))
+
+
+def acquire(scope, user_id):
+    """Wait up to ADMISSION_QUEUE_TIMEOUT for admission; returns a slot id or raises Throttled."""
+    deadline = time.monotonic() + settings.ADMISSION_QUEUE_TIMEOUT
+    while True:
+        slot_id, rejection = try_acquire(scope, user_id)
+        if slot_id is not None:
+            metrics.ADMISSIONS.inc(scope=scope, result='admitted')
+            return slot_id
+        _rejected(scope, rejection, deadline)
+        time.sleep(settings.ADMISSION_POLL_INTERVAL)
+
+
+async def aacquire(scope, user_id):
+    """acquire() for async views: waits on the event loop instead of blocking a thread."""
+    deadline = time.monotonic() + settings.ADMISSION_QUEUE_TIMEOUT
+    while True:
+        slot_id, rejection = await sync_to_async(try_acquire, thread_sensitive=False)(scope, user_id)
+        if slot_id is not None:
+            metrics.ADMISSIONS.inc(scope=scope, result='admitted')
+            return slot_id
+        _rejected(scope, rejection, deadline)
+        await asyncio.sleep(settings.ADMISSION_POLL_INTERVAL)
+
+
+class StreamedSlot:
+    """
+    Body of a streamed response that holds its admission slot until the body
+    has been sent. Django calls close() when the response is done with, so the
+    slot is freed even if the client disconnects before the first chunk.
+    """
+
+    def __init__(self, content, slot_id):
+        self.content = content
+        self.slot_id = slot_id
+
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.close()
+
+    def close(self):
+        if self.slot_id is not None:
+            release(self.slot_id)
+            self.slot_id = None
+
+
+class AdmissionControlMixin:
+    """
+    APIView mixin that admits requests to `admission_scope` after authentication
+    and frees the slot once the response is finalized. A streamed response is
+    produced after the view returns, so its slot is held until it has been sent.
+    """
+    admission_scope = None
+    timer = NULL_TIMER
+    _admission_slot = None
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # DRF re-raises exceptions other than APIException without calling
+            # finalize_response; the slot must not wait for ADMISSION_SLOT_TTL.
+            if self._admission_slot is not None:
+                release(self._admission_slot)
+                self._admission_slot = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if settings.ADMISSION_CONTROL_ENABLED and self.admission_scope:
+            with self.timer.phase('queue'):
+                self._admission_slot = acquire(self.admission_scope, request.user.id)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._admission_slot is not None:
+            if response.streaming:
+                response.streaming_content = StreamedSlot(response.streaming_content, self._admission_slot)
+            else:
+                release(self._admission_slot)
+            self._admission_slot = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,167 @@
+"""
+Mergeable summary statistics for datasets and per-user rollups.
+
+An aggregate holds a row count, per-column statistics and type counts:
+
+    {"count": n,
+     "columns": {"flowrate": {"count", "sum", "m2", "min", "max"}, ...},
+     "type_counts": {"Pump": 12, ...}}
+
+Here m2 is the sum of squared deviations from the column mean. Two aggregates
+combine with Chan et al.'s parallel update. A part can also be subtracted
+from a total it was merged into, so totals never need the underlying rows.
+The one exception is min/max, which cannot be un-merged. subtract() sets
+them to None when the removed part held the extreme; callers rebuild them
+with merge_extremes().
+
+A statistic that is unknown for a non-empty column is None; this happens for
+datasets uploaded before aggregates were recorded. None propagates through
+merges, so a total is never reported more precisely than its parts allow.
+"""
+import math
+
+COLUMNS = ['flowrate', 'pressure', 'temperature']
+
+
+def empty_column():
+    return {'count': 0, 'sum': 0.0, 'm2': 0.0, 'min': None, 'max': None}
+
+
+def empty():
+    return {'count': 0, 'columns': {name: empty_column() for name in COLUMNS}, 'type_counts': {}}
+
+
+def column_from_values(values):
+    """Statistics for one column from a pandas Series (or anything with len/sum/var/min/max)."""
+    count = len(values)
+    if count == 0:
+        return empty_column()
+    return {
+        'count': count,
+        'sum': float(values.sum()),
+        'm2': float(values.var(ddof=0)) * count,
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+
+
+def from_summary(summary):
+    """
+    Aggregate for a dataset's summary_data. Summaries written before aggregates
+    were stored only have counts and averages, so m2/min/max are unknown.
+    """
+    if 'aggregates' in summary:
+        return summary['aggregates']
+    count = summary.get('total_records', 0)
+    averages = summary.get('averages', {})
+    columns = {}
+    for name in COLUMNS:
+        if count and averages.get(name) is not None:
+            columns[name] = {'count': count, 'sum': averages[name] * count, 'm2': None, 'min': None, 'max': None}
+        else:
+            columns[name] = empty_column()
+    return {'count': count, 'columns': columns, 'type_counts': dict(summary.get('type_distribution', {}))}
+
+
+def _extreme(pick, a, b, key):
+    if a['count'] == 0:
+        return b[key]
+    if b['count'] == 0:
+        return a[key]
+    if a[key] is None or b[key] is None:
+        return None
+    return pick(a[key], b[key])
+
+
+def merge_column(a, b):
+    n = a['count'] + b['count']
+    if n == 0:
+        return empty_column()
+    if a['count'] == 0:
+        return dict(b)
+    if b['count'] == 0:
+        return dict(a)
+    if a['m2'] is None or b['m2'] is None:
+        m2 = None
+    else:
+        delta = b['sum'] / b['count'] - a['sum'] / a['count']
+        m2 = a['m2'] + b['m2'] + delta * delta * a['count'] * b['count'] / n
+    return {
+        'count': n,
+        'sum': a['sum'] + b['sum'],
+        'm2': m2,
+        'min': _extreme(min, a, b, 'min'),
+        'max': _extreme(max, a, b, 'max'),
+    }
+
+
+def subtract_column(total, part):
+    """Inverse of merge_column(remainder, part) == total, except for min/max (see module docs)."""
+    n = total['count'] - part['count']
+    if n <= 0:
+        return empty_column()
+    if part['count'] == 0:
+        return dict(total)
+    if total['m2'] is None or part['m2'] is None:
+        m2 = None
+    else:
+        remainder_sum = total['sum'] - part['sum']
+        delta = part['sum'] / part['count'] - remainder_sum / n
+        m2 = max(total['m2'] - part['m2'] - delta * delta * n * part['count'] / total['count'], 0.0)
+    extremes = {}
+    for key in ('min', 'max'):
+        held_by_part = total[key] is None or part[key] is None or part[key] == total[key]
+        extremes[key] = None if held_by_part else total[key]
+    return {'count': n, 'sum': total['sum'] - part['sum'], 'm2': m2, **extremes}
+
+
+def _merge_counts(a, b, sign=1):
+    counts = dict(a)
+    for key, value in b.items():
+        counts[key] = counts.get(key, 0) + sign * value
+        if counts[key] <= 0:
+            del counts[key]
+    return counts
+
+
+def merge(a, b):
+    return {
+        'count': a['count'] + b['count'],
+        'columns': {name: merge_column(a['columns'][name], b['columns'][name]) for name in COLUMNS},
+        'type_counts': _merge_counts(a['type_counts'], b['type_counts']),
+    }
+
+
+def subtract(total, part):
+    return {
+        'count': max(total['count'] - part['count'], 0),
+        'columns': {name: subtract_column(total['columns'][name], part['columns'][name]) for name in COLUMNS},
+        'type_counts': _merge_counts(total['type_counts'], part['type_counts'], sign=-1),
+    }
+
+
+def needs_extremes(aggregate):
+    """True when subtract() dropped a min/max that merge_extremes() should rebuild."""
+    return any(
+        column['count'] and (column['min'] is None or column['max'] is None)
+        for column in aggregate['columns'].values()
+    )
+
+
+def merge_extremes(aggregate, parts):
+    """Rebuild column min/max of `aggregate` from the aggregates it is made of."""
+    for name, column in aggregate['columns'].items():
+        for key, pick in (('min', min), ('max', max)):
+            values = [part['columns'][name][key] for part in parts if part['columns'][name]['count']]
+            column[key] = pick(values) if values and None not in values else None
+    return aggregate
+
+
+def describe_column(column):
+    count = column['count']
+    if count == 0:
+        return {'count': 0, 'mean': None, 'std': None, 'min': None, 'max': None}
+    std = None
+    if column['m2'] is not None and count > 1:
+        std = math.sqrt(column['m2'] / (count - 1))
+    return {'count': count, 'mean': column['sum'] / count, 'std': std, 'min': column['min'], 'max': column['max']}
@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class DataApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'data_api'
+
+    def ready(self):
+        from .db import configure_sqlite_connection
+
+        connection_created.connect(configure_sqlite_connection, dispatch_uid='data_api.sqlite_pragmas')
+
+        from . import rollups
+        from .models import UploadedDataset
+
+        post_save.connect(rollups.dataset_saved, sender=UploadedDataset, dispatch_uid='data_api.rollup_add')
+        post_delete.connect(rollups.dataset_deleted, sender=UploadedDataset, dispatch_uid='data_api.rollup_remove')
+
+        if settings.DATA_API_WARMUP:
+            from .warmup import warm_up
+
+            warm_up()
@@ -0,0 +1,256 @@
+"""
+Async versions of the data_api views, served when ASYNC_VIEWS_ENABLED is on
+(the default under chemical_viz_project.asgi).
+
+DRF 3.14 views are synchronous; under ASGI Django runs each of them in a
+worker thread, so every in-flight request holds a thread and a burst of
+reports renders as many PDFs at once as there are threads. These views keep
+the same URLs, authentication and response bodies, but await the database
+and hand CPU-bound parsing and PDF rendering to the bounded pool in
+data_api.executor, so cheap calls stay on the event loop while at most
+ASYNC_EXECUTOR_WORKERS heavy jobs run per worker.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import admission, metrics
+from .executor import run_cpu
+from .models import UploadedDataset
+from .storage import get_storage
+from .serializers import UploadedDatasetListSerializer, UploadedDatasetSerializer
+from .timing import NULL_TIMER, PhaseTimer
+from .views import CSVUploadView, HistoryListView, SummaryView, DatasetRowsView
+
+def _authenticate(request):
+    """Run the DRF authenticators against a plain Django request; returns the user or None."""
+    drf_request = Request(request)
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = authenticator_class().authenticate(drf_request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of the APIView + RequestMetricsMixin + PhaseTimingMixin stack:
+    authenticates with the DRF authenticators, requires a logged-in user, records
+    request metrics and phase timings, and turns APIExceptions into JSON errors.
+    """
+
+    admission_scope = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Basic auth only, so like DRF's APIView these views are CSRF exempt.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        self.timer = PhaseTimer() if settings.REQUEST_TIMING_ENABLED else NULL_TIMER
+        try:
+            with self.timer.phase('auth'):
+                user = await sync_to_async(_authenticate)(request)
+            if user is None:
+                raise NotAuthenticated()
+            request.user = user
+            slot_id = None
+            if settings.ADMISSION_CONTROL_ENABLED and self.admission_scope:
+                with self.timer.phase('queue'):
+                    slot_id = await admission.aacquire(self.admission_scope, user.id)
+            try:
+                response = await super().dispatch(request, *args, **kwargs)
+            finally:
+                if slot_id is not None:
+                    await sync_to_async(admission.release, thread_sensitive=False)(slot_id)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            response = json_response(detail, status=exc.status_code)
+            if isinstance(exc, NotAuthenticated):
+                response['WWW-Authenticate'] = 'Basic realm="api"'
+            if getattr(exc, 'wait', None):
+                response['Retry-After'] = '%d' % exc.wait
+
+        view = type(self).__name__
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - started, view=view, method=request.method)
+        metrics.REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        self.timer.finish(request, response, view)
+        return response
+
+    async def get_dataset(self, request, pk, defer=()):
+        try:
+            return await UploadedDataset.objects.defer(*defer).aget(pk=pk, user=request.user)
+        except (UploadedDataset.DoesNotExist, ValueError):
+            raise NotFound()
+
+
+class AsyncHistoryListView(AsyncAPIView):
+    async def get(self, request, *args, **kwargs):
+        with self.timer.phase('db'):
+            datasets = [d async for d in HistoryListView.history_queryset(request.user, request.GET)]
+        return json_response(UploadedDatasetListSerializer(datasets, many=True).data)
+
+    async def delete(self, request, pk, *args, **kwargs):
+        dataset = await self.get_dataset(request, pk)
+        storage = get_storage()
+        await sync_to_async(storage.delete, thread_sensitive=False)(dataset.file_path)
+        await sync_to_async(storage.delete, thread_sensitive=False)(dataset.rejected_path)
+        await dataset.adelete()
+        return json_response({"message": "Dataset deleted successfully"})
+
+
+class AsyncCSVUploadView(AsyncAPIView):
+    admission_scope = 'upload'
+
+    async def post(self, request, *args, **kwargs):
+        from . import processing
+
+        files = await sync_to_async(lambda: request.FILES, thread_sensitive=False)()
+        if 'file' not in files:
+            return json_response({"error": "No file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        uploaded_file = files['file']
+
+        if not uploaded_file.name.endswith(('.csv', '.xlsx')):
+            return json_response({"error": "Unsupported file format. Please upload a CSV or Excel file."},
+                                 status=status.HTTP_400_BAD_REQUEST)
+
+        storage = get_storage()
+        delete = sync_to_async(storage.delete, thread_sensitive=False)
+        file_path = None
+        rejected_path = ''
+        timer = self.timer
+        try:
+            with timer.phase('save'):
+                stored = await sync_to_async(storage.save, thread_sensitive=False)(
+                    uploaded_file.chunks(), uploaded_file.name
+                )
+                file_path = stored.path
+
+            with timer.phase('parse'):
+                parsed = await run_cpu(processing.parse_upload, file_path, uploaded_file.name)
+                summary_data, rejected_path = parsed.summary, parsed.rejected_path
+
+            with timer.phase('db'):
+                dataset = UploadedDataset(
+                    user=request.user,
+                    name=uploaded_file.name,
+                    summary_data=summary_data,
+                    file_path=file_path,
+                    file_size=uploaded_file.size,
+                    content_hash=stored.sha256,
+                    rejected_path=rejected_path,
+                    outlier_index=parsed.outlier_index,
+                    correlation=parsed.correlation
+                )
+                dataset.sync_summary_fields()
+                await dataset.asave()
+
+            metrics.UPLOAD_BYTES.inc(uploaded_file.size)
+            metrics.UPLOAD_ROWS.inc(summary_data['total_records'])
+
+            return json_response(UploadedDatasetSerializer(dataset).data, status=status.HTTP_201_CREATED)
+
+        except processing.MissingColumnsError as e:
+            await delete(file_path)
+            return json_response({"error": "Missing required columns in the dataset.", "missing": e.missing},
+                                 status=status.HTTP_400_BAD_REQUEST)
+        except processing.EmptyDataError:
+            await delete(file_path)
+            return json_response({"error": "The uploaded file is empty or corrupted."},
+                                 status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            await delete(file_path)
+            await delete(rejected_path)
+            return json_response({"error": f"An unexpected error occurred during processing: {str(e)}"},
+                                 status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncSummaryView(AsyncAPIView):
+    async def get(self, request, pk=None, *args, **kwargs):
+        dataset_id = pk or request.GET.get('id')
+
+        if not dataset_id:
+            return json_response({"error": "Dataset ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with self.timer.phase('db'):
+            dataset = await self.get_dataset(request, dataset_id, defer=('outlier_index', 'correlation'))
+
+        return json_response(SummaryView.build_response(dataset.summary_data))
+
+
+class AsyncDatasetRowsView(AsyncAPIView):
+    async def get(self, request, pk, *args, **kwargs):
+        from . import processing
+
+        dataset = await self.get_dataset(request, pk)
+
+        # Storage calls touch the disk (or network), so they stay off the event loop.
+        storage = get_storage()
+        if not await sync_to_async(storage.exists, thread_sensitive=False)(dataset.file_path):
+            return json_response({"error": "The dataset file is no longer available."},
+                                 status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            offset = max(int(request.GET.get('offset', 0)), 0)
+            limit = min(max(int(request.GET.get('limit', 100)), 1), DatasetRowsView.MAX_LIMIT)
+        except ValueError:
+            return json_response({"error": "offset and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ordering = request.GET.get('ordering', '')
+        if ordering and ordering.lstrip('-') not in CSVUploadView.REQUIRED_COLUMNS:
+            return json_response({"error": f"Cannot order by '{ordering}'."}, status=status.HTTP_400_BAD_REQUEST)
+        search = request.GET.get('search', '').strip()
+
+        mtime = await sync_to_async(storage.modified_time, thread_sensitive=False)(dataset.file_path)
+        count, results = await run_cpu(
+            processing.rows_page, dataset.file_path, mtime, ordering, search, offset, limit
+        )
+        return json_response({
+            "count": count,
+            "offset": offset,
+            "columns": CSVUploadView.REQUIRED_COLUMNS,
+            "results": results,
+        })
+
+
+class AsyncPDFReportView(AsyncAPIView):
+    admission_scope = 'report'
+
+    async def get(self, request, pk=None, *args, **kwargs):
+        from . import reports
+
+        dataset_id = pk or request.GET.get('id')
+
+        if not dataset_id:
+            return json_response({"error": "Dataset ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with self.timer.phase('db'):
+            dataset = await self.get_dataset(request, dataset_id)
+
+        render_started = time.perf_counter()
+        with self.timer.phase('render'):
+            pdf = await run_cpu(reports.render_dataset_report, dataset, request.user.username)
+        metrics.REPORT_RENDER.observe(time.perf_counter() - render_started)
+
+        # ReportLab only has the document once it is complete (the cross-reference
+        # table comes last), so the finished bytes are sent as a plain response.
+        response = HttpResponse(pdf, content_type='application/pdf')
+        filename = f"Report_{dataset.name.split('.')[0]}_{dataset.timestamp.strftime('%Y%m%d')}.pdf"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,276 @@
+"""
+Benchmarks for the upload, summary and report hot paths.
+
+Every scenario runs in a forked child process so its peak RSS is measured in
+isolation from the others. Run them with ``python manage.py run_benchmarks``.
+"""
+import json
+import multiprocessing
+import os
+import queue as queue_module
+import resource
+import statistics
+import sys
+import time
+import traceback
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .synthetic import XLSX_MAX_ROWS, iter_equipment_chunks, write_csv, write_xlsx
+
+SIZES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1M': 1_000_000,
+    '10M': 10_000_000,
+}
+# csv-wide adds WIDE_EXTRA_COLUMNS columns the app ignores, to measure column pruning;
+# csv-dirty spoils DIRTY_FRACTION of each numeric column, to measure validation.
+FORMATS = ['csv', 'xlsx', 'csv-wide', 'csv-dirty']
+WIDE_EXTRA_COLUMNS = 30
+DIRTY_FRACTION = 0.05
+
+# Differences below these floors are treated as noise when comparing to a baseline.
+MIN_SECONDS_DELTA = 0.005
+MIN_RSS_DELTA_MB = 5.0
+
+BENCH_USERNAME = 'benchmark-user'
+
+
+def write_dataset(directory, size_label, fmt):
+    """Write (or reuse) the synthetic dataset for a size/format and return its path."""
+    rows = SIZES[size_label]
+    if fmt == 'csv-wide':
+        path = os.path.join(directory, f"equipment_{size_label}_wide.csv")
+        chunks = iter_equipment_chunks(rows, extra_columns=WIDE_EXTRA_COLUMNS)
+    elif fmt == 'csv-dirty':
+        path = os.path.join(directory, f"equipment_{size_label}_dirty.csv")
+        chunks = iter_equipment_chunks(rows, dirty_fraction=DIRTY_FRACTION)
+    else:
+        path = os.path.join(directory, f"equipment_{size_label}.{fmt}")
+        chunks = iter_equipment_chunks(rows)
+    if os.path.exists(path):
+        return path
+
+    writer = write_xlsx if fmt == 'xlsx' else write_csv
+    writer(path, chunks)
+    return path
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _current_rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return _peak_rss_mb()
+
+
+def _child_entry(queue, func, args):
+    try:
+        start_rss = _current_rss_mb()
+        result = func(*args)
+        result['peak_rss_mb'] = round(_peak_rss_mb(), 1)
+        result['rss_growth_mb'] = round(max(_peak_rss_mb() - start_rss, 0.0), 1)
+        queue.put(result)
+    except BaseException:
+        queue.put({'error': traceback.format_exc()})
+    finally:
+        connections.close_all()
+
+
+def run_isolated(func, *args):
+    """Run func(*args) in a forked child and return its result dict with RSS figures added."""
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    # Never share an open database connection with the child.
+    connections.close_all()
+    process = ctx.Process(target=_child_entry, args=(queue, func, args))
+    process.start()
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except queue_module.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"Benchmark process exited with code {process.exitcode}")
+    process.join()
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return result
+
+
+def _median_seconds(timings):
+    return round(statistics.median(timings), 4)
+
+
+def bench_upload(path, rows, repeat):
+    from .views import CSVUploadView
+
+    user = User.objects.get(username=BENCH_USERNAME)
+    factory = APIRequestFactory()
+    view = CSVUploadView.as_view()
+    with open(path, 'rb') as fh:
+        content = fh.read()
+
+    timings = []
+    dataset_id = None
+    for _ in range(repeat):
+        request = factory.post(
+            '/api/upload/',
+            {'file': SimpleUploadedFile(os.path.basename(path), content)},
+            format='multipart'
+        )
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        response = view(request)
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 201:
+            raise RuntimeError(f"Upload failed with {response.status_code}: {response.data}")
+        dataset_id = response.data['id']
+
+    seconds = _median_seconds(timings)
+    return {
+        'seconds': seconds,
+        'rows_per_sec': round(rows / seconds) if seconds else None,
+        'mb_per_sec': round(len(content) / (1024 * 1024) / seconds, 2) if seconds else None,
+        'dataset_id': dataset_id,
+    }
+
+
+def bench_summary(dataset_id, rows, repeat):
+    from .views import SummaryView
+
+    user = User.objects.get(username=BENCH_USERNAME)
+    factory = APIRequestFactory()
+    view = SummaryView.as_view()
+
+    timings = []
+    for _ in range(repeat):
+        request = factory.get(f'/api/summary/{dataset_id}/')
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        response = view(request, pk=dataset_id)
+        response.render()
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"Summary failed with {response.status_code}")
+
+    return {'seconds': _median_seconds(timings)}
+
+
+def bench_report(dataset_id, rows, repeat):
+    from .views import PDFReportView
+
+    user = User.objects.get(username=BENCH_USERNAME)
+    factory = APIRequestFactory()
+    view = PDFReportView.as_view()
+
+    timings = []
+    pdf_bytes = 0
+    for _ in range(repeat):
+        request = factory.get(f'/api/report/{dataset_id}/')
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        response = view(request, pk=dataset_id)
+        pdf_bytes = len(response.content)
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"Report failed with {response.status_code}")
+
+    return {'seconds': _median_seconds(timings), 'pdf_bytes': pdf_bytes}
+
+
+def run_suite(data_dir, sizes, formats, repeat=3, log=print):
+    """
+    Run every scenario for each size/format and return {"<scenario>/<format>/<size>": metrics}.
+    Expects the database to be a throwaway test database.
+    """
+    User.objects.get_or_create(username=BENCH_USERNAME)
+    results = {}
+
+    for size_label in sizes:
+        rows = SIZES[size_label]
+        for fmt in formats:
+            if fmt == 'xlsx' and rows > XLSX_MAX_ROWS:
+                log(f"skip {fmt}/{size_label}: more rows than an Excel sheet can hold")
+                continue
+
+            path = write_dataset(data_dir, size_label, fmt)
+            # Large files are only uploaded once; repeats would dominate the run time.
+            upload_repeat = repeat if rows <= SIZES['100k'] else 1
+
+            upload = run_isolated(bench_upload, path, rows, upload_repeat)
+            dataset_id = upload.pop('dataset_id')
+            upload['rows'] = rows
+            upload['bytes'] = os.path.getsize(path)
+            results[f"upload/{fmt}/{size_label}"] = upload
+            log(_format_line(f"upload/{fmt}/{size_label}", upload))
+
+            summary = run_isolated(bench_summary, dataset_id, rows, repeat)
+            results[f"summary/{fmt}/{size_label}"] = summary
+            log(_format_line(f"summary/{fmt}/{size_label}", summary))
+
+            report = run_isolated(bench_report, dataset_id, rows, repeat)
+            results[f"report/{fmt}/{size_label}"] = report
+            log(_format_line(f"report/{fmt}/{size_label}", report))
+
+    return results
+
+
+def _format_line(key, metrics):
+    line = f"{key:<24} {metrics['seconds']:>9.4f}s  peak {metrics['peak_rss_mb']:>8.1f} MB  (+{metrics['rss_growth_mb']:.1f} MB)"
+    if metrics.get('rows_per_sec'):
+        line += f"  {metrics['rows_per_sec']:,} rows/s"
+    return line
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Return a list of human-readable regressions where a scenario got slower or
+    grew more memory than the baseline allows.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        checks = [
+            ('seconds', MIN_SECONDS_DELTA, 's'),
+            ('rss_growth_mb', MIN_RSS_DELTA_MB, ' MB'),
+        ]
+        for metric, floor, unit in checks:
+            current, previous = metrics.get(metric), base.get(metric)
+            if current is None or previous is None:
+                continue
+            if current > previous * (1 + tolerance) and current - previous > floor:
+                change = (current - previous) / previous * 100 if previous else float('inf')
+                regressions.append(
+                    f"{key}: {metric} {current}{unit} vs baseline {previous}{unit} (+{change:.0f}%)"
+                )
+    return regressions
+
+
+def missing_from_baseline(results, baseline):
+    """Scenarios that were run but have no baseline entry, so compare_to_baseline() cannot check them."""
+    return sorted(key for key in results if not baseline.get(key))
+
+
+def load_baseline(path):
+    with open(path) as fh:
+        return json.load(fh).get('results', {})
+
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as fh:
+        json.dump({'platform': sys.platform, 'python': sys.version.split()[0], 'results': results}, fh, indent=2, sort_keys=True)
@@ -0,0 +1,207 @@
+"""
+Covariance/correlation of Flowrate, Pressure and Temperature, overall and per
+Type, plus bounded row samples for scatter plots.
+
+Moments are stored per group as
+
+    {"count": n, "mean": [3], "m2": [3], "cm": [3]}
+
+where m2 holds the sums of squared deviations and cm the co-moments
+sum((x - mean_x) * (y - mean_y)) of the PAIRS. Like data_api.aggregates,
+two moment sets merge exactly (Chan et al.), so chunks and appended rows
+combine without rereading anything.
+
+Samples are bottom-k samples: every row draws a uniform random key, and a
+group keeps the SCATTER_SAMPLE_SIZE rows with the smallest keys. The union of two
+bottom-k samples, cut back to k, is the bottom-k sample of the combined rows,
+so samples merge exactly too. Only the SCATTER_SAMPLE_TYPES largest types keep
+a sample; a type that becomes large later through appends has a sample of the
+appended rows only. "all" is the sample of the whole dataset.
+
+UploadedDataset.correlation holds {"moments": {"all": ..., "types": {...}},
+"samples": {"all": ..., "types": {...}}}.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+PAIRS = [(0, 1), (0, 2), (1, 2)]
+ALL_SAMPLE_SIZE = 1000
+
+
+# --- Moments ---
+
+def _entries(count, means, m2, cm):
+    return {"count": int(count), "mean": [float(v) for v in means], "m2": [float(v) for v in m2],
+            "cm": [float(v) for v in cm]}
+
+
+def moments(df):
+    """Overall and per-type moments of a cleaned frame, from grouped sums (no per-row Python)."""
+    values = df[COLUMNS].astype(float)
+    types = df['Type']
+    grouped = values.groupby(types, observed=True, sort=False)
+    centered = values - grouped.transform('mean')
+    products = pd.DataFrame({f"{a}{b}": centered.iloc[:, a] * centered.iloc[:, b] for a, b in PAIRS})
+    counts = grouped.size()
+    means = grouped.mean()
+    m2 = (centered ** 2).groupby(types, observed=True, sort=False).sum()
+    cm = products.groupby(types, observed=True, sort=False).sum()
+
+    by_type = {
+        str(name): _entries(counts[name], means.loc[name], m2.loc[name], cm.loc[name])
+        for name in counts.index
+    }
+    overall = values - values.mean()
+    everything = _entries(
+        len(values), values.mean() if len(values) else [0.0] * 3, (overall ** 2).sum(),
+        [(overall.iloc[:, a] * overall.iloc[:, b]).sum() for a, b in PAIRS],
+    )
+    return {"all": everything, "types": by_type}
+
+
+def merge_entry(a, b):
+    if a["count"] == 0:
+        return b
+    if b["count"] == 0:
+        return a
+    n = a["count"] + b["count"]
+    weight = a["count"] * b["count"] / n
+    delta = [mb - ma for ma, mb in zip(a["mean"], b["mean"])]
+    return {
+        "count": n,
+        "mean": [ma + d * b["count"] / n for ma, d in zip(a["mean"], delta)],
+        "m2": [x + y + d * d * weight for x, y, d in zip(a["m2"], b["m2"], delta)],
+        "cm": [x + y + delta[i] * delta[j] * weight for (x, y), (i, j) in zip(zip(a["cm"], b["cm"]), PAIRS)],
+    }
+
+
+def merge_moments(a, b):
+    types = dict(a["types"])
+    for name, entry in b["types"].items():
+        types[name] = merge_entry(types[name], entry) if name in types else entry
+    return {"all": merge_entry(a["all"], b["all"]), "types": types}
+
+
+def matrices(entry):
+    """Sample covariance (ddof=1) and Pearson correlation matrices of one moments entry."""
+    n = entry["count"]
+    if n < 2:
+        return None, None
+    size = len(COLUMNS)
+    covariance = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        covariance[i][i] = entry["m2"][i] / (n - 1)
+    for (i, j), value in zip(PAIRS, entry["cm"]):
+        covariance[i][j] = covariance[j][i] = value / (n - 1)
+    correlation = [[None] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(size):
+            scale = math.sqrt(covariance[i][i] * covariance[j][j])
+            if scale > 0:
+                correlation[i][j] = max(-1.0, min(1.0, covariance[i][j] / scale))
+    return covariance, correlation
+
+
+# --- Samples ---
+
+def _pack(keys, values):
+    return {"key": keys.tolist(), **{col.lower(): values[:, i].round(6).tolist() for i, col in enumerate(COLUMNS)}}
+
+
+def _keep_types(counts):
+    """The types that keep a sample, largest first (samples are stored in this order)."""
+    return sorted(counts, key=counts.get, reverse=True)[:settings.SCATTER_SAMPLE_TYPES]
+
+
+def _type_counts(moments_):
+    return {name: entry["count"] for name, entry in moments_["types"].items()}
+
+
+def samples(df, keep, rng=None):
+    """Bottom-k samples of a cleaned frame: the whole frame and the types in `keep`."""
+    rng = rng or np.random.default_rng()
+    keys = rng.random(len(df))
+    values = df[COLUMNS].to_numpy(dtype=float)
+
+    def take(positions, size):
+        # Partial selection, then only the kept rows are sorted.
+        if len(positions) > size:
+            positions = positions[np.argpartition(keys[positions], size)[:size]]
+        positions = positions[np.argsort(keys[positions])]
+        return _pack(keys[positions], values[positions])
+
+    codes, names = pd.factorize(df['Type'])
+    code_of = {str(name): code for code, name in enumerate(names)}
+    wanted = [code_of[name] for name in keep if name in code_of]
+    rows = np.flatnonzero(np.isin(codes, wanted))
+    # Rows of the kept types ordered by type, then key: each type's sample is a prefix of its run.
+    rows = rows[np.lexsort((keys[rows], codes[rows]))]
+    starts = np.searchsorted(codes[rows], wanted, side='left')
+    ends = np.searchsorted(codes[rows], wanted, side='right')
+    size = settings.SCATTER_SAMPLE_SIZE
+    types = {}
+    for code, start, end in zip(wanted, starts, ends):
+        run = rows[start:min(start + size, end)]
+        types[str(names[code])] = _pack(keys[run], values[run])
+    return {"all": take(np.arange(len(df)), ALL_SAMPLE_SIZE), "types": types}
+
+
+def _merge_sample(a, b, size):
+    keys = np.concatenate([a["key"], b["key"]])
+    values = np.column_stack([np.concatenate([a[col.lower()], b[col.lower()]]) for col in COLUMNS])
+    order = np.argsort(keys, kind='stable')[:size]
+    return _pack(keys[order], values[order])
+
+
+def merge_samples(a, b, keep):
+    types = {}
+    for name in keep:
+        if name in a["types"] and name in b["types"]:
+            types[name] = _merge_sample(a["types"][name], b["types"][name], settings.SCATTER_SAMPLE_SIZE)
+        elif name in a["types"] or name in b["types"]:
+            types[name] = a["types"].get(name) or b["types"][name]
+    return {"all": _merge_sample(a["all"], b["all"], ALL_SAMPLE_SIZE), "types": types}
+
+
+# --- Stored form ---
+
+def build(df):
+    """The UploadedDataset.correlation value for a cleaned frame."""
+    if df.empty:
+        return {}
+    moments_ = moments(df)
+    return {"moments": moments_, "samples": samples(df, _keep_types(_type_counts(moments_)))}
+
+
+def extend(stored, df):
+    """Merge rows appended to a dataset into its stored correlation data."""
+    if not stored:
+        # Datasets uploaded before correlation data existed: the appended rows alone
+        # would misdescribe them, so they stay without.
+        return stored
+    if df.empty:
+        return stored
+    merged = merge_moments(stored["moments"], moments(df))
+    # The appended rows are sampled for the types that are largest after the merge.
+    keep = _keep_types(_type_counts(merged))
+    return {"moments": merged, "samples": merge_samples(stored["samples"], samples(df, keep), keep)}
+
+
+def view(stored, type_name=None):
+    """Matrices and scatter sample for the whole dataset or one type. Raises KeyError for an unknown type."""
+    entry = stored["moments"]["all"] if type_name is None else stored["moments"]["types"][type_name]
+    sample_source = stored["samples"]["all"] if type_name is None else stored["samples"]["types"].get(type_name)
+    covariance, correlation = matrices(entry)
+    sample = {col.lower(): sample_source[col.lower()] for col in COLUMNS} if sample_source else None
+    return {
+        "count": entry["count"],
+        "columns": [col.lower() for col in COLUMNS],
+        "covariance": covariance,
+        "correlation": correlation,
+        "sample_size": len(sample_source["key"]) if sample_source else 0,
+        "sample": sample,
+    }
@@ -0,0 +1,28 @@
+"""
+SQLite connection tuning.
+
+With several gunicorn workers sharing db.sqlite3, the default rollback
+journal makes readers and writers block each other and surfaces as
+"database is locked". When SQLITE_TUNING_ENABLED is on, every new SQLite
+connection gets the pragmas in SQLITE_PRAGMAS: WAL journaling (readers no
+longer wait for writers), a busy timeout (writers queue instead of failing),
+synchronous=NORMAL (safe with WAL, far fewer fsyncs) and larger mmap/page caches.
+"""
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    """Run `PRAGMA name = value` for each item on a DB-API cursor."""
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """connection_created handler; a no-op for other backends or when tuning is off."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_TUNING_ENABLED:
+        return
+    cursor = connection.connection.cursor()
+    try:
+        apply_sqlite_pragmas(cursor, settings.SQLITE_PRAGMAS)
+    finally:
+        cursor.close()
@@ -0,0 +1,84 @@
+"""
+Bounded pool for the CPU-bound work started by the async views.
+
+Parsing uploads and rendering reports would otherwise run on the event loop
+and stall every other request on the worker. ``await run_cpu(func, *args)``
+hands them to a pool of ASYNC_EXECUTOR_WORKERS threads or processes
+(ASYNC_EXECUTOR), so at most that many heavy jobs run at once per worker while
+history and summary calls keep being served.
+
+get_chart_pool() is a separate process pool for rendering Matplotlib charts
+from any view (pyplot is not thread-safe), sized by REPORT_CHART_WORKERS.
+
+Functions sent to the process pools must be importable top-level functions with
+picklable arguments; the pool's processes run django.setup() first so model
+instances can be passed in.
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_executor = None
+_executor_key = None
+_chart_pool = None
+_chart_pool_key = None
+
+
+def init_process_worker():
+    import django
+
+    django.setup()
+
+
+def get_executor():
+    """Return this process's pool, (re)creating it after a fork or a settings change."""
+    global _executor, _executor_key
+    key = (os.getpid(), settings.ASYNC_EXECUTOR, settings.ASYNC_EXECUTOR_WORKERS)
+    with _lock:
+        if _executor_key != key:
+            if _executor is not None and _executor_key[0] == os.getpid():
+                _executor.shutdown(wait=False)
+            if settings.ASYNC_EXECUTOR == 'process':
+                # spawn, not fork: the parent is running an event loop and threads.
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.ASYNC_EXECUTOR_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_process_worker,
+                )
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_EXECUTOR_WORKERS, thread_name_prefix='data-api-cpu'
+                )
+            _executor_key = key
+        return _executor
+
+
+def get_chart_pool():
+    """This process's chart-rendering pool, or None when REPORT_CHART_WORKERS is below 2."""
+    global _chart_pool, _chart_pool_key
+    key = (os.getpid(), settings.REPORT_CHART_WORKERS)
+    with _lock:
+        if _chart_pool_key != key:
+            if _chart_pool is not None and _chart_pool_key[0] == os.getpid():
+                _chart_pool.shutdown(wait=False)
+            _chart_pool = None
+            if settings.REPORT_CHART_WORKERS > 1:
+                _chart_pool = ProcessPoolExecutor(
+                    max_workers=settings.REPORT_CHART_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_process_worker,
+                )
+            _chart_pool_key = key
+        return _chart_pool
+
+
+async def run_cpu(func, *args):
+    """Run func(*args) in the bounded pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
@@ -0,0 +1,147 @@
+"""
+Spreadsheet exports of a dataset's statistics and cleaned rows.
+
+Both formats are produced as generators of byte chunks for a
+StreamingHttpResponse, so an export never holds a whole file in memory:
+
+* CSV is written a chunk of rows at a time as the stored file is read
+  (processing.iter_frames()) and cleaned.
+* XLSX uses openpyxl's write-only mode, which spools each sheet's XML to a
+  temporary file as rows are appended; the finished workbook is zipped to a
+  temporary file and streamed from there. openpyxl cannot emit a zip
+  incrementally, so the first byte of an XLSX export is sent only once the
+  workbook is complete.
+
+The statistics come from what the upload stored (summary_data, the
+correlation moments and the outlier index's per-type medians/MADs); only
+the cleaned rows are read from the raw file.
+"""
+import csv
+import io
+import math
+import os
+import tempfile
+
+from django.conf import settings
+
+from . import processing
+
+STREAM_CHUNK_BYTES = 256 * 1024
+# Rows per worksheet, below Excel's limit of 1,048,576 (including the header row).
+XLSX_SHEET_ROWS = 1_000_000
+
+PARTS = ['summary', 'types', 'rows']
+NUMERIC = ['flowrate', 'pressure', 'temperature']
+
+
+def summary_rows(dataset):
+    """(field, value) rows describing the dataset as a whole."""
+    summary = dataset.summary_data or {}
+    averages = summary.get('averages', {})
+    rejected = summary.get('rejected', {})
+    rows = [
+        ['Field', 'Value'],
+        ['Dataset', dataset.name],
+        ['Uploaded', dataset.timestamp.strftime('%Y-%m-%d %H:%M:%S')],
+        ['Total records', summary.get('total_records', 0)],
+        ['Rejected rows', rejected.get('rows', 0)],
+        ['Distinct types', len(summary.get('type_distribution', {}))],
+    ]
+    rows += [[f"Average {name}", averages.get(name)] for name in NUMERIC]
+    time_series = summary.get('time_series')
+    if time_series:
+        rows += [['Time column', time_series['column']], ['Start', time_series['start']],
+                 ['End', time_series['end']]]
+    return rows
+
+
+def type_rows(dataset):
+    """One row of statistics per equipment type, largest type first."""
+    counts = (dataset.summary_data or {}).get('type_distribution', {})
+    moments = (dataset.correlation or {}).get('moments', {}).get('types', {})
+    robust = (dataset.outlier_index or {}).get('stats', {})
+    header = ['Type', 'Rows']
+    for name in NUMERIC:
+        header += [f"{name} mean", f"{name} std", f"{name} median", f"{name} MAD"]
+    rows = [header]
+    for type_name, count in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+        row = [type_name, count]
+        entry = moments.get(type_name)
+        stats = robust.get(type_name, {})
+        for i, name in enumerate(NUMERIC):
+            if entry:
+                n = entry['count']
+                row += [entry['mean'][i], math.sqrt(entry['m2'][i] / (n - 1)) if n > 1 else None]
+            else:
+                row += [None, None]
+            row += stats.get(name, [None, None])
+        rows.append(row)
+    return rows
+
+
+def cleaned_frames(dataset):
+    """The dataset's cleaned rows, EXPORT_CHUNK_ROWS at a time."""
+    for chunk in processing.iter_frames(dataset.file_path, settings.EXPORT_CHUNK_ROWS):
+        frame = processing.validate_frame(chunk).frame
+        if len(frame):
+            yield frame
+
+
+# --- CSV ---
+
+def _csv_text(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def csv_stream(dataset, part):
+    """CSV of one PARTS entry, as byte chunks."""
+    if part == 'summary':
+        yield _csv_text(summary_rows(dataset))
+    elif part == 'types':
+        yield _csv_text(type_rows(dataset))
+    else:
+        header = True
+        for frame in cleaned_frames(dataset):
+            yield frame.to_csv(index=False, header=header).encode()
+            header = False
+
+
+# --- XLSX ---
+
+def _append_rows(workbook, title, frames):
+    sheet, written, number = None, 0, 0
+    for frame in frames:
+        columns = list(frame.columns)
+        for row in frame.itertuples(index=False, name=None):
+            if sheet is None or written == XLSX_SHEET_ROWS:
+                number += 1
+                sheet = workbook.create_sheet(title if number == 1 else f"{title} {number}")
+                sheet.append(columns)
+                written = 0
+            sheet.append(row)
+            written += 1
+
+
+def xlsx_stream(dataset, include_rows=False):
+    """Workbook with Summary and Types sheets (and Rows when asked), as byte chunks."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for title, rows in (('Summary', summary_rows(dataset)), ('Types', type_rows(dataset))):
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    if include_rows:
+        _append_rows(workbook, 'Rows', cleaned_frames(dataset))
+
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as fh:
+            while chunk := fh.read(STREAM_CHUNK_BYTES):
+                yield chunk
+    finally:
+        os.remove(path)
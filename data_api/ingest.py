@@ -0,0 +1,135 @@
+"""
+Offline bulk ingestion of a directory tree of CSV/XLSX files
+(manage.py ingest_directory).
+
+Files are processed in parallel by a pool of worker processes. Each worker
+runs the upload pipeline on one file: it stores a compressed copy through the
+raw-file storage, then parses, validates and summarizes it with
+processing.parse_upload(). That gives the rejected-rows sidecar, the
+outlier index and the correlation data, exactly as for an upload through
+CSVUploadView. The parent process inserts the resulting UploadedDataset rows
+with bulk_create, one transaction per batch. The batch's aggregates are
+merged into the user's rollup in the same transaction.
+
+Runs are resumable. After each batch commits, its files are appended to a
+JSON-lines ledger with their size and mtime, and later runs skip unchanged
+files listed there. A file whose content hash already belongs to one of the
+user's datasets is skipped too. That covers a run killed between a commit
+and its ledger write.
+
+Ingested datasets are marked archived, which exempts them from the
+5-dataset history limit: the user's later uploads never prune them.
+"""
+import json
+import os
+import time
+
+from django.db import transaction
+
+SUFFIXES = ('.csv', '.xlsx')
+LEDGER_NAME = '.ingest_ledger.jsonl'
+
+
+def find_files(root):
+    """CSV/XLSX files under `root`, as paths relative to it, in a stable order; hidden entries are skipped."""
+    found = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith('.'))
+        for name in sorted(files):
+            if name.endswith(SUFFIXES) and not name.startswith('.'):
+                found.append(os.path.relpath(os.path.join(directory, name), root))
+    return found
+
+
+def file_key(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_ledger(path):
+    """{relative path: entry} of the files earlier runs finished."""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    done[entry["path"]] = entry
+    return done
+
+
+def append_ledger(path, entries):
+    with open(path, 'a') as fh:
+        for entry in entries:
+            fh.write(json.dumps(entry) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def ingest_file(job):
+    """
+    Store and process one file (runs in a worker). `job` is (root, relative
+    path). Returns the fields of its UploadedDataset, or {"error": ...}.
+    """
+    from . import processing
+    from .storage import get_storage
+
+    root, relative = job
+    path = os.path.join(root, relative)
+    name = os.path.basename(relative)
+    storage = get_storage()
+    stored = None
+    started = time.perf_counter()
+    try:
+        with open(path, 'rb') as fh:
+            stored = storage.save(iter(lambda: fh.read(1024 * 1024), b''), name)
+        parsed = processing.parse_upload(stored.path, name)
+    except Exception as e:
+        if stored is not None:
+            storage.delete(stored.path)
+        return {"path": relative, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "path": relative,
+        **file_key(path),
+        "seconds": time.perf_counter() - started,
+        "fields": {
+            "name": name,
+            "summary_data": parsed.summary,
+            "file_path": stored.path,
+            "file_size": stored.size,
+            "content_hash": stored.sha256,
+            "rejected_path": parsed.rejected_path,
+            "outlier_index": parsed.outlier_index,
+            "correlation": parsed.correlation,
+        },
+    }
+
+
+def discard(result):
+    """Remove the stored files of a processed file that will not be inserted."""
+    from .storage import get_storage
+
+    storage = get_storage()
+    storage.delete(result["fields"]["file_path"])
+    storage.delete(result["fields"]["rejected_path"])
+
+
+def save_batch(user, results):
+    """Insert one batch of processed files and merge them into the user's rollup, atomically."""
+    from . import aggregates, rollups
+    from .models import UploadedDataset
+
+    datasets = []
+    for result in results:
+        dataset = UploadedDataset(user=user, archived=True, **result["fields"])
+        dataset.sync_summary_fields()
+        datasets.append(dataset)
+    part = aggregates.empty()
+    for dataset in datasets:
+        part = aggregates.merge(part, aggregates.from_summary(dataset.summary_data))
+
+    with transaction.atomic():
+        # bulk_create sends no post_save signal, so the rollup is updated here, once per batch.
+        UploadedDataset.objects.bulk_create(datasets)
+        rollups.add(user.pk, part, datasets=len(datasets))
+    return datasets
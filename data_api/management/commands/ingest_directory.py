@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from data_api import ingest
+from data_api.executor import init_process_worker
+from data_api.models import UploadedDataset
+
+
+class Command(BaseCommand):
+    help = ('Ingests every CSV/XLSX file under a directory for one user, in parallel worker processes. '
+            'Resumable: files recorded in the ledger by an earlier run are skipped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Root of the directory tree to ingest')
+        parser.add_argument('--user', required=True,
+                            help='Username that will own the datasets. They are archived: the 5-dataset '
+                                 'history limit never prunes them.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (default: one per CPU; 1 processes files in this process)')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Datasets inserted per database transaction')
+        parser.add_argument('--ledger', default=None,
+                            help=f'JSON-lines record of finished files (default: <directory>/{ingest.LEDGER_NAME})')
+
+    def handle(self, *args, **options):
+        root = os.path.abspath(options['directory'])
+        if not os.path.isdir(root):
+            raise CommandError(f"{root} is not a directory")
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}")
+        batch_size = max(options['batch_size'], 1)
+        ledger = options['ledger'] or os.path.join(root, ingest.LEDGER_NAME)
+
+        done = ingest.load_ledger(ledger)
+        pending = []
+        for relative in ingest.find_files(root):
+            entry = done.get(relative)
+            key = ingest.file_key(os.path.join(root, relative))
+            if entry and (entry['size'], entry['mtime_ns']) == (key['size'], key['mtime_ns']):
+                continue
+            pending.append(relative)
+        self.stdout.write(f"{len(pending)} file(s) to ingest, {len(done)} already done")
+        if not pending:
+            return
+
+        known_hashes = set(UploadedDataset.objects.filter(user=user).exclude(content_hash='')
+                           .values_list('content_hash', flat=True))
+        jobs = [(root, relative) for relative in pending]
+        workers = max(min(options['workers'], len(jobs)), 1)
+
+        started = time.perf_counter()
+        files = rows = skipped = failed = 0
+        batch = []
+
+        def flush():
+            nonlocal files, rows
+            if not batch:
+                return
+            datasets = ingest.save_batch(user, batch)
+            committed = list(batch)
+            batch.clear()
+            ingest.append_ledger(ledger, [
+                {"path": result["path"], "size": result["size"], "mtime_ns": result["mtime_ns"], "dataset": dataset.pk}
+                for result, dataset in zip(committed, datasets)
+            ])
+            files += len(datasets)
+            rows += sum(dataset.record_count for dataset in datasets)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{files + skipped + failed}/{len(jobs)} files, {rows} rows "
+                              f"({files / elapsed:.1f} files/s, {rows / elapsed:,.0f} rows/s)")
+
+        pool = None
+        if workers > 1:
+            # Workers never touch the database; close this process's connection so no
+            # open handle is shared, and spawn rather than fork for the same reason.
+            connections.close_all()
+            pool = multiprocessing.get_context('spawn').Pool(workers, initializer=init_process_worker)
+            results = pool.imap_unordered(ingest.ingest_file, jobs)
+        else:
+            results = map(ingest.ingest_file, jobs)
+        try:
+            for result in results:
+                if 'error' in result:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"{result['path']}: {result['error']}"))
+                    continue
+                content_hash = result['fields']['content_hash']
+                if content_hash in known_hashes:
+                    # Already ingested (e.g. a run stopped between its commit and its ledger write).
+                    ingest.discard(result)
+                    ingest.append_ledger(ledger, [{"path": result["path"], "size": result["size"],
+                                                   "mtime_ns": result["mtime_ns"], "dataset": None}])
+                    skipped += 1
+                    continue
+                known_hashes.add(content_hash)
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    flush()
+            flush()
+        finally:
+            # Files processed but not committed (interrupted run) are redone next time.
+            for result in batch:
+                ingest.discard(result)
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {files} file(s), {rows} rows in {elapsed:.1f}s "
+            f"({files / elapsed:.2f} files/s, {rows / elapsed:,.0f} rows/s); "
+            f"{skipped} duplicate(s) skipped, {failed} failed"
+        ))
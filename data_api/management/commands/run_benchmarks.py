@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from data_api import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks upload parsing, summary serialization and PDF rendering on synthetic datasets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1k,100k',
+                            help=f"Comma-separated dataset sizes from: {', '.join(benchmarks.SIZES)}")
+        parser.add_argument('--formats', default=','.join(benchmarks.FORMATS),
+                            help=f"Comma-separated file formats from: {', '.join(benchmarks.FORMATS)}")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Timed repetitions per scenario (the median is reported)')
+        parser.add_argument('--data-dir', default=None,
+                            help='Directory to cache generated datasets in (default: a temporary directory)')
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'),
+                            help='Baseline JSON to compare against')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results to the baseline file instead of comparing')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative slowdown or memory growth before flagging a regression')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when a regression is flagged')
+
+    def handle(self, *args, **options):
+        sizes = [s.strip() for s in options['sizes'].split(',') if s.strip()]
+        formats = [f.strip() for f in options['formats'].split(',') if f.strip()]
+        unknown = [s for s in sizes if s not in benchmarks.SIZES] + [f for f in formats if f not in benchmarks.FORMATS]
+        if unknown:
+            raise CommandError(f"Unknown sizes/formats: {', '.join(unknown)}")
+
+        work_dir = tempfile.mkdtemp(prefix='chemviz-bench-')
+        data_dir = options['data_dir'] or work_dir
+        os.makedirs(data_dir, exist_ok=True)
+
+        # Benchmarks run against a throwaway file-backed test database so forked
+        # scenario processes can all reach it and real data is never touched.
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(work_dir, 'bench.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Repeated uploads would trip the per-user rate limits, which are not what is measured.
+            with override_settings(MEDIA_ROOT=os.path.join(work_dir, 'media'), ADMISSION_CONTROL_ENABLED=False):
+                os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+                results = benchmarks.run_suite(
+                    data_dir, sizes, formats, repeat=options['repeat'], log=self.stdout.write
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        baseline_path = options['baseline']
+        if options['save_baseline']:
+            benchmarks.save_baseline(baseline_path, results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        if not os.path.exists(baseline_path):
+            self.stdout.write(self.style.WARNING(f"No baseline at {baseline_path}; run with --save-baseline to create one."))
+            return
+
+        baseline = benchmarks.load_baseline(baseline_path)
+        missing = benchmarks.missing_from_baseline(results, baseline)
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"Not in the baseline, so not compared: {', '.join(missing)} (run with --save-baseline to add them)"
+            ))
+        regressions = benchmarks.compare_to_baseline(results, baseline, options['tolerance'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+            return
+
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} benchmark regression(s) against {baseline_path}")
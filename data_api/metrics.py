@@ -0,0 +1,270 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Each worker process keeps its counters and histograms in memory and flushes
+them to ``METRICS_DIR/<pid>.json`` at most every METRICS_FLUSH_INTERVAL
+seconds (and at exit). The /api/metrics/ endpoint merges the files of every
+worker, so any gunicorn worker can answer a scrape for the whole server.
+No external service or client library is needed.
+
+The gunicorn master keeps the directory bounded (see gunicorn.conf.py): it
+empties it on start, and when a worker exits it folds that worker's file
+into ARCHIVE_NAME, so totals survive worker restarts without a file per pid.
+"""
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+REPORT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+ARCHIVE_NAME = 'archive.json'
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, registry, name, help_text):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+    def dump(self):
+        return dict(self.values)
+
+    @staticmethod
+    def merge(total, values):
+        for key, value in values.items():
+            total[key] = total.get(key, 0) + value
+
+    def expose(self, values):
+        lines = []
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(json.loads(key))} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, registry, name, help_text, buckets):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            state['buckets'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+        self.registry.maybe_flush()
+
+    def dump(self):
+        return {key: {'buckets': list(s['buckets']), 'sum': s['sum'], 'count': s['count']}
+                for key, s in self.values.items()}
+
+    @staticmethod
+    def merge(total, values):
+        for key, state in values.items():
+            current = total.get(key)
+            if current is None:
+                total[key] = {'buckets': list(state['buckets']), 'sum': state['sum'], 'count': state['count']}
+                continue
+            current['buckets'] = [a + b for a, b in zip(current['buckets'], state['buckets'])]
+            current['sum'] += state['sum']
+            current['count'] += state['count']
+
+    def expose(self, values):
+        lines = []
+        for key, state in sorted(values.items()):
+            labels = json.loads(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state['buckets']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {state['count']}")
+        return lines
+
+
+def _write(path, snapshot):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as fh:
+        json.dump(snapshot, fh)
+    os.replace(tmp_path, path)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+        atexit.register(self.flush)
+
+    def counter(self, name, help_text):
+        return self.metrics.setdefault(name, Counter(self, name, help_text))
+
+    def histogram(self, name, help_text, buckets):
+        return self.metrics.setdefault(name, Histogram(self, name, help_text, buckets))
+
+    def _path(self, pid=None):
+        return os.path.join(settings.METRICS_DIR, f"{pid or os.getpid()}.json")
+
+    def maybe_flush(self):
+        if time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            snapshot = {name: metric.dump() for name, metric in self.metrics.items()}
+            self.last_flush = time.monotonic()
+        if not any(snapshot.values()):
+            return
+        try:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            _write(self._path(), snapshot)
+        except OSError:
+            pass
+
+    def _merge_files(self, paths):
+        merged = {name: {} for name in self.metrics}
+        for path in paths:
+            try:
+                with open(path) as fh:
+                    snapshot = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], values)
+        return merged
+
+    def collect(self):
+        """Merge the flushed state of every worker into {metric name: values}."""
+        self.flush()
+        return self._merge_files(glob.glob(os.path.join(settings.METRICS_DIR, '*.json')))
+
+    def clear_dir(self):
+        """Remove every flushed file (gunicorn on_starting: a new server starts from zero)."""
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json*')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def archive_worker(self, pid):
+        """Fold an exited worker's file into the archive and remove it (gunicorn child_exit)."""
+        path = self._path(pid)
+        if not os.path.exists(path):
+            return
+        archive = os.path.join(settings.METRICS_DIR, ARCHIVE_NAME)
+        merged = self._merge_files([archive, path])
+        try:
+            _write(archive, {name: values for name, values in merged.items() if values})
+            os.remove(path)
+        except OSError:
+            pass
+
+    def expose(self):
+        """Render every metric in the Prometheus text exposition format."""
+        merged = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.expose(merged[name]))
+        lines.extend(self._cache_ratio_lines(merged.get(CACHE_REQUESTS.name, {})))
+        return '\n'.join(lines) + '\n'
+
+    def _cache_ratio_lines(self, cache_values):
+        totals = {}
+        for key, value in cache_values.items():
+            labels = dict(json.loads(key))
+            hits, lookups = totals.get(labels['cache'], (0, 0))
+            totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), lookups + value)
+        lines = [
+            '# HELP chemviz_cache_hit_ratio Share of cache lookups served from cache.',
+            '# TYPE chemviz_cache_hit_ratio gauge',
+        ]
+        for cache, (hits, lookups) in sorted(totals.items()):
+            lines.append(f"chemviz_cache_hit_ratio{_format_labels([('cache', cache)])} {_format_value(hits / lookups)}")
+        return lines
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'chemviz_http_request_duration_seconds', 'Request latency by view.', LATENCY_BUCKETS
+)
+REQUESTS = REGISTRY.counter('chemviz_http_requests_total', 'Requests by view and status code.')
+UPLOAD_BYTES = REGISTRY.counter('chemviz_upload_bytes_total', 'Bytes received by CSVUploadView.')
+UPLOAD_ROWS = REGISTRY.counter('chemviz_upload_rows_total', 'Rows accepted by CSVUploadView after cleaning.')
+REPORT_RENDER = REGISTRY.histogram(
+    'chemviz_report_render_seconds', 'Time spent rendering charts and building report PDFs.', REPORT_BUCKETS
+)
+ADMISSIONS = REGISTRY.counter(
+    'chemviz_admission_total', 'Admission decisions for limited endpoints by scope and result.'
+)
+CACHE_REQUESTS = REGISTRY.counter('chemviz_cache_requests_total', 'Cache lookups by cache and result.')
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+class RequestMetricsMixin:
+    """APIView mixin that records request counts and latency per view."""
+
+    def initial(self, request, *args, **kwargs):
+        self._metrics_started = time.perf_counter()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        started = getattr(self, '_metrics_started', None)
+        if started is not None:
+            view = type(self).__name__
+            REQUEST_LATENCY.observe(time.perf_counter() - started, view=view, method=request.method)
+            REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        return response
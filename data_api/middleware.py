@@ -0,0 +1,225 @@
+"""
+Opt-in request profiling.
+
+ProfilingMiddleware captures a profile of a single request when either:
+
+* the request carries the PROFILE_HEADER and is made by a staff user, in which
+  case the whole request runs under cProfile, or
+* PROFILE_SLOW_REQUEST_MS is set and the request takes longer than that, in
+  which case a low-overhead sampling profiler (which runs on every request
+  while the threshold is enabled) provides the stacks.
+
+Captures are written to PROFILE_DIR, recorded as ProfileCapture rows for the
+Django admin, and pruned so that at most PROFILE_MAX_CAPTURES are kept.
+"""
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .models import ProfileCapture
+
+logger = logging.getLogger('data_api.profiling')
+
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds from a helper thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        # Collapsed-stack format, readable by flamegraph.pl and speedscope.
+        with open(path, 'w') as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+def _is_staff_request(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # API clients authenticate per view (Basic auth), so check their credentials here.
+    drf_request = Request(request)
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authenticator_class().authenticate(drf_request)
+        except APIException:
+            return False
+        if result is not None:
+            return result[0].is_staff
+    return False
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.PROFILE_HEADER.upper().replace('-', '_')
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+
+        capture = self._start(self.header in request.META and _is_staff_request(request))
+        if capture is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            capture = self._stop(capture)
+        self._record(request, response, capture)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return await self.get_response(request)
+
+        # Under ASGI the event loop thread also runs other requests' coroutines,
+        # so their frames can show up in the profile too.
+        is_staff = self.header in request.META and await sync_to_async(_is_staff_request)(request)
+        capture = self._start(is_staff)
+        if capture is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            capture = self._stop(capture)
+        await sync_to_async(self._record)(request, response, capture)
+        return response
+
+    def _start(self, staff_header):
+        """Start the profiler this request qualifies for; returns None when there is none."""
+        started = time.perf_counter()
+        if staff_header:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return (ProfileCapture.TRIGGER_HEADER, profiler, started)
+        if settings.PROFILE_SLOW_REQUEST_MS:
+            sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+            sampler.start()
+            return (ProfileCapture.TRIGGER_THRESHOLD, sampler, started)
+        return None
+
+    def _stop(self, capture):
+        trigger, profiler, started = capture
+        # cProfile hooks the current thread, so this must run where _start did.
+        if trigger == ProfileCapture.TRIGGER_HEADER:
+            profiler.disable()
+        else:
+            profiler.stop()
+        return (trigger, profiler, time.perf_counter() - started)
+
+    def _record(self, request, response, capture):
+        trigger, profiler, elapsed = capture
+        if trigger == ProfileCapture.TRIGGER_HEADER:
+            self._save(request, response, elapsed,
+                       ProfileCapture.TRIGGER_HEADER, ProfileCapture.PROFILER_CPROFILE, profiler.dump_stats, '.prof')
+        elif elapsed * 1000 >= settings.PROFILE_SLOW_REQUEST_MS and profiler.samples:
+            self._save(request, response, elapsed,
+                       ProfileCapture.TRIGGER_THRESHOLD, ProfileCapture.PROFILER_SAMPLING, profiler.dump, '.folded')
+
+    def _save(self, request, response, elapsed, trigger, profiler, dump, extension):
+        try:
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            file_path = os.path.join(
+                settings.PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}{extension}"
+            )
+            dump(file_path)
+            user = getattr(request, 'user', None)
+            ProfileCapture.objects.create(
+                user=user if user is not None and user.is_authenticated else None,
+                method=request.method,
+                path=request.path[:512],
+                status_code=response.status_code,
+                duration_ms=elapsed * 1000,
+                trigger=trigger,
+                profiler=profiler,
+                file_path=file_path,
+            )
+            self._prune()
+        except Exception:
+            # Profiling must never break the request it observed.
+            logger.exception("Failed to save request profile for %s", request.path)
+
+    def _prune(self):
+        stale = ProfileCapture.objects.order_by('-created', '-id')[settings.PROFILE_MAX_CAPTURES:]
+        for capture in stale:
+            if os.path.exists(capture.file_path):
+                try:
+                    os.remove(capture.file_path)
+                except OSError:
+                    pass
+            capture.delete()
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise 6.6 middleware is sync-only, and a sync middleware makes Django
+    hop every ASGI request into a thread and back before it reaches an async
+    view. This subclass serves static files the same way but passes other
+    requests straight through when the handler is async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
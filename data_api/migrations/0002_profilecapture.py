@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileCapture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=512)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('trigger', models.CharField(choices=[('threshold', 'Latency threshold'), ('header', 'Admin header')], max_length=16)),
+                ('profiler', models.CharField(choices=[('cprofile', 'cProfile'), ('sampling', 'Sampling (collapsed stacks)')], max_length=16)),
+                ('file_path', models.CharField(max_length=512)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profile_captures', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.0.1 on 2026-10-18 22:49
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_summary_columns(apps, schema_editor):
+    UploadedDataset = apps.get_model('data_api', 'UploadedDataset')
+    for dataset in UploadedDataset.objects.iterator():
+        summary = dataset.summary_data or {}
+        averages = summary.get('averages', {})
+        dataset.record_count = summary.get('total_records', 0)
+        dataset.avg_flowrate = averages.get('flowrate')
+        dataset.avg_pressure = averages.get('pressure')
+        dataset.avg_temperature = averages.get('temperature')
+
+        if dataset.file_path and os.path.exists(dataset.file_path):
+            digest = hashlib.sha256()
+            with open(dataset.file_path, 'rb') as fh:
+                for block in iter(lambda: fh.read(1024 * 1024), b''):
+                    digest.update(block)
+            dataset.file_size = os.path.getsize(dataset.file_path)
+            dataset.content_hash = digest.hexdigest()
+
+        dataset.save(update_fields=[
+            'record_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'file_size', 'content_hash',
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_api', '0002_profilecapture'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='avg_flowrate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='avg_pressure',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='avg_temperature',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='file_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='record_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='uploadeddataset',
+            index=models.Index(fields=['user', '-timestamp'], name='dataset_user_recent_idx'),
+        ),
+        migrations.RunPython(backfill_summary_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# A frozen copy of the data_api.aggregates code this backfill needs (as of this
+# migration), so later changes to that module cannot change what it does.
+COLUMNS = ['flowrate', 'pressure', 'temperature']
+
+
+def _empty_column():
+    return {'count': 0, 'sum': 0.0, 'm2': 0.0, 'min': None, 'max': None}
+
+
+def _empty():
+    return {'count': 0, 'columns': {name: _empty_column() for name in COLUMNS}, 'type_counts': {}}
+
+
+def _from_summary(summary):
+    if 'aggregates' in summary:
+        return summary['aggregates']
+    count = summary.get('total_records', 0)
+    averages = summary.get('averages', {})
+    columns = {}
+    for name in COLUMNS:
+        if count and averages.get(name) is not None:
+            columns[name] = {'count': count, 'sum': averages[name] * count, 'm2': None, 'min': None, 'max': None}
+        else:
+            columns[name] = _empty_column()
+    return {'count': count, 'columns': columns, 'type_counts': dict(summary.get('type_distribution', {}))}
+
+
+def _extreme(pick, a, b, key):
+    if a['count'] == 0:
+        return b[key]
+    if b['count'] == 0:
+        return a[key]
+    if a[key] is None or b[key] is None:
+        return None
+    return pick(a[key], b[key])
+
+
+def _merge_column(a, b):
+    n = a['count'] + b['count']
+    if n == 0:
+        return _empty_column()
+    if a['count'] == 0:
+        return dict(b)
+    if b['count'] == 0:
+        return dict(a)
+    if a['m2'] is None or b['m2'] is None:
+        m2 = None
+    else:
+        delta = b['sum'] / b['count'] - a['sum'] / a['count']
+        m2 = a['m2'] + b['m2'] + delta * delta * a['count'] * b['count'] / n
+    return {
+        'count': n,
+        'sum': a['sum'] + b['sum'],
+        'm2': m2,
+        'min': _extreme(min, a, b, 'min'),
+        'max': _extreme(max, a, b, 'max'),
+    }
+
+
+def _merge(a, b):
+    counts = dict(a['type_counts'])
+    for key, value in b['type_counts'].items():
+        counts[key] = counts.get(key, 0) + value
+        if counts[key] <= 0:
+            del counts[key]
+    return {
+        'count': a['count'] + b['count'],
+        'columns': {name: _merge_column(a['columns'][name], b['columns'][name]) for name in COLUMNS},
+        'type_counts': counts,
+    }
+
+
+def backfill_rollups(apps, schema_editor):
+    UploadedDataset = apps.get_model('data_api', 'UploadedDataset')
+    UserRollup = apps.get_model('data_api', 'UserRollup')
+    totals = {}
+    for user_id, summary in UploadedDataset.objects.values_list('user_id', 'summary_data').iterator():
+        total, count = totals.get(user_id, (_empty(), 0))
+        totals[user_id] = (_merge(total, _from_summary(summary or {})), count + 1)
+    UserRollup.objects.bulk_create([
+        UserRollup(user_id=user_id, aggregates=total, dataset_count=count)
+        for user_id, (total, count) in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_api', '0003_summary_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset_count', models.PositiveIntegerField(default=0)),
+                ('aggregates', models.JSONField(default=dict)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
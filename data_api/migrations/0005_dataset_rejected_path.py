@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_api', '0004_user_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='rejected_path',
+            field=models.CharField(blank=True, default='', max_length=512),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_api', '0005_dataset_rejected_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='outlier_index',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
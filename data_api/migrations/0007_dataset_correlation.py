@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_api', '0006_dataset_outlier_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='correlation',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
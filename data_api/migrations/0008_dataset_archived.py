@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_api', '0007_dataset_correlation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.db.models import JSONField
 from django.db.models.query import QuerySet
@@ -7,6 +7,7 @@ class UploadedDataset(models.Model):
     """
     Model to store metadata about an uploaded dataset file for a user.
     Includes logic to enforce a history limit (last 5 records).
+    Archived datasets (bulk-loaded by ingest_directory) are exempt from it.
     """
     # Link to the user who uploaded the file
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='datasets')
@@ -24,26 +25,58 @@ class UploadedDataset(models.Model):
     # Path/reference to the actual stored file (e.g., CSV, Excel)
     file_path = models.CharField(max_length=512) 
 
+    # Hot summary fields promoted out of summary_data so history listing and
+    # filtering never has to load (or parse) the JSON blob and its data_preview
+    record_count = models.PositiveIntegerField(default=0)
+    avg_flowrate = models.FloatField(null=True, blank=True)
+    avg_pressure = models.FloatField(null=True, blank=True)
+    avg_temperature = models.FloatField(null=True, blank=True)
+    file_size = models.BigIntegerField(default=0)
+    # SHA-256 of the raw uploaded file (blank once rows have been appended to it)
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+    # Storage path of the compressed CSV of rows dropped during validation (blank if none were)
+    rejected_path = models.CharField(max_length=512, blank=True, default='')
+    # Per-type outlier index built at upload (see data_api.outliers); kept out of
+    # summary_data so summaries do not carry it
+    outlier_index = JSONField(default=dict, blank=True)
+    # Mergeable covariance moments and bounded scatter samples, per Type (see data_api.correlation)
+    correlation = JSONField(default=dict, blank=True)
+    # Loaded by ingest_directory: kept out of (and never pruned by) the 5-record history limit
+    archived = models.BooleanField(default=False)
+
     class Meta:
         # **--- CRITICAL FIX: Explicitly setting app_label resolves Windows path issues ---**
         app_label = 'data_api'
         ordering = ['-timestamp'] # Order by newest first
+        indexes = [
+            # Serves "this user's datasets, newest first" (history, retention pruning)
+            models.Index(fields=['user', '-timestamp'], name='dataset_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.name} ({self.timestamp.strftime('%Y-%m-%d %H:%M')})"
 
+    def sync_summary_fields(self):
+        """Copy the hot fields of summary_data into their typed columns."""
+        summary = self.summary_data or {}
+        averages = summary.get('averages', {})
+        self.record_count = summary.get('total_records', 0)
+        self.avg_flowrate = averages.get('flowrate')
+        self.avg_pressure = averages.get('pressure')
+        self.avg_temperature = averages.get('temperature')
+
     def save(self, *args, **kwargs):
         """
         Custom save method to:
         1. Save the new instance.
-        2. Automatically delete the oldest datasets for the user,
-           keeping only the last 5 records.
+        2. Automatically delete the oldest uploaded (not archived) datasets
+           for the user, keeping only the last 5 records, and their files.
         """
         # 1. Save the current instance first
         super().save(*args, **kwargs)
 
         # 2. Enforce the history limit (keep last 5)
-        user_datasets: QuerySet = UploadedDataset.objects.filter(user=self.user).order_by('-timestamp')
+        user_datasets: QuerySet = UploadedDataset.objects.filter(user=self.user, archived=False).order_by('-timestamp')
         count = user_datasets.count()
 
         if count > 5:
@@ -51,8 +84,72 @@ class UploadedDataset(models.Model):
             ids_to_keep = user_datasets.values_list('id', flat=True)[:5]
             
             # Find and delete all datasets that are NOT in the 'ids_to_keep' list
-            datasets_to_delete = UploadedDataset.objects.filter(user=self.user).exclude(id__in=ids_to_keep)
-            
-            # NOTE: For a complete app, file deletion logic (os.remove(dataset.file_path)) 
-            # would be added here *before* calling .delete().
-            datasets_to_delete.delete()
\ No newline at end of file
+            datasets_to_delete = user_datasets.exclude(id__in=ids_to_keep)
+            paths = [path for pair in datasets_to_delete.values_list('file_path', 'rejected_path') for path in pair]
+            datasets_to_delete.delete()
+            # The stored files go only once the rows are gone for good.
+            transaction.on_commit(lambda: _delete_files(paths))
+
+
+def _delete_files(paths):
+    from .storage import get_storage
+
+    storage = get_storage()
+    for path in paths:
+        storage.delete(path)
+
+class ProfileCapture(models.Model):
+    """
+    Metadata for a request profile captured by ProfilingMiddleware.
+    The profile itself lives on disk at file_path; only the newest
+    PROFILE_MAX_CAPTURES captures are kept.
+    """
+    TRIGGER_THRESHOLD = 'threshold'
+    TRIGGER_HEADER = 'header'
+    TRIGGER_CHOICES = [
+        (TRIGGER_THRESHOLD, 'Latency threshold'),
+        (TRIGGER_HEADER, 'Admin header'),
+    ]
+
+    PROFILER_CPROFILE = 'cprofile'
+    PROFILER_SAMPLING = 'sampling'
+    PROFILER_CHOICES = [
+        (PROFILER_CPROFILE, 'cProfile'),
+        (PROFILER_SAMPLING, 'Sampling (collapsed stacks)'),
+    ]
+
+    created = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='profile_captures')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=512)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    trigger = models.CharField(max_length=16, choices=TRIGGER_CHOICES)
+    profiler = models.CharField(max_length=16, choices=PROFILER_CHOICES)
+    file_path = models.CharField(max_length=512)
+
+    class Meta:
+        app_label = 'data_api'
+        ordering = ['-created']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class UserRollup(models.Model):
+    """
+    A user's statistics across all of their datasets.
+    Kept up to date incrementally as datasets are added and removed
+    (see data_api.rollups), so reading it never touches the datasets.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='rollup')
+    dataset_count = models.PositiveIntegerField(default=0)
+    # Merged data_api.aggregates aggregate of every dataset the user has
+    aggregates = JSONField(default=dict)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'data_api'
+
+    def __str__(self):
+        return f"Rollup for {self.user.username} ({self.dataset_count} datasets)"
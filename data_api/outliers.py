@@ -0,0 +1,154 @@
+"""
+Per-type outlier detection for equipment datasets.
+
+A reading is an outlier when it is far from the other equipment of the same
+Type. The distance is the robust z-score from Iglewicz and Hoaglin:
+
+    score = 0.6745 * (value - type median) / type MAD
+
+A reading is flagged when |score| > OUTLIER_THRESHOLD. Types with fewer than
+MIN_GROUP_SIZE rows, and columns whose MAD is 0 within a type, are not scored.
+
+build_index() runs at upload. It computes the medians, MADs and scores with
+vectorized groupby operations and returns the compact index stored in
+UploadedDataset.outlier_index:
+
+    {"method": "mad", "threshold": 3.5, "count": n, "truncated": bool,
+     "by_type": {type: n}, "by_column": {"pressure": n, ...},
+     "rows": [{"row", "equipment", "type", "column", "value", "median", "score"}, ...],
+     "stats": {type: {"rows": n, "pressure": [median, mad], ...}}}
+
+"rows" keeps the OUTLIER_INDEX_LIMIT highest |score| readings. "row" is the
+reading's position among the dataset's cleaned rows, as paged by
+DatasetRowsView. Outlier queries and the report read the index, never the
+data. Appended rows are scored against the stored "stats" (see extend_index()),
+so an append never rescans the rows already indexed.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+MAD_SCALE = 0.6745
+MIN_GROUP_SIZE = 5
+
+
+def empty_index():
+    return {
+        "method": "mad", "threshold": settings.OUTLIER_THRESHOLD, "count": 0, "truncated": False,
+        "by_type": {}, "by_column": {col.lower(): 0 for col in NUMERIC_COLUMNS}, "rows": [], "stats": {},
+    }
+
+
+def type_stats(df):
+    """Per-type row count, and median and MAD of each numeric column, as stored in the index."""
+    types = df['Type']
+    grouped = df[NUMERIC_COLUMNS].groupby(types, observed=True, sort=False)
+    medians = grouped.median()
+    deviations = (df[NUMERIC_COLUMNS] - grouped.transform('median')).abs()
+    mads = deviations.groupby(types, observed=True, sort=False).median()
+    sizes = grouped.size()
+
+    stats = {}
+    for type_name, size in sizes.items():
+        entry = {"rows": int(size)}
+        for col in NUMERIC_COLUMNS:
+            entry[col.lower()] = [float(medians.at[type_name, col]), float(mads.at[type_name, col])]
+        stats[str(type_name)] = entry
+    return stats
+
+
+def _score(df, stats, offset):
+    """Flagged readings of `df` against per-type `stats`, with row positions starting at `offset`."""
+    # Look the per-type statistics up once per distinct type, then spread them over the rows by code.
+    codes, names = pd.factorize(df['Type'])
+    names = [str(name) for name in names]
+    known = codes >= 0
+
+    def per_row(pick):
+        table = np.array([pick(stats[name]) if name in stats else np.nan for name in names] + [np.nan])
+        return table[np.where(known, codes, len(names))]
+
+    sizes = per_row(lambda entry: entry["rows"])
+    types = np.array(names + [''], dtype=object)[np.where(known, codes, len(names))]
+    threshold = settings.OUTLIER_THRESHOLD
+    flagged = []
+    for col in NUMERIC_COLUMNS:
+        key = col.lower()
+        medians = per_row(lambda entry: entry[key][0])
+        mads = per_row(lambda entry: entry[key][1])
+        values = df[col].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = MAD_SCALE * (values - medians) / mads
+        # NaN (unknown type) and MAD 0 (inf) never pass, nor do small groups.
+        hits = np.flatnonzero(np.isfinite(scores) & (np.abs(scores) > threshold) & (sizes >= MIN_GROUP_SIZE))
+        if len(hits):
+            flagged.append(pd.DataFrame({
+                "row": hits + offset,
+                "equipment": df['Equipment Name'].to_numpy()[hits],
+                "type": types[hits],
+                "column": key,
+                "value": values[hits],
+                "median": medians[hits],
+                "score": scores[hits],
+            }))
+    if not flagged:
+        return pd.DataFrame(columns=["row", "equipment", "type", "column", "value", "median", "score"])
+    return pd.concat(flagged, ignore_index=True)
+
+
+def _index_from(flagged, stats, previous=None):
+    index = previous or empty_index()
+    limit = settings.OUTLIER_INDEX_LIMIT
+    for type_name, count in flagged['type'].value_counts().items():
+        index["by_type"][type_name] = index["by_type"].get(type_name, 0) + int(count)
+    for column, count in flagged['column'].value_counts().items():
+        index["by_column"][column] = index["by_column"].get(column, 0) + int(count)
+    index["count"] += len(flagged)
+
+    top = flagged.iloc[np.argsort(-flagged['score'].abs().to_numpy(), kind='stable')[:limit]]
+    rows = [
+        {"row": int(row.row), "equipment": str(row.equipment), "type": row.type, "column": row.column,
+         "value": round(float(row.value), 6), "median": round(float(row.median), 6),
+         "score": round(float(row.score), 3)}
+        for row in top.itertuples(index=False)
+    ]
+    rows = sorted(index["rows"] + rows, key=lambda item: abs(item["score"]), reverse=True)
+    index["truncated"] = index["truncated"] or len(rows) > limit or len(flagged) > limit
+    index["rows"] = rows[:limit]
+    index["stats"] = stats
+    return index
+
+
+def build_index(df):
+    """Outlier index of a cleaned frame (see module docs)."""
+    if df.empty:
+        return empty_index()
+    stats = type_stats(df)
+    return _index_from(_score(df, stats, 0), stats)
+
+
+def extend_index(index, df, offset):
+    """
+    Add rows appended to a dataset, whose first cleaned row is at position
+    `offset`. They are scored against the stored per-type statistics, which are
+    kept as they are: rows of a type not seen at upload are not scored.
+    """
+    if not index:
+        # Datasets uploaded before outlier detection: nothing to score against.
+        return index
+    if df.empty:
+        return index
+    return _index_from(_score(df, index["stats"], offset), index["stats"], copy.deepcopy(index))
+
+
+def query(index, type_name=None, column=None, limit=None):
+    """Indexed outliers, optionally filtered by type and column; never reads the dataset."""
+    rows = index.get("rows", [])
+    if type_name:
+        rows = [row for row in rows if row["type"] == type_name]
+    if column:
+        rows = [row for row in rows if row["column"] == column]
+    return rows[:limit] if limit else rows
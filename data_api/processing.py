@@ -0,0 +1,333 @@
+"""
+Parsing, cleaning and aggregation of uploaded equipment datasets.
+
+This module pulls in pandas and NumPy, so views import it on first use
+rather than at module load (see data_api.warmup).
+
+Stored CSV files are parsed in two steps. The header line is read and
+checked first, so a file missing a required column is rejected without
+reading its body. The body is then read with only the required columns
+(usecols), Type as a category, and the engine from CSV_PARSE_ENGINE, which is
+pyarrow's multithreaded reader when it is installed. Numeric columns may hold
+junk that cleaning drops, so they are still inferred and converted in
+clean_frame(), to float32 when CSV_FLOAT32 is on.
+
+validate_frame() checks all numeric columns in one pass and keeps the rows it
+drops, with the reason, so uploads can store them in a compressed
+"rejected rows" sidecar file next to the dataset.
+"""
+import importlib.util
+import itertools
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from . import aggregates, correlation, outliers, timeseries
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+EmptyDataError = pd.errors.EmptyDataError
+
+REASON_COLUMN = 'Reject Reason'
+# Problem codes per numeric column; a row's reason is looked up from the base-3
+# number its columns' codes form, so reasons are built without a per-row loop.
+_PROBLEMS = ['', 'missing', 'not numeric']
+_REASONS = np.array([
+    '; '.join(f"{col} {_PROBLEMS[code]}" for col, code in zip(NUMERIC_COLUMNS, codes) if code)
+    for codes in itertools.product(range(len(_PROBLEMS)), repeat=len(NUMERIC_COLUMNS))
+], dtype=object)
+REJECT_CHUNK_ROWS = 50_000
+
+Validation = namedtuple('Validation', ['frame', 'rejected', 'counts'])
+ParsedUpload = namedtuple('ParsedUpload', ['summary', 'rejected_path', 'outlier_index', 'correlation'])
+
+
+class MissingColumnsError(ValueError):
+    def __init__(self, missing):
+        super().__init__(f"Missing required columns: {', '.join(missing)}")
+        self.missing = missing
+
+    def __reduce__(self):
+        # Rebuild from `missing` so the error survives a trip back from a process pool.
+        return (type(self), (self.missing,))
+
+
+def read_upload(uploaded_file):
+    """Read an uploaded (not yet stored) CSV or XLSX file into a DataFrame."""
+    if uploaded_file.name.endswith('.xlsx'):
+        return pd.read_excel(uploaded_file)
+    return pd.read_csv(uploaded_file)
+
+
+def csv_engine():
+    """The pd.read_csv engine named by CSV_PARSE_ENGINE ('auto': pyarrow if installed, else c)."""
+    engine = settings.CSV_PARSE_ENGINE
+    if engine == 'auto':
+        engine = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+    return engine
+
+
+def csv_read_options(header):
+    """
+    pd.read_csv arguments that load just the required columns (and the time
+    column, if there is one) of a file with this header. Raises
+    MissingColumnsError, before any row is read, if a required column is absent.
+    """
+    by_name = {name.strip(): name for name in header}
+    missing = [col for col in REQUIRED_COLUMNS if col not in by_name]
+    if missing:
+        raise MissingColumnsError(missing)
+    time_column = timeseries.detect_time_column(header)
+    return {
+        'usecols': [by_name[col] for col in REQUIRED_COLUMNS] + ([time_column] if time_column else []),
+        'dtype': {by_name['Type']: 'category'},
+        'engine': csv_engine(),
+    }
+
+
+def read_frame(file_path):
+    """Read a stored CSV or XLSX dataset into a DataFrame, decompressing as it streams."""
+    from .storage import get_storage, is_excel
+
+    if is_excel(file_path):
+        with get_storage().open(file_path) as fh:
+            return pd.read_excel(fh)
+
+    options = csv_read_options(stored_header(file_path))
+    with get_storage().open(file_path) as fh:
+        return pd.read_csv(fh, **options)
+
+
+def iter_frames(file_path, chunksize):
+    """
+    Read a stored dataset in frames of at most `chunksize` rows, so a whole file
+    is never in memory at once. XLSX files cannot be read in parts and come back
+    as one frame (Excel caps a sheet at about a million rows anyway).
+    """
+    from .storage import get_storage, is_excel
+
+    if is_excel(file_path):
+        yield read_frame(file_path)
+        return
+
+    options = csv_read_options(stored_header(file_path))
+    # pyarrow's reader has no chunked mode.
+    options['engine'] = 'c'
+    with get_storage().open(file_path) as fh:
+        yield from pd.read_csv(fh, chunksize=chunksize, **options)
+
+
+def empty_reject_counts():
+    return {"rows": 0, "columns": {col.lower(): 0 for col in NUMERIC_COLUMNS}}
+
+
+def validate_frame(df):
+    """
+    Strip header whitespace, check the required columns and coerce the numeric
+    columns, building one validity mask for all of them. Raises MissingColumnsError.
+
+    Returns a Validation: the valid rows (numeric columns converted), the
+    rejected rows as read plus a REASON_COLUMN, and reject counts per column.
+    """
+    df.columns = df.columns.str.strip()
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+
+    codes = np.zeros(len(df), dtype=np.int64)
+    converted = {}
+    counts = empty_reject_counts()
+    for col in NUMERIC_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce')
+        invalid = np.flatnonzero(values.isna().to_numpy())
+        # Only the failed cells are checked for "missing" vs "not numeric".
+        absent = pd.isna(df[col].to_numpy()[invalid])
+        codes *= len(_PROBLEMS)
+        codes[invalid] += np.where(absent, 1, 2)
+        counts["columns"][col.lower()] = len(invalid)
+        converted[col] = values
+
+    valid = codes == 0
+    counts["rows"] = int(len(df) - valid.sum())
+    rejected = df.loc[~valid, REQUIRED_COLUMNS]
+    rejected.insert(len(REQUIRED_COLUMNS), REASON_COLUMN, _REASONS[codes[~valid]])
+
+    dtype = np.float32 if settings.CSV_FLOAT32 else None
+    for col, values in converted.items():
+        df[col] = values if dtype is None else values.astype(dtype)
+    frame = df if counts["rows"] == 0 else df[valid]
+    return Validation(frame, rejected, counts)
+
+
+def clean_frame(df):
+    """validate_frame() for callers that only need the valid rows."""
+    return validate_frame(df).frame
+
+
+def rejected_chunks(rejected, header=True):
+    """CSV bytes of the rejected rows, REJECT_CHUNK_ROWS rows at a time."""
+    for start in range(0, len(rejected), REJECT_CHUNK_ROWS):
+        chunk = rejected.iloc[start:start + REJECT_CHUNK_ROWS]
+        yield chunk.to_csv(index=False, header=header and start == 0).encode()
+
+
+def save_rejected(rejected, name):
+    """Store the rejected rows of the upload `name` as a sidecar file; returns its path ('' if none)."""
+    from .storage import get_storage
+
+    if rejected.empty:
+        return ''
+    base = name.rsplit('.', 1)[0]
+    return get_storage().save(rejected_chunks(rejected), f"{base}_rejected.csv").path
+
+
+def append_rejected(path, rejected, name):
+    """Add rejected rows to an existing sidecar (or start one); returns the sidecar path."""
+    from .storage import get_storage
+
+    if rejected.empty:
+        return path
+    if not path:
+        return save_rejected(rejected, name)
+    get_storage().append(path, rejected_chunks(rejected, header=False))
+    return path
+
+
+def merge_reject_counts(a, b):
+    return {
+        "rows": a["rows"] + b["rows"],
+        "columns": {col: a["columns"].get(col, 0) + count for col, count in b["columns"].items()},
+    }
+
+
+def records(df):
+    """Rows of a frame as dicts, with missing cells (a blank Type, say) as None so they serialize to JSON."""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def summarize(df, reject_counts=None):
+    """Build the summary_data stored on UploadedDataset."""
+    total_count = len(df)
+
+    avg_flowrate = float(df['Flowrate'].mean()) if total_count > 0 else 0.0
+    avg_pressure = float(df['Pressure'].mean()) if total_count > 0 else 0.0
+    avg_temperature = float(df['Temperature'].mean()) if total_count > 0 else 0.0
+
+    type_counts = df['Type'].value_counts()
+    # A categorical Type still lists the categories whose rows were all dropped.
+    type_distribution = type_counts[type_counts > 0].to_dict()
+    columns = {name.lower(): aggregates.column_from_values(df[name]) for name in NUMERIC_COLUMNS}
+    time_column = timeseries.detect_time_column(df.columns)
+    preview = df.head(5)
+    if time_column:
+        # Excel cells may already be datetimes, which JSONField cannot store.
+        preview = preview.astype({time_column: str})
+
+    summary = {
+        "total_records": total_count,
+        "averages": {
+            "flowrate": avg_flowrate,
+            "pressure": avg_pressure,
+            "temperature": avg_temperature
+        },
+        "type_distribution": type_distribution,
+        "data_preview": records(preview),
+        # Rows dropped by validate_frame(), in total and per column with a bad value
+        "rejected": reject_counts or empty_reject_counts(),
+        # Mergeable form of the statistics above (see data_api.aggregates)
+        "aggregates": {"count": total_count, "columns": columns, "type_counts": type_distribution},
+    }
+    if time_column:
+        # Time column and range; enables the time-series endpoint (see data_api.timeseries)
+        summary["time_series"] = timeseries.describe(df, time_column)
+    return summary
+
+
+def parse_upload(file_path, name):
+    """
+    Read, validate and summarize a stored upload in one call (the unit of work
+    async views offload). Returns a ParsedUpload.
+    """
+    validation = validate_frame(read_frame(file_path))
+    return ParsedUpload(
+        summarize(validation.frame, validation.counts),
+        save_rejected(validation.rejected, name),
+        outliers.build_index(validation.frame),
+        correlation.build(validation.frame),
+    )
+
+
+def append_summary(summary, df, reject_counts=None):
+    """
+    Merge the cleaned rows of `df` into an existing summary_data, scanning only
+    those rows. Returns (new summary_data, aggregate of the appended rows).
+    """
+    part = summarize(df, reject_counts)
+    merged = aggregates.merge(aggregates.from_summary(summary), part['aggregates'])
+    merged['type_counts'] = dict(sorted(merged['type_counts'].items(), key=lambda item: item[1], reverse=True))
+    preview = list(summary.get('data_preview', []))
+    preview += part['data_preview'][:max(5 - len(preview), 0)]
+    extra = {}
+    if summary.get('time_series') and part.get('time_series'):
+        extra['time_series'] = timeseries.merge_descriptions(summary['time_series'], part['time_series'])
+
+    return {
+        **summary,
+        **extra,
+        "total_records": merged['count'],
+        "averages": {
+            name: column['sum'] / column['count'] if column['count'] else 0.0
+            for name, column in merged['columns'].items()
+        },
+        "type_distribution": merged['type_counts'],
+        "data_preview": preview,
+        "rejected": merge_reject_counts(summary.get("rejected", empty_reject_counts()), part["rejected"]),
+        "aggregates": merged,
+    }, part['aggregates']
+
+
+def stored_header(file_path):
+    """Column names, as written, of a stored CSV dataset (reads only the first line)."""
+    from .storage import get_storage
+
+    with get_storage().open(file_path) as fh:
+        return list(pd.read_csv(fh, nrows=0).columns)
+
+
+@lru_cache(maxsize=4)
+def load_rows_frame(file_path, mtime):
+    """Read and clean a stored dataset file. Keyed on mtime so a rewritten file is reloaded."""
+    df = clean_frame(read_frame(file_path))
+    return df[REQUIRED_COLUMNS].reset_index(drop=True)
+
+
+@lru_cache(maxsize=8)
+def ordered_row_positions(file_path, mtime, ordering, search):
+    """Row positions after filtering and sorting; cached so paging through a view is cheap."""
+    df = load_rows_frame(file_path, mtime)
+    mask = np.ones(len(df), dtype=bool)
+    if search:
+        mask = (
+            df['Equipment Name'].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+            | df['Type'].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+        )
+    positions = np.flatnonzero(mask)
+    if ordering:
+        column = ordering.lstrip('-')
+        # pandas sorts object/category columns with missing values (np.argsort raises on them).
+        values = df[column].iloc[positions].reset_index(drop=True)
+        order = values.sort_values(ascending=not ordering.startswith('-'), kind='stable', na_position='last').index
+        positions = positions[order.to_numpy()]
+    return positions
+
+
+def rows_page(file_path, mtime, ordering, search, offset, limit):
+    """Return (matching row count, records for one page) for DatasetRowsView."""
+    df = load_rows_frame(file_path, mtime)
+    positions = ordered_row_positions(file_path, mtime, ordering, search)
+    return len(positions), records(df.iloc[positions[offset:offset + limit]])
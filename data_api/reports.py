@@ -0,0 +1,588 @@
+"""
+PDF report rendering: Matplotlib charts embedded in a ReportLab document.
+
+The consolidated report covers all of a user's datasets. Its charts are
+independent of each other, so they are rendered first, in parallel in the
+chart process pool (data_api.executor.get_chart_pool), and the document is
+then assembled and built in a single pass. Paragraph styles are built once per
+process (report_styles()).
+
+Matplotlib and ReportLab are heavy to import, so views import this module
+on first use rather than at module load (see data_api.warmup).
+"""
+from functools import lru_cache
+from io import BytesIO
+
+# --- ReportLab Imports for PDF Generation ---
+from reportlab.platypus import (
+    BaseDocTemplate, Frame, PageTemplate, SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle, Image,
+    KeepTogether,
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+# --- Matplotlib Imports for Chart Generation ---
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+import matplotlib.pyplot as plt
+
+from django.conf import settings
+
+from .timing import NULL_TIMER
+
+REPORT_OUTLIER_ROWS = 15
+REPORT_CORRELATION_TYPES = 10
+SCATTER_COLORS = ['#2563eb', '#7c3aed', '#dc2626', '#059669', '#d97706', '#0891b2', '#be185d']
+
+
+def top_types(distribution_data, limit):
+    """
+    The `limit` largest types, largest first, with the rest folded into one
+    "Other (n types)" entry, so charts stay readable however many types there are.
+    """
+    sorted_items = sorted(distribution_data.items(), key=lambda x: x[1], reverse=True)
+    top = dict(sorted_items[:limit])
+    rest = sorted_items[limit:]
+    if rest:
+        top[f"Other ({len(rest)} types)"] = sum(count for _, count in rest)
+    return top
+
+
+def create_bar_chart(distribution_data, title="Equipment Type Distribution", dpi=300):
+    plt.style.use('default')
+    fig, ax = plt.subplots(figsize=(8, 5))
+    fig.patch.set_facecolor('white')
+
+    if not distribution_data:
+        ax.text(0.5, 0.5, 'No data available', ha='center', va='center', 
+               transform=ax.transAxes, fontsize=14, color='gray')
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+    else:
+        # top_types() keeps the largest first and "Other" last.
+        sorted_items = list(top_types(distribution_data, settings.REPORT_CHART_TYPES).items())
+        labels, values = zip(*sorted_items) if sorted_items else ([], [])
+
+        bars = ax.bar(labels, values, color=['#2563eb', '#7c3aed', '#dc2626', '#059669', '#d97706', '#0891b2', '#be185d'])
+
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        ax.set_xlabel('Equipment Type', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Count', fontsize=12, fontweight='bold')
+
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height + 0.05,
+                   f'{int(height)}', ha='center', va='bottom', fontweight='bold')
+
+        plt.xticks(rotation=45, ha='right')
+
+    plt.tight_layout()
+
+    img_buffer = BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=dpi, bbox_inches='tight')
+    img_buffer.seek(0)
+    plt.close()
+
+    return img_buffer
+
+def create_pie_chart(distribution_data, title="Equipment Type Distribution", dpi=300):
+    plt.style.use('default')
+    fig, ax = plt.subplots(figsize=(7, 7))
+    fig.patch.set_facecolor('white')
+
+    if not distribution_data:
+        ax.text(0.5, 0.5, 'No data available', ha='center', va='center', 
+               transform=ax.transAxes, fontsize=14, color='gray')
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+    else:
+        shown = top_types(distribution_data, settings.REPORT_CHART_TYPES)
+        labels = list(shown.keys())
+        sizes = list(shown.values())
+
+        colors_palette = ['#2563eb', '#7c3aed', '#dc2626', '#059669', '#d97706', '#0891b2', '#be185d', '#6366f1']
+
+        wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%', 
+                                        colors=[colors_palette[i % len(colors_palette)] for i in range(len(labels))],
+                                        startangle=90, textprops={'fontsize': 10})
+
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontweight('bold')
+
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+
+    plt.tight_layout()
+
+    # Save to BytesIO
+    img_buffer = BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=dpi, bbox_inches='tight')
+    img_buffer.seek(0)
+    plt.close()
+
+    return img_buffer
+
+def create_averages_chart(averages_data, title="Parameter Averages", dpi=300):
+    plt.style.use('default')
+    fig, ax = plt.subplots(figsize=(8, 4))
+    fig.patch.set_facecolor('white')
+
+    if not averages_data:
+        ax.text(0.5, 0.5, 'No data available', ha='center', va='center', 
+               transform=ax.transAxes, fontsize=14, color='gray')
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+    else:
+        parameters = list(averages_data.keys())
+        values = list(averages_data.values())
+
+        bars = ax.barh(parameters, values, color=['#059669', '#dc2626', '#d97706'])
+
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        ax.set_xlabel('Average Value', fontsize=12, fontweight='bold')
+
+        for i, (bar, value) in enumerate(zip(bars, values)):
+            ax.text(bar.get_width() + max(values) * 0.01, bar.get_y() + bar.get_height()/2,
+                   f'{value:.2f}', ha='left', va='center', fontweight='bold')
+
+        ax.set_yticklabels([param.capitalize() for param in parameters])
+
+    plt.tight_layout()
+
+    # Save to BytesIO
+    img_buffer = BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=dpi, bbox_inches='tight')
+    img_buffer.seek(0)
+    plt.close()
+
+    return img_buffer
+
+
+def create_scatter_chart(samples, title="Parameter Relationships"):
+    """
+    One scatter panel per parameter pair, drawn from the stored samples:
+    colored by type for the largest sampled types, the whole-dataset sample otherwise.
+    """
+    from .correlation import COLUMNS, PAIRS
+
+    plt.style.use('default')
+    fig, axes = plt.subplots(1, len(PAIRS), figsize=(12, 4))
+    fig.patch.set_facecolor('white')
+
+    groups = list(samples.get('types', {}).items())[:len(SCATTER_COLORS)]
+    if not groups:
+        groups = [('All equipment', samples['all'])]
+    for ax, (i, j) in zip(axes, PAIRS):
+        x_name, y_name = COLUMNS[i].lower(), COLUMNS[j].lower()
+        for color, (name, sample) in zip(SCATTER_COLORS, groups):
+            ax.scatter(sample[x_name], sample[y_name], s=6, alpha=0.6, color=color, label=name)
+        ax.set_xlabel(COLUMNS[i], fontsize=10, fontweight='bold')
+        ax.set_ylabel(COLUMNS[j], fontsize=10, fontweight='bold')
+    axes[-1].legend(fontsize=7, markerscale=2, loc='best')
+    fig.suptitle(title, fontsize=14, fontweight='bold')
+
+    plt.tight_layout()
+
+    img_buffer = BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=200, bbox_inches='tight')
+    img_buffer.seek(0)
+    plt.close()
+
+    return img_buffer
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """
+    The paragraph styles every report uses, built once per process. Shared
+    between builds, so callers must not add to or modify them.
+    """
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='ReportTitle', fontSize=18, spaceAfter=20, alignment=1, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='CustomHeading', fontSize=14, spaceBefore=15, spaceAfter=10, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='SubHeading', fontSize=12, spaceBefore=10, spaceAfter=6, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='NormalStyle', fontSize=10, spaceAfter=5))
+    return styles
+
+
+def build_dataset_report(output, dataset, username, timer=NULL_TIMER):
+    """Render the single-dataset PDF report into `output` (a file-like object)."""
+    summary = dataset.summary_data
+
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = report_styles()
+    story = []
+
+    title_text = f"Chemical Equipment Parameter Report"
+    story.append(Paragraph(title_text, styles['ReportTitle']))
+
+    story.append(Paragraph(f"<b>Dataset Name:</b> {dataset.name}", styles['NormalStyle']))
+    story.append(Paragraph(f"<b>Uploaded By:</b> {username}", styles['NormalStyle']))
+    story.append(Paragraph(f"<b>Timestamp:</b> {dataset.timestamp.strftime('%Y-%m-%d %H:%M:%S')}", styles['NormalStyle']))
+    story.append(Paragraph(f"<b>Total Records Processed:</b> {summary.get('total_records', 'N/A')}", styles['NormalStyle']))
+
+    story.append(Spacer(1, 0.3 * inch))
+
+    # B. Parameter Averages Chart
+    story.append(Paragraph("Parameter Averages Analysis", styles['CustomHeading']))
+
+    averages = summary.get('averages', {})
+    if averages:
+        # Create and add averages chart
+        with timer.phase('charts'):
+            avg_chart_buffer = create_averages_chart(averages, "Parameter Averages")
+        avg_chart_img = Image(avg_chart_buffer, width=6*inch, height=3*inch)
+        story.append(avg_chart_img)
+        story.append(Spacer(1, 0.2 * inch))
+
+        # Add summary table below chart
+        avg_data = [
+            ['Parameter', 'Average Value', 'Unit'],
+            ['Flowrate', f"{averages.get('flowrate', 0.0):.2f}", 'L/min'],
+            ['Pressure', f"{averages.get('pressure', 0.0):.2f}", 'bar'],
+            ['Temperature', f"{averages.get('temperature', 0.0):.2f}", '°C'],
+        ]
+
+        avg_table = Table(avg_data, colWidths=[2*inch, 1.5*inch, 1*inch])
+        avg_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ]))
+        story.append(avg_table)
+
+    story.append(Spacer(1, 0.4 * inch))
+
+    # C. Equipment Type Distribution Charts
+    story.append(Paragraph("Equipment Type Distribution Analysis", styles['CustomHeading']))
+
+    distribution = summary.get('type_distribution', {})
+    if distribution:
+        # Create bar chart
+        with timer.phase('charts'):
+            bar_chart_buffer = create_bar_chart(distribution, "Equipment Count by Type")
+        bar_chart_img = Image(bar_chart_buffer, width=6*inch, height=3.5*inch)
+        story.append(bar_chart_img)
+        story.append(Spacer(1, 0.3 * inch))
+
+        # Create pie chart
+        with timer.phase('charts'):
+            pie_chart_buffer = create_pie_chart(distribution, "Equipment Type Distribution")
+        pie_chart_img = Image(pie_chart_buffer, width=5*inch, height=5*inch)
+        story.append(pie_chart_img)
+        story.append(Spacer(1, 0.2 * inch))
+
+        # Add summary table below charts
+        dist_data = [['Equipment Type', 'Count', 'Percentage']]
+        total_count = sum(distribution.values())
+        sorted_distribution = sorted(distribution.items(), key=lambda item: item[1], reverse=True)
+
+        limit = settings.REPORT_TABLE_TYPES
+        for type_name, count in sorted_distribution[:limit]:
+            percentage = (count / total_count * 100) if total_count > 0 else 0
+            dist_data.append([type_name, str(count), f"{percentage:.1f}%"])
+        rest = sorted_distribution[limit:]
+        if rest:
+            count = sum(count for _, count in rest)
+            percentage = (count / total_count * 100) if total_count > 0 else 0
+            dist_data.append([f"Other ({len(rest)} types)", str(count), f"{percentage:.1f}%"])
+
+        # LongTable splits across pages with the header repeated, and lays out
+        # faster than Table for long runs of rows.
+        dist_table = LongTable(dist_data, colWidths=[2.5*inch, 1*inch, 1*inch], repeatRows=1)
+        dist_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lavender),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ]))
+        story.append(dist_table)
+        if rest:
+            story.append(Paragraph(
+                f"The {len(rest)} smallest types are combined; the XLSX export lists every type.",
+                styles['NormalStyle']
+            ))
+
+    # D. Outliers (read from the index built at upload)
+    index = dataset.outlier_index
+    if index:
+        story.append(Spacer(1, 0.4 * inch))
+        story.append(Paragraph("Outlier Analysis", styles['CustomHeading']))
+        story.append(Paragraph(
+            f"{index['count']} reading(s) lie more than {index['threshold']:g} robust z-scores "
+            f"(median/MAD) from the other equipment of the same type.", styles['NormalStyle']
+        ))
+        top = index['rows'][:REPORT_OUTLIER_ROWS]
+        if top:
+            outlier_data = [['Equipment', 'Type', 'Parameter', 'Value', 'Type Median', 'Score']]
+            for row in top:
+                outlier_data.append([
+                    row['equipment'], row['type'], row['column'].capitalize(),
+                    f"{row['value']:.2f}", f"{row['median']:.2f}", f"{row['score']:+.1f}",
+                ])
+            outlier_table = Table(outlier_data, colWidths=[1.4*inch, 1.3*inch, 1*inch, 0.9*inch, 1*inch, 0.7*inch])
+            outlier_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.mistyrose),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ]))
+            story.append(outlier_table)
+            if index['count'] > len(top):
+                story.append(Paragraph(
+                    f"Showing the {len(top)} strongest of {index['count']} outliers.", styles['NormalStyle']
+                ))
+
+    # E. Correlations (read from the moments and samples stored at upload)
+    stored = dataset.correlation
+    if stored:
+        from .correlation import matrices
+
+        story.append(Spacer(1, 0.4 * inch))
+        story.append(Paragraph("Parameter Correlation Analysis", styles['CustomHeading']))
+        fmt = lambda value: 'n/a' if value is None else f"{value:+.2f}"
+        _, overall = matrices(stored['moments']['all'])
+        if overall:
+            corr_data = [['', 'Flowrate', 'Pressure', 'Temperature']]
+            for name, row in zip(['Flowrate', 'Pressure', 'Temperature'], overall):
+                corr_data.append([name] + [fmt(value) for value in row])
+            corr_table = Table(corr_data, colWidths=[1.4*inch, 1.2*inch, 1.2*inch, 1.2*inch])
+            corr_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkslategray),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.azure),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ]))
+            story.append(corr_table)
+            story.append(Spacer(1, 0.2 * inch))
+
+        types = sorted(stored['moments']['types'].items(), key=lambda item: item[1]['count'], reverse=True)
+        type_data = [['Type', 'Rows', 'Flow/Press.', 'Flow/Temp.', 'Press./Temp.']]
+        for name, entry in types[:REPORT_CORRELATION_TYPES]:
+            _, matrix = matrices(entry)
+            if matrix:
+                type_data.append([name, str(entry['count'])] + [fmt(matrix[0][1]), fmt(matrix[0][2]), fmt(matrix[1][2])])
+        if len(type_data) > 1:
+            type_table = Table(type_data, colWidths=[1.6*inch, 0.9*inch, 1.1*inch, 1.1*inch, 1.1*inch])
+            type_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkslategray),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.azure),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ]))
+            story.append(type_table)
+            story.append(Spacer(1, 0.2 * inch))
+
+        with timer.phase('charts'):
+            scatter_buffer = create_scatter_chart(stored['samples'])
+        story.append(Image(scatter_buffer, width=7*inch, height=2.4*inch))
+        story.append(Paragraph(
+            "Scatter plots show a uniform random sample of at most "
+            f"{len(stored['samples']['all']['key'])} rows overall and a bounded sample per type.",
+            styles['NormalStyle']
+        ))
+
+    # 4. Build the PDF
+    with timer.phase('build'):
+        doc.build(story)
+
+
+def render_dataset_report(dataset, username):
+    """Render the single-dataset report and return the PDF bytes (safe to run in a process pool)."""
+    buffer = BytesIO()
+    build_dataset_report(buffer, dataset, username)
+    return buffer.getvalue()
+
+
+# --- Consolidated report ---
+
+CONSOLIDATED_CHART_DPI = 150
+
+
+def create_trend_chart(points, title="Trends Across Uploads", dpi=300):
+    """Parameter averages and record counts of each upload, oldest first."""
+    plt.style.use('default')
+    fig, (left, right) = plt.subplots(1, 2, figsize=(11, 4))
+    fig.patch.set_facecolor('white')
+
+    positions = list(range(len(points)))
+    labels = [point['label'] for point in points]
+    for name, color in zip(['flowrate', 'pressure', 'temperature'], ['#059669', '#dc2626', '#d97706']):
+        left.plot(positions, [point['averages'].get(name) for point in points],
+                  marker='o', color=color, label=name.capitalize())
+    left.set_title('Parameter Averages', fontsize=12, fontweight='bold')
+    left.legend(fontsize=8)
+    right.bar(positions, [point['records'] for point in points], color='#2563eb')
+    right.set_title('Records per Upload', fontsize=12, fontweight='bold')
+    for ax in (left, right):
+        ax.set_xticks(positions)
+        ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
+    fig.suptitle(title, fontsize=14, fontweight='bold')
+
+    plt.tight_layout()
+
+    img_buffer = BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=dpi, bbox_inches='tight')
+    img_buffer.seek(0)
+    plt.close()
+
+    return img_buffer
+
+
+CHART_RENDERERS = {
+    'averages': create_averages_chart,
+    'bar': create_bar_chart,
+    'trend': create_trend_chart,
+}
+
+
+def render_chart(job):
+    """Render a (kind, data, title) chart job to PNG bytes. Runs in the chart pool."""
+    kind, data, title = job
+    return CHART_RENDERERS[kind](data, title, dpi=CONSOLIDATED_CHART_DPI).getvalue()
+
+
+def render_charts(jobs):
+    """PNG bytes for each job, in order, rendered in parallel when the chart pool is enabled."""
+    from .executor import get_chart_pool
+
+    pool = get_chart_pool()
+    if pool is None or len(jobs) < 2:
+        return [render_chart(job) for job in jobs]
+    return list(pool.map(render_chart, jobs))
+
+
+def _consolidated_page(canvas, doc):
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawString(doc.leftMargin, 0.5 * inch, doc.title)
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 0.5 * inch, f"Page {canvas.getPageNumber()}")
+    canvas.restoreState()
+
+
+def consolidated_document(output, title):
+    # Frames keep layout state while a document builds, so each build gets its own.
+    doc = BaseDocTemplate(output, pagesize=letter, title=title)
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='body')
+    doc.addPageTemplates([PageTemplate(id='report', frames=[frame], onPage=_consolidated_page)])
+    return doc
+
+
+def _table_style(header, body):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), body),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ])
+
+
+def build_consolidated_report(output, datasets, username, timer=NULL_TIMER):
+    """
+    Render one PDF covering `datasets` (oldest first): totals across them,
+    trends from upload to upload, and a short section per dataset. Each
+    dataset carries an `outlier_count` annotation instead of its outlier index.
+    """
+    from . import aggregates
+
+    styles = report_styles()
+    fmt = lambda value: 'n/a' if value is None else f"{value:.2f}"
+
+    points = []
+    totals = aggregates.empty()
+    for dataset in datasets:
+        summary = dataset.summary_data or {}
+        totals = aggregates.merge(totals, aggregates.from_summary(summary))
+        points.append({
+            'label': dataset.timestamp.strftime('%m-%d %H:%M'),
+            'records': summary.get('total_records', 0),
+            'averages': summary.get('averages', {}),
+        })
+
+    # 1. Every chart up front, in parallel.
+    jobs = [('trend', points, "Trends Across Uploads")]
+    for dataset in datasets:
+        summary = dataset.summary_data or {}
+        jobs.append(('averages', summary.get('averages', {}), "Parameter Averages"))
+        jobs.append(('bar', summary.get('type_distribution', {}), "Equipment Count by Type"))
+    with timer.phase('charts'):
+        images = render_charts(jobs)
+
+    # 2. The story, then one build.
+    story = [Paragraph("Consolidated Equipment Report", styles['ReportTitle'])]
+    story.append(Paragraph(f"<b>User:</b> {username}", styles['NormalStyle']))
+    story.append(Paragraph(f"<b>Datasets:</b> {len(datasets)}", styles['NormalStyle']))
+    if datasets:
+        story.append(Paragraph(
+            f"<b>Period:</b> {datasets[0].timestamp.strftime('%Y-%m-%d %H:%M')} to "
+            f"{datasets[-1].timestamp.strftime('%Y-%m-%d %H:%M')}", styles['NormalStyle']
+        ))
+    story.append(Paragraph(f"<b>Total Records:</b> {totals['count']}", styles['NormalStyle']))
+
+    story.append(Paragraph("Totals Across Datasets", styles['CustomHeading']))
+    total_data = [['Parameter', 'Mean', 'Std', 'Min', 'Max']]
+    for name, column in totals['columns'].items():
+        stats = aggregates.describe_column(column)
+        total_data.append([name.capitalize(), fmt(stats['mean']), fmt(stats['std']), fmt(stats['min']), fmt(stats['max'])])
+    total_table = Table(total_data, colWidths=[1.5*inch, 1.1*inch, 1.1*inch, 1.1*inch, 1.1*inch])
+    total_table.setStyle(_table_style(colors.grey, colors.beige))
+    story.append(total_table)
+
+    story.append(Paragraph("Trends Across Uploads", styles['CustomHeading']))
+    story.append(Image(BytesIO(images[0]), width=7*inch, height=2.6*inch))
+    trend_data = [['Dataset', 'Uploaded', 'Records', 'Rejected', 'Flowrate', 'Pressure', 'Temperature']]
+    for dataset, point in zip(datasets, points):
+        summary = dataset.summary_data or {}
+        trend_data.append([
+            dataset.name[:28], dataset.timestamp.strftime('%Y-%m-%d %H:%M'), str(point['records']),
+            str(summary.get('rejected', {}).get('rows', 0)),
+            fmt(point['averages'].get('flowrate')), fmt(point['averages'].get('pressure')),
+            fmt(point['averages'].get('temperature')),
+        ])
+    trend_table = LongTable(trend_data, repeatRows=1,
+                            colWidths=[1.8*inch, 1.2*inch, 0.7*inch, 0.7*inch, 0.8*inch, 0.8*inch, 0.9*inch])
+    trend_table.setStyle(_table_style(colors.darkblue, colors.lavender))
+    story.append(trend_table)
+
+    for number, dataset in enumerate(datasets):
+        averages_png, bar_png = images[1 + 2 * number], images[2 + 2 * number]
+        story.append(KeepTogether([
+            Paragraph(f"{number + 1}. {dataset.name}", styles['SubHeading']),
+            Paragraph(
+                f"Uploaded {dataset.timestamp.strftime('%Y-%m-%d %H:%M')}, "
+                f"{(dataset.summary_data or {}).get('total_records', 0)} records, "
+                f"{dataset.outlier_count or 0} outlier readings.", styles['NormalStyle']
+            ),
+            Table([[Image(BytesIO(averages_png), width=3.4*inch, height=1.7*inch),
+                    Image(BytesIO(bar_png), width=3.4*inch, height=2*inch)]]),
+        ]))
+
+    doc = consolidated_document(output, f"Consolidated report for {username}")
+    with timer.phase('build'):
+        doc.build(story)
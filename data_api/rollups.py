@@ -0,0 +1,54 @@
+"""
+Incremental maintenance of UserRollup.
+
+A dataset's aggregate is merged into its owner's rollup when the dataset is
+created and subtracted again when it is deleted, whether the delete is
+explicit or comes from retention pruning in UploadedDataset.save(). Both
+hooks are signal receivers, connected in DataApiConfig.ready(), so queryset
+deletes are covered too. The only step that reads other datasets is
+rebuilding min/max after the dataset that held one of them was removed.
+"""
+from django.db import transaction
+
+from . import aggregates
+from .models import UploadedDataset, UserRollup
+
+
+def add(user_id, part, datasets=1):
+    """Merge `part` into the user's rollup; `datasets` is how many datasets it adds."""
+    with transaction.atomic():
+        # get_or_create retries the lookup if a concurrent request creates the rollup first.
+        rollup, created = UserRollup.objects.select_for_update().get_or_create(
+            user_id=user_id,
+            defaults={'aggregates': aggregates.merge(aggregates.empty(), part), 'dataset_count': datasets},
+        )
+        if created:
+            return
+        rollup.aggregates = aggregates.merge(rollup.aggregates or aggregates.empty(), part)
+        rollup.dataset_count += datasets
+        rollup.save(update_fields=['aggregates', 'dataset_count', 'updated'])
+
+
+def remove(user_id, part):
+    """Subtract one dataset's aggregate from the user's rollup."""
+    with transaction.atomic():
+        # Never create a rollup here: the user itself may be mid-delete.
+        rollup = UserRollup.objects.select_for_update().filter(user_id=user_id).first()
+        if rollup is None:
+            return
+        remaining = aggregates.subtract(rollup.aggregates, part)
+        if aggregates.needs_extremes(remaining):
+            summaries = UploadedDataset.objects.filter(user_id=user_id).values_list('summary_data', flat=True)
+            aggregates.merge_extremes(remaining, [aggregates.from_summary(s or {}) for s in summaries])
+        rollup.aggregates = remaining
+        rollup.dataset_count = max(rollup.dataset_count - 1, 0)
+        rollup.save(update_fields=['aggregates', 'dataset_count', 'updated'])
+
+
+def dataset_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add(instance.user_id, aggregates.from_summary(instance.summary_data or {}))
+
+
+def dataset_deleted(sender, instance, **kwargs):
+    remove(instance.user_id, aggregates.from_summary(instance.summary_data or {}))
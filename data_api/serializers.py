@@ -12,5 +12,26 @@ class UploadedDatasetSerializer(serializers.ModelSerializer):
     class Meta:
         model = UploadedDataset
         # Expose all fields to the API, making it easy to read the history
-        fields = ['id', 'username', 'name', 'timestamp', 'summary_data', 'file_path']
-        read_only_fields = ['id', 'timestamp', 'file_path', 'summary_data']
\ No newline at end of file
+        fields = ['id', 'username', 'name', 'timestamp', 'summary_data', 'file_path',
+                  'record_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'file_size', 'content_hash']
+        read_only_fields = ['id', 'timestamp', 'file_path', 'summary_data',
+                            'record_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'file_size', 'content_hash']
+
+
+class UploadedDatasetListSerializer(serializers.ModelSerializer):
+    """
+    Lightweight serializer for history listings.
+    Reads only the typed summary columns, so summary_data (and its data_preview)
+    is never loaded for a list.
+    """
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    # Model fields the list needs; HistoryListView restricts its query to these.
+    MODEL_FIELDS = ['id', 'user', 'user__username', 'name', 'timestamp', 'record_count',
+                    'avg_flowrate', 'avg_pressure', 'avg_temperature', 'file_size', 'content_hash']
+
+    class Meta:
+        model = UploadedDataset
+        fields = ['id', 'username', 'name', 'timestamp', 'record_count',
+                  'avg_flowrate', 'avg_pressure', 'avg_temperature', 'file_size', 'content_hash']
+        read_only_fields = fields
@@ -0,0 +1,160 @@
+"""
+Storage for raw uploaded datasets.
+
+UploadedDataset.file_path holds whatever path the configured backend returned
+from save(). Code that reads or removes a raw file goes through
+get_storage() and does not touch the filesystem directly, so another backend
+can be swapped in through settings.RAW_STORAGE.
+
+LocalDiskStorage writes each upload under MEDIA_ROOT/raw/ab/cd/, sharded by a
+random hex token. Same-named uploads therefore never overwrite each other,
+and no single directory grows without bound. CSV files are compressed with
+zstd when the ``zstandard`` package is installed and with gzip otherwise, and
+open() decompresses them as they are read. XLSX files are already zip
+archives, and pandas needs to seek them, so they are stored as-is. Paths
+written before this layer existed (flat, uncompressed) can still be read.
+"""
+import gzip
+import hashlib
+import os
+import uuid
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.text import get_valid_filename
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+StoredFile = namedtuple('StoredFile', ['path', 'size', 'stored_size', 'sha256'])
+
+COMPRESSED_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+EXCEL_SUFFIX = '.xlsx'
+
+
+def is_excel(path):
+    return path.endswith(EXCEL_SUFFIX)
+
+
+class RawFileStorage:
+    """Interface every raw-file backend implements."""
+
+    def save(self, chunks, filename):
+        """Store the byte chunks of an upload called `filename`; returns a StoredFile."""
+        raise NotImplementedError
+
+    def open(self, path):
+        """Return a binary file object yielding the original (uncompressed) bytes."""
+        raise NotImplementedError
+
+    def append(self, path, chunks):
+        """Add bytes to the end of a stored file (as read back through open()); returns how many."""
+        raise NotImplementedError
+
+    def exists(self, path):
+        raise NotImplementedError
+
+    def delete(self, path):
+        """Remove a stored file; missing files are ignored."""
+        raise NotImplementedError
+
+    def modified_time(self, path):
+        """A value that changes whenever the file's content does (used as a cache key)."""
+        raise NotImplementedError
+
+
+class LocalDiskStorage(RawFileStorage):
+    def __init__(self, root=None, compression='auto', level=3, shard_depth=2):
+        if compression == 'auto':
+            compression = 'zstd' if zstandard is not None else 'gzip'
+        if compression == 'zstd' and zstandard is None:
+            compression = 'gzip'
+        self._root = root
+        self.compression = compression
+        self.level = level
+        self.shard_depth = shard_depth
+
+    @property
+    def root(self):
+        # Resolved per call so MEDIA_ROOT overrides (tests, benchmarks) are honoured.
+        return self._root or os.path.join(settings.MEDIA_ROOT, 'raw')
+
+    def _new_path(self, filename):
+        token = uuid.uuid4().hex
+        shards = [token[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        name = f"{token}_{get_valid_filename(os.path.basename(filename))}"
+        if not is_excel(name) and self.compression in COMPRESSED_SUFFIXES:
+            name += COMPRESSED_SUFFIXES[self.compression]
+        return os.path.join(self.root, *shards, name)
+
+    def _writer(self, path, mode='wb'):
+        # In append mode each write session adds a new gzip member / zstd frame;
+        # both formats decompress concatenated members as one stream.
+        if path.endswith('.gz'):
+            return gzip.open(path, mode, compresslevel=self.level)
+        if path.endswith('.zst'):
+            return zstandard.ZstdCompressor(level=self.level).stream_writer(open(path, mode), closefd=True)
+        return open(path, mode)
+
+    def save(self, chunks, filename):
+        path = self._new_path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with self._writer(path) as destination:
+                for chunk in chunks:
+                    destination.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            self.delete(path)
+            raise
+        return StoredFile(path, size, os.path.getsize(path), digest.hexdigest())
+
+    def open(self, path):
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rb')
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError(f"{path} is zstd-compressed but the zstandard package is not installed.")
+            return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True, read_across_frames=True)
+        return open(path, 'rb')
+
+    def append(self, path, chunks):
+        size = 0
+        with self._writer(path, 'ab') as destination:
+            for chunk in chunks:
+                destination.write(chunk)
+                size += len(chunk)
+        return size
+
+    def exists(self, path):
+        return bool(path) and os.path.exists(path)
+
+    def delete(self, path):
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def modified_time(self, path):
+        stat = os.stat(path)
+        # Size too, so an append inside the filesystem's timestamp granularity still counts.
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=None)
+def _build_storage(backend, options):
+    return import_string(backend)(**dict(options))
+
+
+def get_storage():
+    """The raw-file backend configured in settings.RAW_STORAGE."""
+    config = settings.RAW_STORAGE
+    return _build_storage(config['BACKEND'], tuple(sorted(config.get('OPTIONS', {}).items())))
@@ -0,0 +1,141 @@
+"""
+Synthetic equipment datasets for benchmarks and load tests.
+Frames have the same five columns that CSVUploadView requires.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+# (mean, spread) per numeric column; spread is the std-dev, or the half-width for uniform.
+COLUMN_PARAMS = {
+    'Flowrate': (80.0, 25.0),
+    'Pressure': (120.0, 40.0),
+    'Temperature': (250.0, 90.0),
+}
+DISTRIBUTIONS = ['normal', 'uniform', 'lognormal']
+
+# Values that pd.to_numeric(errors='coerce') turns into NaN.
+DIRTY_TOKENS = np.array(['', 'n/a', 'NaN', 'ERR', '--', '12,5', 'unknown'], dtype=object)
+
+# Excel sheets stop at 1,048,576 rows (header included).
+XLSX_MAX_ROWS = 1_048_575
+
+
+def _type_weights(n_types, skew):
+    """Zipf-like weights: skew 0 is uniform, larger values concentrate rows in the first types."""
+    weights = 1.0 / np.power(np.arange(1, n_types + 1, dtype=np.float64), skew)
+    return weights / weights.sum()
+
+
+def _numeric_values(rng, column, size, distribution):
+    mean, spread = COLUMN_PARAMS[column]
+    if distribution == 'uniform':
+        values = rng.uniform(mean - spread, mean + spread, size=size)
+    elif distribution == 'lognormal':
+        sigma = 0.5
+        values = rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, size=size)
+    else:
+        values = rng.normal(mean, spread, size=size)
+    return values.round(2)
+
+
+def make_equipment_frame(rows, n_types=20, seed=0, distribution='normal', skew=0.0,
+                         dirty_fraction=0.0, start_index=0, extra_columns=0):
+    """
+    Build an equipment frame of `rows` rows spread over `n_types` types.
+    `dirty_fraction` of each numeric column is replaced with non-numeric tokens.
+    `extra_columns` unrelated columns (alternately numeric and text) follow the required ones.
+    """
+    rng = np.random.default_rng(seed)
+    type_names = np.array([f"Type {i}" for i in range(n_types)], dtype=object)
+    if skew:
+        type_ids = rng.choice(n_types, size=rows, p=_type_weights(n_types, skew))
+    else:
+        type_ids = rng.integers(0, n_types, size=rows)
+
+    data = {
+        'Equipment Name': np.array([f"EQ-{i}" for i in range(start_index, start_index + rows)], dtype=object),
+        'Type': type_names[type_ids],
+    }
+    for column in NUMERIC_COLUMNS:
+        values = _numeric_values(rng, column, rows, distribution)
+        if dirty_fraction > 0:
+            dirty = rng.random(rows) < dirty_fraction
+            values = values.astype(object)
+            values[dirty] = DIRTY_TOKENS[rng.integers(0, len(DIRTY_TOKENS), size=int(dirty.sum()))]
+        data[column] = values
+
+    for index in range(extra_columns):
+        values = rng.normal(0.0, 1.0, size=rows).round(4)
+        data[f'Extra {index}'] = values if index % 2 == 0 else 'note-' + pd.Series(values).astype(str)
+
+    return pd.DataFrame(data)
+
+
+def iter_equipment_chunks(rows, chunk_size=1_000_000, seed=0, **kwargs):
+    """Yield frames of at most `chunk_size` rows that together make up `rows` rows."""
+    seeds = np.random.SeedSequence(seed).spawn(max(1, -(-rows // chunk_size)))
+    for chunk_index, start in enumerate(range(0, rows, chunk_size)):
+        size = min(chunk_size, rows - start)
+        yield make_equipment_frame(size, seed=seeds[chunk_index], start_index=start, **kwargs)
+
+
+def _csv_field(value):
+    if not isinstance(value, str):
+        return repr(value)
+    if any(char in value for char in ',"\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _csv_column(series):
+    """The column's values as CSV fields, quoting only where a value needs it."""
+    values = series.tolist()
+    if series.dtype != object:
+        return map(repr, values)
+    if pd.api.types.infer_dtype(series, skipna=False) == 'string':
+        # One join is far cheaper than checking every value in Python.
+        joined = '\n'.join(values)
+        if ',' not in joined and '"' not in joined and joined.count('\n') == len(values) - 1:
+            return values
+    return map(_csv_field, values)
+
+
+def _csv_text(chunk):
+    """
+    Render a chunk as CSV lines, the same text DataFrame.to_csv writes for these frames.
+    Joining Python strings row by row is about twice as fast as to_csv,
+    which dominates generation time for large files.
+    """
+    columns = [_csv_column(chunk[name]) for name in chunk.columns]
+    return '\n'.join(map(','.join, zip(*columns))) + '\n'
+
+
+def write_csv(path, chunks):
+    """Stream chunks to a CSV file, one block of text per chunk."""
+    total = 0
+    with open(path, 'w', encoding='utf-8', newline='') as fh:
+        for index, chunk in enumerate(chunks):
+            if index == 0:
+                fh.write(','.join(map(_csv_field, chunk.columns)) + '\n')
+            fh.write(_csv_text(chunk))
+            total += len(chunk)
+    return total
+
+
+def write_xlsx(path, chunks):
+    """Stream chunks to an XLSX file with openpyxl's write-only workbook."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Equipment')
+    sheet.append(COLUMNS)
+    total = 0
+    for chunk in chunks:
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+        total += len(chunk)
+    workbook.save(path)
+    return total
@@ -1,3 +1,1096 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from io import BytesIO, StringIO
 
-# Create your tests here.
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from . import admission
+from .async_views import (
+    AsyncCSVUploadView, AsyncDatasetRowsView, AsyncHistoryListView, AsyncPDFReportView, AsyncSummaryView,
+)
+from .benchmarks import compare_to_baseline, missing_from_baseline
+from .db import apply_sqlite_pragmas
+from .metrics import REGISTRY
+from .models import ProfileCapture, UploadedDataset
+from .storage import get_storage
+from .synthetic import make_equipment_frame
+
+SAMPLE_CSV = (
+    b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+    b"Reactor 1,Stirred Tank,50.5,150.2,300.1\n"
+    b"Pump P1,Centrifugal,35.2,200,80.3\n"
+    b"Pump P2,Centrifugal,bad,210.5,75.8\n"
+)
+
+
+class APITestBase(TestCase):
+    """Authenticated client with uploads written to a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, state_dir, ignore_errors=True)
+        admission_override = override_settings(ADMISSION_DB=os.path.join(state_dir, 'admission.sqlite3'))
+        admission_override.enable()
+        self.addCleanup(admission_override.disable)
+
+        self.user = User.objects.create_user('engineer', password='secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content=SAMPLE_CSV, name='equipment.csv'):
+        return self.client.post('/api/upload/', {'file': SimpleUploadedFile(name, content)}, format='multipart')
+
+
+class BenchmarkBaselineTests(SimpleTestCase):
+    def test_flags_slowdown_beyond_tolerance(self):
+        baseline = {'upload/csv/1k': {'seconds': 1.0, 'rss_growth_mb': 50.0}}
+        results = {'upload/csv/1k': {'seconds': 1.5, 'rss_growth_mb': 50.0}}
+
+        regressions = compare_to_baseline(results, baseline, tolerance=0.25)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('upload/csv/1k: seconds', regressions[0])
+
+    def test_ignores_noise_and_unknown_scenarios(self):
+        baseline = {'summary/csv/1k': {'seconds': 0.001, 'rss_growth_mb': 1.0}}
+        results = {
+            'summary/csv/1k': {'seconds': 0.002, 'rss_growth_mb': 2.0},
+            'report/csv/1k': {'seconds': 9.0, 'rss_growth_mb': 900.0},
+        }
+
+        self.assertEqual(compare_to_baseline(results, baseline, tolerance=0.25), [])
+        self.assertEqual(missing_from_baseline(results, baseline), ['report/csv/1k'])
+
+
+class SyntheticDataTests(TestCase):
+    def test_dirty_fraction_leaves_non_numeric_cells(self):
+        df = make_equipment_frame(10_000, n_types=5, dirty_fraction=0.1, seed=1)
+
+        coerced = pd.to_numeric(df['Pressure'], errors='coerce')
+
+        self.assertEqual(list(df.columns), ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'])
+        self.assertAlmostEqual(coerced.isna().mean(), 0.1, delta=0.02)
+        self.assertLessEqual(df['Type'].nunique(), 5)
+
+    def test_command_creates_test_users_once(self):
+        call_command('generate_equipment_data', users=3, stdout=StringIO())
+        call_command('generate_equipment_data', users=3, stdout=StringIO())
+
+        users = User.objects.filter(username__startswith='loadtest-')
+        self.assertEqual(users.count(), 3)
+        self.assertTrue(users.first().check_password('loadtest123'))
+
+
+class ServerTimingTests(APITestBase):
+    def test_no_header_when_disabled(self):
+        response = self.upload()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_upload_and_summary_report_phases(self):
+        with self.assertLogs('data_api.timing', level='INFO') as logs:
+            upload = self.upload()
+            summary = self.client.get(f"/api/summary/{upload.data['id']}/")
+
+        self.assertIn('parse;dur=', upload['Server-Timing'])
+        self.assertIn('db;dur=', upload['Server-Timing'])
+        self.assertIn('total;dur=', summary['Server-Timing'])
+        self.assertIn('"view": "SummaryView"', logs.output[-1])
+
+
+class MetricsTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir, ignore_errors=True)
+        metrics_override = override_settings(METRICS_DIR=metrics_dir, METRICS_PUBLIC=True)
+        metrics_override.enable()
+        self.addCleanup(metrics_override.disable)
+        for metric in REGISTRY.metrics.values():
+            metric.values.clear()
+
+    def test_exposes_view_latency_and_upload_counters(self):
+        self.upload()
+        self.client.get('/api/history/')
+
+        body = self.client.get('/api/metrics/').content.decode()
+
+        self.assertIn('chemviz_http_request_duration_seconds_count{method="POST",view="CSVUploadView"} 1', body)
+        self.assertIn('chemviz_http_request_duration_seconds_bucket{method="GET",view="HistoryListView",le="+Inf"} 1', body)
+        self.assertIn('chemviz_upload_rows_total 2', body)
+
+    def test_merges_other_worker_files(self):
+        other_worker = {'chemviz_upload_rows_total': {'[]': 40}}
+        with open(os.path.join(settings.METRICS_DIR, '999999.json'), 'w') as fh:
+            json.dump(other_worker, fh)
+        self.upload()
+
+        body = self.client.get('/api/metrics/').content.decode()
+
+        self.assertIn('chemviz_upload_rows_total 42', body)
+
+    def test_exited_workers_are_folded_into_the_archive(self):
+        for pid, rows in ((999998, 40), (999999, 2)):
+            with open(os.path.join(settings.METRICS_DIR, f'{pid}.json'), 'w') as fh:
+                json.dump({'chemviz_upload_rows_total': {'[]': rows}}, fh)
+
+        REGISTRY.archive_worker(999998)
+        REGISTRY.archive_worker(999999)
+
+        self.assertEqual(sorted(os.listdir(settings.METRICS_DIR)), ['archive.json'])
+        self.assertIn('chemviz_upload_rows_total 42', self.client.get('/api/metrics/').content.decode())
+        REGISTRY.clear_dir()
+        self.assertEqual(os.listdir(settings.METRICS_DIR), [])
+
+
+class ProfilingMiddlewareTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        profiling_override = override_settings(PROFILING_ENABLED=True, PROFILE_DIR=profile_dir, PROFILE_MAX_CAPTURES=2)
+        profiling_override.enable()
+        self.addCleanup(profiling_override.disable)
+
+    def test_header_ignored_for_non_staff(self):
+        self.client.get('/api/history/', HTTP_X_PROFILE_REQUEST='1')
+
+        self.assertFalse(ProfileCapture.objects.exists())
+
+    def test_staff_header_captures_cprofile_in_bounded_ring(self):
+        User.objects.create_user('admin', password='secret123', is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Basic ' + base64.b64encode(b'admin:secret123').decode())
+
+        for _ in range(3):
+            client.get('/api/history/', HTTP_X_PROFILE_REQUEST='1')
+
+        captures = ProfileCapture.objects.all()
+        self.assertEqual(captures.count(), 2)
+        self.assertEqual(len(os.listdir(settings.PROFILE_DIR)), 2)
+        self.assertEqual(captures[0].profiler, ProfileCapture.PROFILER_CPROFILE)
+
+    @override_settings(PROFILE_SLOW_REQUEST_MS=0.001, PROFILE_SAMPLE_INTERVAL=0.0005)
+    def test_slow_request_keeps_sampled_stacks(self):
+        self.client.get('/api/report/', {'id': self.upload().data['id']})
+
+        capture = ProfileCapture.objects.get(path__startswith='/api/report/')
+        self.assertEqual(capture.trigger, ProfileCapture.TRIGGER_THRESHOLD)
+        with open(capture.file_path) as fh:
+            self.assertIn('get (views.py:', fh.read())
+
+
+# Upper bounds per endpoint. Time budgets are generous so they only trip on real
+# regressions (an accidental O(n^2) path), not on a slow CI machine.
+PERF_BUDGETS = {
+    'history': {'queries': 1, 'seconds': 0.5},
+    'summary': {'queries': 1, 'seconds': 0.5},
+    # Dataset INSERT and retention COUNT, plus the rollup update (savepoint, SELECT, write, release).
+    # The first upload creates the rollup in get_or_create's own savepoint: two more.
+    'upload': {'queries': 8, 'seconds': 3.0, 'peak_mib': 32},
+    'report': {'queries': 1, 'seconds': 20.0, 'peak_mib': 128},
+}
+PERF_FIXTURE_ROWS = 20_000
+
+
+class PerformanceBudgetMixin:
+    def measure(self, func, track_allocations=False):
+        if track_allocations:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = func()
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if track_allocations else None
+        finally:
+            if track_allocations:
+                tracemalloc.stop()
+        return response, {'queries': len(queries), 'seconds': elapsed, 'peak_mib': peak}, queries.captured_queries
+
+    def assertWithinBudget(self, name, func):
+        """
+        Run func and compare its query count, wall time and (if budgeted) peak
+        Python allocations with PERF_BUDGETS[name]. Time is measured on an untraced
+        run because tracemalloc slows allocation-heavy code considerably.
+        """
+        budget = PERF_BUDGETS[name]
+        response, actual, captured = self.measure(func)
+        if 'peak_mib' in budget:
+            actual['peak_mib'] = self.measure(func, track_allocations=True)[1]['peak_mib']
+
+        over = [metric for metric, limit in budget.items() if actual[metric] > limit]
+        if over:
+            rows = [f"  {'metric':<10} {'budget':>10} {'actual':>10}"]
+            for metric, limit in budget.items():
+                marker = '   <-- over budget' if metric in over else ''
+                rows.append(f"  {metric:<10} {limit:>10.4g} {actual[metric]:>10.4g}{marker}")
+            if 'queries' in over:
+                rows.append('  queries executed:')
+                rows.extend(f"    {i}. {query['sql']}" for i, query in enumerate(captured, 1))
+            self.fail(f"Performance budget exceeded for '{name}':\n" + '\n'.join(rows))
+        return response
+
+
+class PerformanceBudgetTests(PerformanceBudgetMixin, APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.fixture = make_equipment_frame(PERF_FIXTURE_ROWS, n_types=12, seed=7).to_csv(index=False).encode()
+
+    def test_history_query_count_does_not_grow_with_rows(self):
+        for _ in range(5):
+            self.upload()
+
+        response = self.assertWithinBudget('history', lambda: self.client.get('/api/history/'))
+
+        self.assertEqual(len(response.data), 5)
+
+    def test_summary_budget(self):
+        dataset_id = self.upload(self.fixture).data['id']
+
+        self.assertWithinBudget('summary', lambda: self.client.get(f'/api/summary/{dataset_id}/'))
+
+    def test_upload_budget(self):
+        response = self.assertWithinBudget('upload', lambda: self.upload(self.fixture))
+
+        self.assertEqual(response.data['summary_data']['total_records'], PERF_FIXTURE_ROWS)
+
+    def test_report_budget(self):
+        dataset_id = self.upload(self.fixture).data['id']
+
+        response = self.assertWithinBudget('report', lambda: self.client.get(f'/api/report/{dataset_id}/'))
+
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class HistoryListTests(APITestBase):
+    def test_list_uses_typed_columns_without_summary_json(self):
+        self.upload()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/history/')
+
+        self.assertNotIn('summary_data', queries.captured_queries[0]['sql'])
+        self.assertEqual(response.data[0]['record_count'], 2)
+        self.assertAlmostEqual(response.data[0]['avg_pressure'], 175.1)
+        self.assertEqual(len(response.data[0]['content_hash']), 64)
+
+    def test_filters_by_stats(self):
+        self.upload()
+        self.upload(SAMPLE_CSV + b"Pump P3,Gear,40,210.5,75.8\n", name='bigger.csv')
+
+        response = self.client.get('/api/history/', {'min_records': 3})
+
+        self.assertEqual([d['name'] for d in response.data], ['bigger.csv'])
+        self.assertEqual(self.client.get('/api/history/', {'max_avg_pressure': 'x'}).status_code, 400)
+
+
+class SQLiteTuningTests(TestCase):
+    def test_django_connections_get_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+class SQLiteConcurrencyStressTests(SimpleTestCase):
+    """
+    Runs concurrent "upload" writers and "history" readers against a real
+    database file, the way gunicorn workers share db.sqlite3.
+    """
+    WRITERS = 4
+    READERS = 4
+    WRITES_PER_WRITER = 25
+    WRITE_HOLD_SECONDS = 0.01
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'stress.sqlite3')
+        with sqlite3.connect(self.path) as conn:
+            conn.execute('CREATE TABLE dataset (id INTEGER PRIMARY KEY, user_id INTEGER, payload TEXT)')
+
+    def connect(self, tuned):
+        # timeout=0 leaves lock waiting entirely to the busy_timeout pragma.
+        conn = sqlite3.connect(self.path, timeout=0, isolation_level=None, check_same_thread=False)
+        if tuned:
+            apply_sqlite_pragmas(conn.cursor(), settings.SQLITE_PRAGMAS)
+        return conn
+
+    def run_stress(self, tuned):
+        errors, overlapped_reads = [], []
+        open_writes = []  # one entry per writer currently inside a transaction
+        writers_done = threading.Event()
+
+        def writer(user_id):
+            conn = self.connect(tuned)
+            try:
+                for _ in range(self.WRITES_PER_WRITER):
+                    conn.execute('BEGIN IMMEDIATE')
+                    open_writes.append(user_id)
+                    conn.execute('INSERT INTO dataset (user_id, payload) VALUES (?, ?)', (user_id, 'x' * 2000))
+                    time.sleep(self.WRITE_HOLD_SECONDS)  # summary/aggregation work inside the transaction
+                    open_writes.remove(user_id)
+                    conn.execute('COMMIT')
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            finally:
+                conn.close()
+
+        def reader(user_id):
+            conn = self.connect(tuned)
+            try:
+                while not writers_done.is_set():
+                    conn.execute('SELECT id FROM dataset WHERE user_id = ? ORDER BY id DESC LIMIT 5', (user_id,)).fetchall()
+                    if open_writes:
+                        overlapped_reads.append(user_id)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            finally:
+                conn.close()
+
+        writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(self.WRITERS)]
+        reader_threads = [threading.Thread(target=reader, args=(i,)) for i in range(self.READERS)]
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+        return errors, overlapped_reads
+
+    def test_untuned_database_locks(self):
+        errors, _ = self.run_stress(tuned=False)
+
+        self.assertTrue(any('locked' in error for error in errors))
+
+    def test_tuned_database_serves_parallel_writes_and_reads(self):
+        errors, overlapped_reads = self.run_stress(tuned=True)
+
+        self.assertEqual(errors, [])
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM dataset').fetchone()[0],
+                             self.WRITERS * self.WRITES_PER_WRITER)
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        # History reads kept completing while upload transactions were open.
+        self.assertGreater(len(overlapped_reads), 0)
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_url_conf_does_not_import_heavy_libraries(self):
+        script = (
+            "import sys, django; django.setup(); import chemical_viz_project.urls; "
+            "print(sorted(m for m in ('pandas', 'matplotlib', 'reportlab') if m in sys.modules))"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='chemical_viz_project.settings', DATA_API_WARMUP='False')
+        result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '[]')
+
+    def test_warm_up_loads_report_stack(self):
+        from .warmup import warm_up
+
+        self.assertGreaterEqual(warm_up(), 0)
+
+
+@override_settings(ASYNC_EXECUTOR='thread')
+class AsyncViewTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.auth = {'Authorization': 'Basic ' + base64.b64encode(b'engineer:secret123').decode()}
+
+    async def test_upload_then_summary_and_history(self):
+        request = self.factory.post('/api/upload/', {'file': SimpleUploadedFile('equipment.csv', SAMPLE_CSV)},
+                                    headers=self.auth)
+        response = await AsyncCSVUploadView.as_view()(request)
+        self.assertEqual(response.status_code, 201)
+        dataset_id = json.loads(response.content)['id']
+
+        request = self.factory.get('/api/summary/', headers=self.auth)
+        response = await AsyncSummaryView.as_view()(request, pk=dataset_id)
+        self.assertEqual(json.loads(response.content)['records'], 2)
+
+        request = self.factory.get('/api/rows/', {'ordering': '-Flowrate'}, headers=self.auth)
+        response = await AsyncDatasetRowsView.as_view()(request, pk=dataset_id)
+        self.assertEqual([row['Equipment Name'] for row in json.loads(response.content)['results']],
+                         ['Reactor 1', 'Pump P1'])
+
+        request = self.factory.get('/api/history/', {'min_records': 2}, headers=self.auth)
+        response = await AsyncHistoryListView.as_view()(request)
+        self.assertEqual([d['id'] for d in json.loads(response.content)], [dataset_id])
+
+    async def test_missing_columns_and_unauthenticated(self):
+        request = self.factory.post('/api/upload/', {'file': SimpleUploadedFile('bad.csv', b"Type,Flowrate\nPump,1\n")},
+                                    headers=self.auth)
+        response = await AsyncCSVUploadView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Equipment Name', json.loads(response.content)['missing'])
+
+        response = await AsyncHistoryListView.as_view()(self.factory.get('/api/history/'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_report_returns_pdf(self):
+        dataset_id = (await sync_to_async(self.upload)()).data['id']
+
+        response = await AsyncPDFReportView.as_view()(self.factory.get('/api/report/', headers=self.auth), pk=dataset_id)
+
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_missing_columns_error_survives_pickling(self):
+        from .processing import MissingColumnsError
+
+        error = pickle.loads(pickle.dumps(MissingColumnsError(['Type'])))
+        self.assertEqual(error.missing, ['Type'])
+
+
+@override_settings(ADMISSION_CONTROL_ENABLED=True, ADMISSION_QUEUE_TIMEOUT=0.1, ADMISSION_BUSY_RETRY_AFTER=3)
+class AdmissionControlTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.dataset_id = self.upload().data['id']
+
+    @override_settings(ADMISSION_RATES={'report': (1, 1)})
+    def test_token_bucket_rejects_with_retry_after(self):
+        self.assertEqual(self.client.get(f'/api/report/{self.dataset_id}/').status_code, 200)
+
+        response = self.client.get(f'/api/report/{self.dataset_id}/')
+
+        self.assertEqual(response.status_code, 429)
+        # One token a minute, minus however long the first report took.
+        self.assertTrue(30 < int(response['Retry-After']) <= 60)
+
+    @override_settings(ADMISSION_USER_CONCURRENCY=1)
+    def test_user_concurrency_cap_queues_then_rejects(self):
+        slot_id, _ = admission.try_acquire('upload', self.user.id)
+
+        response = self.client.get(f'/api/report/{self.dataset_id}/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3')
+        # Cheap endpoints are not limited.
+        self.assertEqual(self.client.get('/api/history/').status_code, 200)
+
+        admission.release(slot_id)
+        self.assertEqual(self.client.get(f'/api/report/{self.dataset_id}/').status_code, 200)
+
+    @override_settings(ADMISSION_USER_CONCURRENCY=1)
+    def test_slot_is_released_when_the_view_crashes(self):
+        class CrashingView(admission.AdmissionControlMixin, APIView):
+            admission_scope = 'report'
+
+            def get(self, request, *args, **kwargs):
+                raise RuntimeError("boom")
+
+        request = APIRequestFactory().get('/crash/')
+        force_authenticate(request, user=self.user)
+        with self.assertRaises(RuntimeError):
+            CrashingView.as_view()(request)
+
+        self.assertEqual(self.client.get(f'/api/report/{self.dataset_id}/').status_code, 200)
+
+    @override_settings(ADMISSION_GLOBAL_CONCURRENCY=1)
+    def test_global_cap_and_dead_worker_slots_are_reaped(self):
+        other = User.objects.create_user('other', password='secret123')
+        slot_id, _ = admission.try_acquire('report', other.id)
+        self.assertEqual(admission.try_acquire('report', self.user.id), (None, (admission.BUSY, 3)))
+
+        # A slot held by a process that no longer exists does not count.
+        admission._connection().execute("UPDATE slots SET pid = ? WHERE id = ?", (2 ** 22 + 1, slot_id))
+        self.assertIsNotNone(admission.try_acquire('report', self.user.id)[0])
+
+
+class RawStorageTests(APITestBase):
+    def test_uploads_are_sharded_compressed_and_unique(self):
+        first = UploadedDataset.objects.get(pk=self.upload().data['id'])
+        second = UploadedDataset.objects.get(pk=self.upload().data['id'])
+
+        self.assertNotEqual(first.file_path, second.file_path)
+        relative = os.path.relpath(first.file_path, settings.MEDIA_ROOT).split(os.sep)
+        self.assertEqual(relative[0], 'raw')
+        self.assertEqual(len(relative), 4)
+        self.assertRegex(relative[-1], r'_equipment\.csv\.(gz|zst)$')
+        with get_storage().open(first.file_path) as fh:
+            self.assertEqual(fh.read(), SAMPLE_CSV)
+        self.assertEqual(first.content_hash, hashlib.sha256(SAMPLE_CSV).hexdigest())
+
+        response = self.client.get(f'/api/rows/{first.id}/', {'ordering': '-Flowrate'})
+        self.assertEqual([row['Equipment Name'] for row in response.data['results']], ['Reactor 1', 'Pump P1'])
+
+        self.client.delete(f'/api/history/{first.id}/')
+        self.assertFalse(get_storage().exists(first.file_path))
+        self.assertTrue(get_storage().exists(second.file_path))
+
+    def test_legacy_flat_files_remain_readable(self):
+        path = os.path.join(settings.MEDIA_ROOT, f'{self.user.id}_legacy.csv')
+        with open(path, 'wb') as fh:
+            fh.write(SAMPLE_CSV)
+        dataset = UploadedDataset.objects.create(user=self.user, name='legacy.csv', summary_data={}, file_path=path)
+
+        response = self.client.get(f'/api/rows/{dataset.id}/')
+
+        self.assertEqual(response.data['count'], 2)
+
+
+class CSVParseTests(APITestBase):
+    def test_extra_columns_are_pruned_and_types_counted(self):
+        frame = make_equipment_frame(60, n_types=5, seed=3, dirty_fraction=0.1, extra_columns=4)
+        response = self.upload(frame.to_csv(index=False).encode())
+        self.assertEqual(response.status_code, 201)
+
+        from . import processing
+        df = processing.read_frame(UploadedDataset.objects.get(pk=response.data['id']).file_path)
+        self.assertEqual(list(df.columns), processing.REQUIRED_COLUMNS)
+        self.assertEqual(df['Type'].dtype, 'category')
+
+        expected = processing.clean_frame(frame.copy())
+        summary = self.client.get(f"/api/summary/{response.data['id']}/").data
+        self.assertEqual(summary['records'], len(expected))
+        self.assertEqual(dict(zip(summary['bar']['labels'], summary['bar']['values'])),
+                         expected['Type'].value_counts().to_dict())
+
+    def test_header_is_checked_before_the_body(self):
+        from . import processing
+        with self.assertRaises(processing.MissingColumnsError) as raised:
+            processing.csv_read_options([' Equipment Name ', 'Type', 'Flowrate', 'Other'])
+        self.assertEqual(raised.exception.missing, ['Pressure', 'Temperature'])
+
+        response = self.upload(b"Equipment Name,Type,Flowrate\n" + b"P-1,Pump,1.0\n" * 10)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['missing'], ['Pressure', 'Temperature'])
+
+    @override_settings(CSV_FLOAT32=True)
+    def test_float32_numeric_columns(self):
+        from . import processing
+        frame = make_equipment_frame(50, seed=4)
+        df = processing.clean_frame(frame.copy())
+        self.assertEqual(df['Pressure'].dtype, 'float32')
+        summary = processing.summarize(df)
+        self.assertAlmostEqual(summary['averages']['pressure'], frame['Pressure'].mean(), places=3)
+
+
+class RejectedRowsTests(APITestBase):
+    def test_rejected_rows_are_counted_and_downloadable(self):
+        content = SAMPLE_CSV + b"P-9,Pump,,1.0,oops\nP-10,Valve,2.0,n/a,3.0\n"
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 201)
+        dataset = UploadedDataset.objects.get(pk=response.data['id'])
+        self.assertEqual(dataset.summary_data['rejected'],
+                         {'rows': 3, 'columns': {'flowrate': 2, 'pressure': 1, 'temperature': 1}})
+        self.assertEqual(dataset.record_count, 2)
+
+        response = self.client.get(f'/api/rejected/{dataset.pk}/')
+        self.assertEqual(response.status_code, 200)
+        rejected = pd.read_csv(StringIO(b''.join(response.streaming_content).decode()), keep_default_na=False)
+        self.assertEqual(list(rejected['Equipment Name']), ['Pump P2', 'P-9', 'P-10'])
+        self.assertEqual(list(rejected['Reject Reason']),
+                         ['Flowrate not numeric', 'Flowrate missing; Temperature not numeric', 'Pressure missing'])
+        self.assertEqual(rejected['Flowrate'][0], 'bad')
+
+    def test_clean_upload_has_no_sidecar(self):
+        dataset_id = self.upload(SAMPLE_CSV.replace(b'bad', b'40.0')).data['id']
+        self.assertEqual(UploadedDataset.objects.get(pk=dataset_id).rejected_path, '')
+        self.assertEqual(self.client.get(f'/api/rejected/{dataset_id}/').status_code, 404)
+
+    def test_validation_matches_per_column_dropna(self):
+        from . import processing
+        frame = make_equipment_frame(2000, seed=5, dirty_fraction=0.05)
+        expected = frame.copy()
+        for col in processing.NUMERIC_COLUMNS:
+            expected[col] = pd.to_numeric(expected[col], errors='coerce')
+            expected = expected.dropna(subset=[col])
+        validation = processing.validate_frame(frame.copy())
+        pd.testing.assert_frame_equal(validation.frame, expected)
+        self.assertEqual(validation.counts['rows'], len(frame) - len(expected))
+        self.assertEqual(len(validation.rejected), validation.counts['rows'])
+
+
+class DatasetRowsTests(APITestBase):
+    ROWS_CSV = (
+        b"Equipment Name,Type,Flowrate,Pressure,Temperature\n"
+        b"Reactor 1,Stirred Tank,50.5,150.2,300.1\n"
+        b"Pump P1,Centrifugal,35.2,200,80.3\n"
+        b"Mixer M1,,12.0,90.5,45.0\n"
+        b"Pump P3,Centrifugal,41.0,180.0,70.0\n"
+    )
+
+    def rows(self, dataset_id, **params):
+        response = self.client.get(f'/api/rows/{dataset_id}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_ordering_puts_missing_values_last(self):
+        dataset_id = self.upload(self.ROWS_CSV).data['id']
+        names = [row['Equipment Name'] for row in self.rows(dataset_id, ordering='Type')['results']]
+        self.assertEqual(names, ['Pump P1', 'Pump P3', 'Reactor 1', 'Mixer M1'])
+        names = [row['Equipment Name'] for row in self.rows(dataset_id, ordering='-Type')['results']]
+        self.assertEqual(names, ['Reactor 1', 'Pump P1', 'Pump P3', 'Mixer M1'])
+        flows = [row['Flowrate'] for row in self.rows(dataset_id, ordering='-Flowrate')['results']]
+        self.assertEqual(flows, sorted(flows, reverse=True))
+
+    def test_search_and_paging(self):
+        dataset_id = self.upload(self.ROWS_CSV).data['id']
+        data = self.rows(dataset_id, search='pump', ordering='Equipment Name')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([row['Equipment Name'] for row in data['results']], ['Pump P1', 'Pump P3'])
+
+        data = self.rows(dataset_id, ordering='Equipment Name', offset=1, limit=2)
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['offset'], 1)
+        self.assertEqual([row['Equipment Name'] for row in data['results']], ['Pump P1', 'Pump P3'])
+
+        self.assertEqual(self.client.get(f'/api/rows/{dataset_id}/', {'ordering': 'Bogus'}).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/rows/{dataset_id}/', {'limit': 'x'}).status_code, 400)
+
+
+class OutlierTests(APITestBase):
+    def planted_frame(self):
+        frame = make_equipment_frame(400, n_types=4, seed=6)
+        frame.loc[17, 'Pressure'] = 5000.0
+        frame.loc[230, 'Temperature'] = -400.0
+        return frame
+
+    def test_index_matches_per_type_robust_scores(self):
+        from . import outliers
+        frame = self.planted_frame()
+        index = outliers.build_index(frame)
+
+        expected = set()
+        for column in ('Flowrate', 'Pressure', 'Temperature'):
+            for _, group in frame.groupby('Type'):
+                median = group[column].median()
+                mad = (group[column] - median).abs().median()
+                scores = 0.6745 * (group[column] - median) / mad
+                expected |= {(position, column.lower()) for position in scores[scores.abs() > 3.5].index}
+        self.assertEqual({(row['row'], row['column']) for row in index['rows']}, expected)
+        self.assertEqual(index['count'], len(expected))
+        self.assertEqual(index['rows'][0]['row'], 17)
+
+    def test_endpoint_and_report_use_the_stored_index(self):
+        response = self.upload(self.planted_frame().to_csv(index=False).encode())
+        dataset = UploadedDataset.objects.get(pk=response.data['id'])
+        # Queries and reports never go back to the data.
+        get_storage().delete(dataset.file_path)
+
+        data = self.client.get(f'/api/outliers/{dataset.pk}/', {'column': 'temperature'}).data
+        self.assertIn(230, [row['row'] for row in data['results']])
+        self.assertTrue(all(row['column'] == 'temperature' for row in data['results']))
+        self.assertEqual(self.client.get(f'/api/outliers/{dataset.pk}/', {'column': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(f'/api/report/{dataset.pk}/').status_code, 200)
+
+    def test_appended_rows_are_scored_against_stored_stats(self):
+        frame = self.planted_frame()
+        dataset_id = self.upload(frame.to_csv(index=False).encode()).data['id']
+        extra = make_equipment_frame(20, n_types=4, seed=7)
+        extra.loc[3, 'Flowrate'] = 9000.0
+        self.client.post(f'/api/append/{dataset_id}/',
+                         {'file': SimpleUploadedFile('more.csv', extra.to_csv(index=False).encode())},
+                         format='multipart')
+        rows = self.client.get(f'/api/outliers/{dataset_id}/', {'column': 'flowrate'}).data['results']
+        self.assertEqual(rows[0]['row'], len(frame) + 3)
+
+
+class CorrelationTests(APITestBase):
+    def test_merged_chunk_moments_match_pandas(self):
+        import numpy as np
+        from . import correlation
+        frame = make_equipment_frame(3000, n_types=5, seed=9)
+        chunks = [frame.iloc[start:start + 700] for start in range(0, len(frame), 700)]
+        moments = correlation.moments(chunks[0])
+        for chunk in chunks[1:]:
+            moments = correlation.merge_moments(moments, correlation.moments(chunk))
+
+        columns = ['Flowrate', 'Pressure', 'Temperature']
+        covariance, matrix = correlation.matrices(moments['all'])
+        np.testing.assert_allclose(covariance, frame[columns].cov().to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(matrix, frame[columns].corr().to_numpy(), rtol=1e-9)
+        for name, group in frame.groupby('Type', observed=True):
+            _, matrix = correlation.matrices(moments['types'][str(name)])
+            np.testing.assert_allclose(matrix, group[columns].corr().to_numpy(), rtol=1e-9)
+
+    @override_settings(SCATTER_SAMPLE_SIZE=50, SCATTER_SAMPLE_TYPES=3)
+    def test_samples_stay_bounded_through_appends(self):
+        frame = make_equipment_frame(2000, n_types=6, seed=10)
+        dataset_id = self.upload(frame.to_csv(index=False).encode()).data['id']
+        extra = make_equipment_frame(1500, n_types=6, seed=11)
+        self.client.post(f'/api/append/{dataset_id}/',
+                         {'file': SimpleUploadedFile('more.csv', extra.to_csv(index=False).encode())},
+                         format='multipart')
+
+        stored = UploadedDataset.objects.get(pk=dataset_id).correlation
+        self.assertEqual(stored['moments']['all']['count'], 3500)
+        self.assertEqual(len(stored['samples']['all']['key']), 1000)
+        self.assertEqual(len(stored['samples']['types']), 3)
+        for sample in stored['samples']['types'].values():
+            self.assertEqual(len(sample['key']), 50)
+
+        data = self.client.get(f'/api/correlation/{dataset_id}/').data
+        self.assertEqual(data['count'], 3500)
+        self.assertAlmostEqual(data['correlation'][0][0], 1.0)
+        type_name = data['types'][0]['name']
+        per_type = self.client.get(f'/api/correlation/{dataset_id}/', {'type': type_name}).data
+        self.assertEqual(len(per_type['sample']['pressure']), 50)
+        self.assertEqual(self.client.get(f'/api/correlation/{dataset_id}/', {'type': 'nope'}).status_code, 404)
+        self.assertEqual(self.client.get(f'/api/report/{dataset_id}/').status_code, 200)
+
+
+class ExportTests(APITestBase):
+    @override_settings(EXPORT_CHUNK_ROWS=500)
+    def test_csv_rows_stream_in_chunks_and_match_the_cleaned_data(self):
+        from . import processing
+        frame = make_equipment_frame(1200, n_types=4, seed=12, dirty_fraction=0.05)
+        dataset_id = self.upload(frame.to_csv(index=False).encode()).data['id']
+        dataset = UploadedDataset.objects.get(pk=dataset_id)
+        expected = processing.clean_frame(processing.read_frame(dataset.file_path))
+
+        response = self.client.get(f'/api/export/{dataset_id}/csv/', {'part': 'rows'})
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)
+        exported = pd.read_csv(StringIO(b''.join(chunks).decode()))
+        self.assertEqual(len(exported), len(expected))
+        self.assertEqual(list(exported['Equipment Name']), list(expected['Equipment Name']))
+
+        types = pd.read_csv(StringIO(b''.join(
+            self.client.get(f'/api/export/{dataset_id}/csv/').streaming_content).decode()))
+        self.assertEqual(types['Rows'].sum(), len(expected))
+        group = expected[expected['Type'] == types['Type'][0]]
+        self.assertAlmostEqual(types['pressure mean'][0], group['Pressure'].mean())
+        self.assertAlmostEqual(types['pressure median'][0], group['Pressure'].median())
+
+    @override_settings(ADMISSION_CONTROL_ENABLED=True)
+    def test_admission_slot_is_held_until_the_stream_is_sent(self):
+        dataset_id = self.upload().data['id']
+        slots = admission._connection().cursor()
+        response = self.client.get(f'/api/export/{dataset_id}/csv/', {'part': 'rows'})
+        self.assertEqual(slots.execute("SELECT COUNT(*) FROM slots").fetchone()[0], 1)
+        b''.join(response.streaming_content)
+        self.assertEqual(slots.execute("SELECT COUNT(*) FROM slots").fetchone()[0], 0)
+
+        response = self.client.get(f'/api/export/{dataset_id}/csv/')
+        response.close()
+        self.assertEqual(slots.execute("SELECT COUNT(*) FROM slots").fetchone()[0], 0)
+
+    def test_xlsx_workbook_has_summary_types_and_rows(self):
+        from openpyxl import load_workbook
+        dataset_id = self.upload().data['id']
+        response = self.client.get(f'/api/export/{dataset_id}/xlsx/', {'rows': '1'})
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['Summary', 'Types', 'Rows'])
+        summary = dict(row for row in workbook['Summary'].iter_rows(values_only=True))
+        self.assertEqual(summary['Total records'], 2)
+        self.assertEqual(len(list(workbook['Rows'].iter_rows())), 3)
+        self.assertEqual(self.client.get(f'/api/export/{dataset_id}/pdf/').status_code, 400)
+
+
+class HighCardinalityReportTests(APITestBase):
+    def test_charts_keep_the_largest_types_and_fold_the_rest(self):
+        from .reports import top_types
+        distribution = {f"T{i}": i for i in range(1, 101)}
+        shown = top_types(distribution, 3)
+        self.assertEqual(list(shown), ['T100', 'T99', 'T98', 'Other (97 types)'])
+        self.assertEqual(sum(shown.values()), sum(distribution.values()))
+        self.assertEqual(top_types({'A': 2, 'B': 1}, 3), {'A': 2, 'B': 1})
+
+    @override_settings(REPORT_TABLE_TYPES=20)
+    def test_report_with_many_types(self):
+        dataset_id = self.upload(make_equipment_frame(3000, n_types=600, seed=13).to_csv(index=False).encode()).data['id']
+        response = self.client.get(f'/api/report/{dataset_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class ConsolidatedReportTests(APITestBase):
+    @override_settings(REPORT_CHART_WORKERS=1)
+    def test_report_covers_every_dataset(self):
+        from . import reports
+        for seed in range(3):
+            self.upload(make_equipment_frame(300, n_types=5, seed=20 + seed).to_csv(index=False).encode())
+        response = self.client.get('/api/report/consolidated/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIs(reports.report_styles(), reports.report_styles())
+        self.assertEqual(self.client.get('/api/report/consolidated/', {'days': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/report/consolidated/', {'days': '0'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/report/consolidated/', {'days': '36501'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/report/consolidated/', {'days': '7'}).status_code, 200)
+
+    def test_outlier_count_is_read_without_the_index(self):
+        planted = make_equipment_frame(300, n_types=3, seed=23)
+        planted.loc[5, 'Pressure'] = 9000.0
+        self.upload(planted.to_csv(index=False).encode())
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/report/consolidated/')
+        self.assertEqual(response.status_code, 200)
+        select = next(q['sql'] for q in queries.captured_queries if 'FROM "data_api_uploadeddataset"' in q['sql'])
+        # outlier_index only appears inside the JSON extraction of its count, never as a selected column.
+        self.assertIn('AS "outlier_count"', select)
+        self.assertNotRegex(select, r'"outlier_index"(, "| FROM)')
+        dataset = UploadedDataset.objects.get()
+        self.assertGreater(dataset.outlier_index['count'], 0)
+
+    def test_no_datasets(self):
+        self.assertEqual(self.client.get('/api/report/consolidated/').status_code, 404)
+
+    @override_settings(CONSOLIDATED_REPORT_MAX_DATASETS=2)
+    def test_refuses_more_datasets_than_the_limit(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        for name in ('Reactor 7', 'Reactor 8', 'Reactor 9'):
+            self.upload(SAMPLE_CSV.replace(b'Reactor 1', name.encode()))
+        self.assertEqual(self.client.get('/api/report/consolidated/').status_code, 400)
+        # Outside the default period, the oldest no longer counts.
+        oldest = UploadedDataset.objects.order_by('timestamp').first()
+        UploadedDataset.objects.filter(pk=oldest.pk).update(timestamp=timezone.now() - timedelta(days=60))
+        self.assertEqual(self.client.get('/api/report/consolidated/').status_code, 200)
+        self.assertEqual(self.client.get('/api/report/consolidated/', {'days': '90'}).status_code, 400)
+
+    @override_settings(REPORT_CHART_WORKERS=2)
+    def test_charts_render_in_the_process_pool(self):
+        from .executor import get_chart_pool
+        from .reports import render_charts
+        jobs = [('averages', {'flowrate': 1.0, 'pressure': 2.0, 'temperature': 3.0}, "A"),
+                ('bar', {'Pump': 3, 'Valve': 1}, "B")]
+        self.assertIsNotNone(get_chart_pool())
+        images = render_charts(jobs)
+        self.assertEqual(len(images), 2)
+        self.assertTrue(all(image.startswith(b'\x89PNG') for image in images))
+
+
+class IngestDirectoryTests(APITestBase):
+    def write(self, relative, content):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(content)
+
+    def ingest(self):
+        out = StringIO()
+        call_command('ingest_directory', self.root, user='engineer', workers=1, batch_size=2, stdout=out)
+        return out.getvalue()
+
+    def test_ingests_tree_in_batches_and_resumes(self):
+        from .models import UserRollup
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        for number in range(3):
+            frame = make_equipment_frame(200, n_types=4, seed=30 + number)
+            self.write(f"{2020 + number}/plant.csv", frame.to_csv(index=False).encode())
+        self.write("2022/copy-of-plant.csv", make_equipment_frame(200, n_types=4, seed=30).to_csv(index=False).encode())
+        self.write("broken.csv", b"Name,Value\nx,1\n")
+
+        output = self.ingest()
+        self.assertIn("Ingested 3 file(s), 600 rows", output)
+        self.assertIn("1 duplicate(s) skipped, 1 failed", output)
+        datasets = UploadedDataset.objects.filter(user=self.user)
+        self.assertEqual(datasets.count(), 3)
+        self.assertTrue(all(dataset.correlation and dataset.outlier_index for dataset in datasets))
+        rollup = UserRollup.objects.get(user=self.user)
+        self.assertEqual((rollup.dataset_count, rollup.aggregates['count']), (3, 600))
+
+        # Finished files are skipped on the next run; the broken one is retried.
+        self.assertIn("1 file(s) to ingest, 4 already done", self.ingest())
+        self.assertEqual(datasets.count(), 3)
+
+    def test_uploads_never_prune_ingested_datasets(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        for number in range(6):
+            self.write(f"plant-{number}.csv", make_equipment_frame(50, seed=40 + number).to_csv(index=False).encode())
+        self.ingest()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            uploads = [self.upload(SAMPLE_CSV.replace(b'Reactor 1', f'Reactor {n}'.encode())).data['id']
+                       for n in range(7)]
+
+        datasets = UploadedDataset.objects.filter(user=self.user)
+        self.assertEqual(datasets.filter(archived=True).count(), 6)
+        self.assertEqual(datasets.filter(archived=False).count(), 5)
+        self.assertFalse(datasets.filter(pk__in=uploads[:2]).exists())
+        # The pruned datasets' stored files are removed with them.
+        kept = set(datasets.values_list('file_path', flat=True)) | set(datasets.values_list('rejected_path', flat=True))
+        stored = {os.path.join(directory, name) for directory, _, names in os.walk(settings.MEDIA_ROOT) for name in names}
+        self.assertEqual(stored - kept, set())
+
+    def test_history_lists_uploads_not_ingested_datasets(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        uploads = [self.upload(SAMPLE_CSV.replace(b'Reactor 1', f'Reactor {n}'.encode())).data['id'] for n in range(2)]
+        for number in range(6):
+            self.write(f"plant-{number}.csv", make_equipment_frame(50, seed=50 + number).to_csv(index=False).encode())
+        self.ingest()
+
+        history = self.client.get('/api/history/').data
+        self.assertEqual(sorted(dataset['id'] for dataset in history), sorted(uploads))
+
+
+class TimeSeriesTests(APITestBase):
+    def sensor_frame(self, minutes=600):
+        import numpy as np
+        rng = np.random.default_rng(8)
+        times = pd.date_range('2024-03-01', periods=minutes, freq='1min')
+        frames = []
+        for name, base in (('P-1', 100.0), ('P-2', 200.0)):
+            frames.append(pd.DataFrame({
+                'Timestamp': times.strftime('%Y-%m-%d %H:%M:%S'), 'Equipment Name': name, 'Type': 'Pump',
+                'Flowrate': 50.0, 'Pressure': base + rng.normal(0, 1, minutes).round(3), 'Temperature': 80.0,
+            }))
+        frame = pd.concat(frames, ignore_index=True)
+        frame.loc[frame.index[(frame['Equipment Name'] == 'P-1')][321], 'Pressure'] = 500.0
+        # Uploads are not in time order.
+        return frame.sample(frac=1, random_state=1)
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        import numpy as np
+        from . import timeseries
+        x = np.arange(10000, dtype=float)
+        y = np.sin(x / 500)
+        y[4321] = 10.0
+        picked = timeseries.lttb(x, y, 200)
+        self.assertEqual(len(picked), 200)
+        self.assertEqual((picked[0], picked[-1]), (0, 9999))
+        self.assertIn(4321, picked)
+        self.assertTrue((np.diff(picked) > 0).all())
+        self.assertEqual(list(timeseries.lttb(x[:50], y[:50], 200)), list(range(50)))
+
+    def test_series_are_time_ordered_resampled_and_downsampled(self):
+        frame = self.sensor_frame()
+        dataset_id = self.upload(frame.to_csv(index=False).encode()).data['id']
+        summary = self.client.get(f'/api/summary/{dataset_id}/').data
+        self.assertEqual(summary['time_series']['column'], 'Timestamp')
+        self.assertEqual(summary['time_series']['rows'], len(frame))
+        self.assertTrue(summary['time_series']['start'].startswith('2024-03-01T00:00:00'))
+
+        url = f'/api/timeseries/{dataset_id}/'
+        data = self.client.get(url, {'column': 'pressure', 'equipment': 'P-2', 'points': 5000}).data
+        expected = frame[frame['Equipment Name'] == 'P-2'].sort_values('Timestamp')['Pressure']
+        self.assertEqual(data['y'], list(expected))
+        self.assertEqual(data['x'], sorted(data['x']))
+
+        data = self.client.get(url, {'equipment': 'P-1', 'points': 60, 'window': '30min'}).data
+        self.assertEqual((data['source_points'], data['points']), (600, 60))
+        self.assertIn(500.0, data['y'])
+        self.assertEqual(len(data['rolling_mean']), 60)
+
+        data = self.client.get(url, {'equipment': 'P-1', 'resample': '1h'}).data
+        hourly = (frame[frame['Equipment Name'] == 'P-1']
+                  .assign(t=lambda f: pd.to_datetime(f['Timestamp'])).set_index('t')['Pressure']
+                  .resample('1h').mean())
+        self.assertEqual(data['points'], 10)
+        for value, expected_value in zip(data['y'], hourly):
+            self.assertAlmostEqual(value, expected_value)
+        self.assertEqual(data['max'][5], 500.0)
+
+        self.assertEqual(self.client.get(url, {'resample': 'bogus'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'equipment': 'nope'}).status_code, 404)
+
+    def test_datasets_without_time_column(self):
+        dataset_id = self.upload().data['id']
+        self.assertIsNone(self.client.get(f'/api/summary/{dataset_id}/').data['time_series'])
+        self.assertEqual(self.client.get(f'/api/timeseries/{dataset_id}/').status_code, 400)
+
+
+class RollupTests(APITestBase):
+    def frame_csv(self, rows, seed):
+        return make_equipment_frame(rows, n_types=4, seed=seed).to_csv(index=False).encode()
+
+    def assertRollupMatches(self, frames):
+        combined = pd.concat(frames)
+        data = self.client.get('/api/rollup/').data
+        self.assertEqual(data['datasets'], len(frames))
+        self.assertEqual(data['records'], len(combined))
+        self.assertEqual(data['type_distribution'], combined['Type'].value_counts().to_dict())
+        for column in ('Flowrate', 'Pressure', 'Temperature'):
+            stats = data['stats'][column.lower()]
+            self.assertAlmostEqual(stats['mean'], combined[column].mean(), places=6)
+            self.assertAlmostEqual(stats['std'], combined[column].std(), places=6)
+            self.assertEqual(stats['min'], combined[column].min())
+            self.assertEqual(stats['max'], combined[column].max())
+
+    def test_rollup_follows_uploads_deletes_and_retention(self):
+        frames = {}
+        for seed in range(6):
+            content = self.frame_csv(50 + seed, seed)
+            frames[self.upload(content).data['id']] = pd.read_csv(StringIO(content.decode()))
+        # The sixth upload pruned the oldest dataset.
+        del frames[min(frames)]
+        self.assertRollupMatches(list(frames.values()))
+
+        extreme_id = max(frames, key=lambda pk: frames[pk]['Temperature'].max())
+        self.client.delete(f'/api/history/{extreme_id}/')
+        del frames[extreme_id]
+        self.assertRollupMatches(list(frames.values()))
+
+    def test_rollup_read_is_one_query(self):
+        self.upload()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/rollup/')
+        self.assertEqual(len(queries), 1)
+
+    def test_append_rows_merges_summary_and_rollup(self):
+        first = self.frame_csv(40, seed=1)
+        dataset_id = self.upload(first).data['id']
+        # Includes a row whose numbers do not parse; it is stored but not counted.
+        extra = self.frame_csv(25, seed=2) + b"P-X,Pump,n/a,1.0,2.0\n"
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(f'/api/append/{dataset_id}/', {'file': SimpleUploadedFile('more.csv', extra)},
+                                        format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['appended_records'], 25)
+        # The stored file is only written once the transaction has committed.
+        self.assertEqual(self.client.get(f'/api/rows/{dataset_id}/').data['count'], 40)
+        for callback in callbacks:
+            callback()
+
+        frames = [pd.read_csv(StringIO(first.decode())), pd.read_csv(StringIO(self.frame_csv(25, seed=2).decode()))]
+        combined = pd.concat(frames)
+        summary = self.client.get(f'/api/summary/{dataset_id}/').data
+        self.assertEqual(summary['records'], 65)
+        self.assertAlmostEqual(summary['averages']['pressure'], combined['Pressure'].mean(), places=6)
+        self.assertEqual(self.client.get(f'/api/rows/{dataset_id}/').data['count'], 65)
+        dataset = UploadedDataset.objects.get(pk=dataset_id)
+        with get_storage().open(dataset.file_path) as fh:
+            self.assertEqual(dataset.file_size, len(fh.read()))
+        data = self.client.get('/api/rollup/').data
+        self.assertEqual(data['datasets'], 1)
+        self.assertRollupMatches([combined])
+
+    def test_append_rows_requires_columns(self):
+        dataset_id = self.upload().data['id']
+        response = self.client.post(f'/api/append/{dataset_id}/',
+                                    {'file': SimpleUploadedFile('more.csv', b"Equipment Name,Flowrate\nP-1,2.0\n")},
+                                    format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Type', response.data['missing'])
@@ -0,0 +1,146 @@
+"""
+Time-series mode for datasets that carry a timestamp column.
+
+A column whose stripped, lower-cased name is one of TIME_COLUMN_NAMES is
+detected from the header at upload and kept through column pruning. The upload
+records its name and time range in summary_data["time_series"]. The raw file
+stays in upload order, and series requests read a cached copy of the dataset
+sorted by time (load_series_frame).
+
+series() builds one chart series, for the whole dataset or one equipment:
+
+* the raw readings, or their per-bucket mean/min/max when a pandas resample
+  rule ('15min', '1h', '1D', ...) is given
+* optionally a time-based rolling mean over the same points
+* downsampled with Largest-Triangle-Three-Buckets to at most `points` points.
+  LTTB picks real points that keep the visual shape (peaks included), so the
+  rolling/min/max arrays are taken at the same positions.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+TIME_COLUMN_NAMES = ['timestamp', 'time', 'datetime', 'date', 'date time', 'recorded at']
+DEFAULT_POINTS = 2000
+MAX_POINTS = 20000
+
+
+def detect_time_column(columns):
+    """The first column (as named in `columns`) that holds timestamps, or None."""
+    by_name = {str(name).strip().lower(): name for name in columns}
+    for candidate in TIME_COLUMN_NAMES:
+        if candidate in by_name:
+            return by_name[candidate]
+    return None
+
+
+def parse_times(values):
+    """Timestamps as UTC datetimes; unparseable values become NaT."""
+    return pd.to_datetime(values, errors='coerce', utc=True)
+
+
+def describe(df, column):
+    """The summary_data["time_series"] entry for a cleaned frame with time column `column`."""
+    times = parse_times(df[column])
+    valid = times.notna()
+    count = int(valid.sum())
+    return {
+        "column": column,
+        "rows": count,
+        "start": times.min().isoformat() if count else None,
+        "end": times.max().isoformat() if count else None,
+    }
+
+
+def merge_descriptions(a, b):
+    """Combine the time_series entries of a dataset and rows appended to it."""
+    starts = [value for value in (a.get("start"), b.get("start")) if value]
+    ends = [value for value in (a.get("end"), b.get("end")) if value]
+    return {
+        "column": a["column"],
+        "rows": a["rows"] + b["rows"],
+        # ISO-8601 UTC strings sort chronologically.
+        "start": min(starts) if starts else None,
+        "end": max(ends) if ends else None,
+    }
+
+
+@lru_cache(maxsize=2)
+def load_series_frame(file_path, mtime, column):
+    """
+    The cleaned dataset with parsed times, rows without a valid time dropped,
+    sorted by time. Returns (frame, {equipment name: row positions}); the
+    positions of each equipment are in time order too.
+    """
+    from .processing import clean_frame, read_frame
+
+    df = clean_frame(read_frame(file_path))
+    times = parse_times(df[column])
+    keep = times.notna().to_numpy()
+    frame = df.loc[keep, ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']]
+    frame.insert(0, 'time', times[keep])
+    frame = frame.sort_values('time', kind='stable').reset_index(drop=True)
+    groups = frame.groupby(frame['Equipment Name'].astype(str), sort=False).indices
+    return frame, groups
+
+
+def lttb(x, y, threshold):
+    """
+    Positions of the `threshold` points of (x, y) chosen by Largest-Triangle-
+    Three-Buckets. x must be increasing. Returns every position when the series
+    is already small enough.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    # Buckets of (n - 2) / (threshold - 2) points between the fixed first and last point.
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        px, py = x[previous], y[previous]
+        # Twice the area of the triangle (previous point, candidate, next bucket's average).
+        areas = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def series(frame, groups, column, equipment=None, resample=None, window=None, points=DEFAULT_POINTS):
+    """
+    Chart series for `column` (e.g. 'Pressure'). Raises KeyError for an unknown
+    equipment and ValueError for an invalid resample rule or rolling window.
+    """
+    data = frame if equipment is None else frame.iloc[groups[equipment]]
+    values = pd.Series(data[column].to_numpy(dtype=float), index=pd.DatetimeIndex(data['time']))
+
+    extra = {}
+    if resample:
+        buckets = values.resample(resample).agg(['mean', 'min', 'max']).dropna()
+        values = buckets['mean']
+        extra = {"min": buckets['min'], "max": buckets['max']}
+    if window:
+        extra["rolling_mean"] = values.rolling(window).mean()
+
+    source_points = len(values)
+    x = (values.index.asi8 - values.index.asi8[0]) / 1e9 if source_points else np.empty(0)
+    picked = lttb(x, values.to_numpy(), points)
+
+    result = {
+        "source_points": source_points,
+        "points": len(picked),
+        "x": [stamp.isoformat() for stamp in values.index[picked]],
+        "y": values.to_numpy()[picked].tolist(),
+    }
+    for name, extra_values in extra.items():
+        picked_values = extra_values.to_numpy()[picked]
+        result[name] = [None if np.isnan(value) else float(value) for value in picked_values]
+    return result
@@ -0,0 +1,84 @@
+"""
+Per-request phase timing.
+
+Views wrap their expensive steps in ``self.timer.phase('name')``. When
+REQUEST_TIMING_ENABLED is on, the durations are sent back in a
+``Server-Timing`` header and logged as one JSON line per request; when it
+is off every view shares a no-op timer, so instrumentation costs a method
+call and nothing else.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+
+logger = logging.getLogger('data_api.timing')
+
+
+class PhaseTimer:
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Repeated phases (e.g. one per chart) accumulate.
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def header_value(self, total_ms):
+        parts = [f"{name};dur={duration:.1f}" for name, duration in self.phases.items()]
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ', '.join(parts)
+
+    def finish(self, request, response, view_name):
+        total_ms = self.total_ms()
+        response['Server-Timing'] = self.header_value(total_ms)
+        logger.info(json.dumps({
+            'event': 'request_timing',
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user_id': getattr(request.user, 'id', None),
+            'total_ms': round(total_ms, 1),
+            'phases_ms': {name: round(duration, 1) for name, duration in self.phases.items()},
+        }))
+
+
+class NullTimer:
+    enabled = False
+    _null = nullcontext()
+
+    def phase(self, name):
+        return self._null
+
+    def finish(self, request, response, view_name):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class PhaseTimingMixin:
+    """APIView mixin that creates ``self.timer`` per request and reports it on the response."""
+    timer = NULL_TIMER
+
+    def initial(self, request, *args, **kwargs):
+        self.timer = PhaseTimer() if settings.REQUEST_TIMING_ENABLED else NULL_TIMER
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        self.timer.finish(request, response, type(self).__name__)
+        return response
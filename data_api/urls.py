@@ -1,5 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from .views import HistoryListView, CSVUploadView, SummaryView, PDFReportView, RegisterView
+from .views import HistoryListView, CSVUploadView, SummaryView, PDFReportView, RegisterView, DatasetRowsView, MetricsView, RollupView, AppendRowsView
+from .views import RejectedRowsView, OutliersView, TimeSeriesView, CorrelationView, ExportView, ConsolidatedReportView
+
+if settings.ASYNC_VIEWS_ENABLED:
+    from .async_views import (
+        AsyncHistoryListView as HistoryListView,
+        AsyncCSVUploadView as CSVUploadView,
+        AsyncSummaryView as SummaryView,
+        AsyncDatasetRowsView as DatasetRowsView,
+        AsyncPDFReportView as PDFReportView,
+    )
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='user-register'),
@@ -9,13 +20,43 @@ urlpatterns = [
     # POST: Handle file upload and data processing
     path('upload/', CSVUploadView.as_view(), name='data-upload'),
     
+    # GET: Downsampled time series of one parameter (datasets with a time column)
+    path('timeseries/<int:pk>/', TimeSeriesView.as_view(), name='dataset-timeseries'),
+
+    # GET: Outliers flagged within each equipment type (from the stored index)
+    path('outliers/<int:pk>/', OutliersView.as_view(), name='dataset-outliers'),
+
+    # GET: Covariance/correlation matrices and scatter sample, overall or per type
+    path('correlation/<int:pk>/', CorrelationView.as_view(), name='dataset-correlation'),
+
+    # GET: Download the rows dropped by validation
+    path('rejected/<int:pk>/', RejectedRowsView.as_view(), name='dataset-rejected'),
+
+    # POST: Append the rows of another file to an existing dataset
+    path('append/<int:pk>/', AppendRowsView.as_view(), name='data-append'),
+
     # GET: Retrieve summary data for a specific dataset (supports both URL param and query param)
     path('summary/<int:pk>/', SummaryView.as_view(), name='data-summary-pk'),
     path('summary/', SummaryView.as_view(), name='data-summary'),
 
+    # GET: Page through the cleaned rows of a dataset (offset, limit, ordering, search)
+    path('rows/<int:pk>/', DatasetRowsView.as_view(), name='data-rows'),
+
     # GET: Generate a PDF report for a specific dataset (supports both URL param and query param)
     path('report/<int:pk>/', PDFReportView.as_view(), name='data-report-pk'),
     path('report/', PDFReportView.as_view(), name='data-report'),
+
+    # GET: One PDF covering all of the user's datasets, with trends across uploads
+    path('report/consolidated/', ConsolidatedReportView.as_view(), name='data-report-consolidated'),
+    
+    # GET: Stream the statistics (and optionally the cleaned rows) as XLSX or CSV
+    path('export/<int:pk>/<str:export_format>/', ExportView.as_view(), name='data-export'),
+
+    # GET: Statistics across all of the user's datasets
+    path('rollup/', RollupView.as_view(), name='data-rollup'),
+
+    # GET: Prometheus metrics merged across all workers
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     
     # DELETE: Delete a specific dataset
     path('history/<int:pk>/', HistoryListView.as_view(), name='data-history-delete'),
@@ -1,32 +1,28 @@
-import os
-import pandas as pd
+import time
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import UploadedDataset
-from .serializers import UploadedDatasetSerializer
-from django.db import IntegrityError
-from django.http import HttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from .models import UploadedDataset, UserRollup
+from . import aggregates
+from .serializers import UploadedDatasetSerializer, UploadedDatasetListSerializer
+from .timing import PhaseTimingMixin
+from .admission import AdmissionControlMixin
+from .storage import get_storage
+from . import metrics
+from .metrics import RequestMetricsMixin
+from django.db import transaction
+from django.db.models import F
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.contrib.auth.models import User
 
-# --- ReportLab Imports for PDF Generation ---
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-
-# --- Matplotlib Imports for Chart Generation ---
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from io import BytesIO
-import base64
+# pandas, Matplotlib and ReportLab are imported on first use by the views that
+# need them (`from . import processing` / `from . import reports`), so workers
+# that only serve history or auth never pay for them. See data_api.warmup.
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
@@ -74,28 +70,55 @@ class RegisterView(APIView):
             )
 
 
-class HistoryListView(ListAPIView):
-    serializer_class = UploadedDatasetSerializer
+class HistoryListView(RequestMetricsMixin, ListAPIView):
+    serializer_class = UploadedDatasetListSerializer
     permission_classes = [IsAuthenticated]
 
+    # Query params min_<name>/max_<name> filter on these typed summary columns
+    STAT_FILTERS = {
+        'records': 'record_count',
+        'avg_flowrate': 'avg_flowrate',
+        'avg_pressure': 'avg_pressure',
+        'avg_temperature': 'avg_temperature',
+        'file_size': 'file_size',
+    }
+
     def get_queryset(self):
-        return UploadedDataset.objects.filter(user=self.request.user)[:5]
+        return self.history_queryset(self.request.user, self.request.GET)
+
+    @classmethod
+    def history_queryset(cls, user, params):
+        queryset = (
+            # Archived (ingested) datasets would crowd the user's own uploads out of the history.
+            UploadedDataset.objects.filter(user=user, archived=False)
+            .select_related('user')
+            .only(*UploadedDatasetListSerializer.MODEL_FIELDS)
+        )
+        for name, field in cls.STAT_FILTERS.items():
+            for prefix, lookup in (('min_', 'gte'), ('max_', 'lte')):
+                value = params.get(prefix + name)
+                if value in (None, ''):
+                    continue
+                try:
+                    queryset = queryset.filter(**{f"{field}__{lookup}": float(value)})
+                except ValueError:
+                    raise ValidationError({prefix + name: "Must be a number."})
+        return queryset[:5]
     
     def delete(self, request, pk, *args, **kwargs):
         dataset = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
         
-        if dataset.file_path and os.path.exists(dataset.file_path):
-            try:
-                os.remove(dataset.file_path)
-            except OSError:
-                pass
+        storage = get_storage()
+        storage.delete(dataset.file_path)
+        storage.delete(dataset.rejected_path)
         
         dataset.delete()
         return Response({"message": "Dataset deleted successfully"}, status=status.HTTP_200_OK)
 
 
-class CSVUploadView(APIView):
+class CSVUploadView(RequestMetricsMixin, PhaseTimingMixin, AdmissionControlMixin, APIView):
     permission_classes = [IsAuthenticated]
+    admission_scope = 'upload'
     
     REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
 
@@ -108,77 +131,177 @@ class CSVUploadView(APIView):
         if not uploaded_file.name.endswith(('.csv', '.xlsx')):
              return Response({"error": "Unsupported file format. Please upload a CSV or Excel file."}, status=status.HTTP_400_BAD_REQUEST)
 
-        filename = f"{request.user.id}_{uploaded_file.name}"
-        file_path = os.path.join(settings.MEDIA_ROOT, filename)
+        from . import processing
 
+        storage = get_storage()
+        file_path = None
+        rejected_path = ''
+        timer = self.timer
         try:
-            with open(file_path, 'wb+') as destination:
-                for chunk in uploaded_file.chunks():
-                    destination.write(chunk)
+            with timer.phase('save'):
+                stored = storage.save(uploaded_file.chunks(), uploaded_file.name)
+                file_path = stored.path
             
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            elif uploaded_file.name.endswith('.xlsx'):
-                df = pd.read_excel(file_path)
-            else:
-                return Response({"error": "Invalid file format."}, status=status.HTTP_400_BAD_REQUEST)
-
-            df.columns = df.columns.str.strip()
-
-            if not all(col in df.columns for col in self.REQUIRED_COLUMNS):
-                missing_cols = [col for col in self.REQUIRED_COLUMNS if col not in df.columns]
-                os.remove(file_path) 
-                return Response(
-                    {"error": "Missing required columns in the dataset.", "missing": missing_cols},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            with timer.phase('parse'):
+                df = processing.read_frame(file_path)
 
-            numeric_cols = ['Flowrate', 'Pressure', 'Temperature']
-            for col in numeric_cols:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                df.dropna(subset=[col], inplace=True)
+            with timer.phase('validate'):
+                validation = processing.validate_frame(df)
+                df = validation.frame
 
-            total_count = len(df)
-            
-            avg_flowrate = float(df['Flowrate'].mean()) if total_count > 0 else 0.0
-            avg_pressure = float(df['Pressure'].mean()) if total_count > 0 else 0.0
-            avg_temperature = float(df['Temperature'].mean()) if total_count > 0 else 0.0
-            
-            type_distribution = df['Type'].value_counts().to_dict()
-
-            summary_data = {
-                "total_records": total_count,
-                "averages": {
-                    "flowrate": avg_flowrate,
-                    "pressure": avg_pressure,
-                    "temperature": avg_temperature
-                },
-                "type_distribution": type_distribution,
-                "data_preview": df.head(5).to_dict('records')
-            }
+            with timer.phase('save'):
+                rejected_path = processing.save_rejected(validation.rejected, uploaded_file.name)
+
+            with timer.phase('aggregate'):
+                summary_data = processing.summarize(df, validation.counts)
+                total_count = summary_data['total_records']
+
+            with timer.phase('outliers'):
+                outlier_index = processing.outliers.build_index(df)
+
+            with timer.phase('correlation'):
+                correlation = processing.correlation.build(df)
             
-            dataset = UploadedDataset.objects.create(
-                user=request.user,
-                name=uploaded_file.name,
-                summary_data=summary_data,
-                file_path=file_path
-            )
+            with timer.phase('db'):
+                dataset = UploadedDataset(
+                    user=request.user,
+                    name=uploaded_file.name,
+                    summary_data=summary_data,
+                    file_path=file_path,
+                    file_size=uploaded_file.size,
+                    content_hash=stored.sha256,
+                    rejected_path=rejected_path,
+                    outlier_index=outlier_index,
+                    correlation=correlation
+                )
+                dataset.sync_summary_fields()
+                dataset.save()
             
-            serializer = UploadedDatasetSerializer(dataset)
+            with timer.phase('serialize'):
+                serializer = UploadedDatasetSerializer(dataset)
+                data = serializer.data
+
+            metrics.UPLOAD_BYTES.inc(uploaded_file.size)
+            metrics.UPLOAD_ROWS.inc(total_count)
             
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(data, status=status.HTTP_201_CREATED)
 
-        except pd.errors.EmptyDataError:
-            os.remove(file_path) 
+        except processing.MissingColumnsError as e:
+            # Raised from the header check in read_frame() for CSV files, from clean_frame() for XLSX.
+            storage.delete(file_path)
+            return Response(
+                {"error": "Missing required columns in the dataset.", "missing": e.missing},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except processing.EmptyDataError:
+            storage.delete(file_path)
             return Response({"error": "The uploaded file is empty or corrupted."}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            if os.path.exists(file_path):
-                 os.remove(file_path)
+            storage.delete(file_path)
+            storage.delete(rejected_path)
             return Response({"error": f"An unexpected error occurred during processing: {str(e)}"}, 
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class SummaryView(APIView):
+class AppendRowsView(RequestMetricsMixin, PhaseTimingMixin, AdmissionControlMixin, APIView):
+    """
+    Appends the rows of an uploaded CSV/XLSX file to an existing CSV dataset.
+    Only the new rows are parsed: their aggregates are merged into summary_data
+    and the user's rollup, and they are appended to the stored file.
+    """
+    permission_classes = [IsAuthenticated]
+    admission_scope = 'upload'
+
+    def post(self, request, pk, *args, **kwargs):
+        if 'file' not in request.FILES:
+            return Response({"error": "No file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        uploaded_file = request.FILES['file']
+
+        if not uploaded_file.name.endswith(('.csv', '.xlsx')):
+             return Response({"error": "Unsupported file format. Please upload a CSV or Excel file."}, status=status.HTTP_400_BAD_REQUEST)
+
+        from . import processing, rollups
+        from .storage import is_excel
+
+        storage = get_storage()
+        timer = self.timer
+        with transaction.atomic():
+            with timer.phase('db'):
+                dataset = get_object_or_404(UploadedDataset.objects.select_for_update(), pk=pk, user=request.user)
+
+            if is_excel(dataset.file_path) or not storage.exists(dataset.file_path):
+                return Response({"error": "Rows can only be appended to datasets stored as CSV."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                with timer.phase('parse'):
+                    raw = processing.read_upload(uploaded_file)
+                    raw.columns = raw.columns.str.strip()
+                    header = processing.stored_header(dataset.file_path)
+
+                with timer.phase('validate'):
+                    validation = processing.validate_frame(raw.copy())
+            except processing.MissingColumnsError as e:
+                return Response(
+                    {"error": "Missing required columns in the dataset.", "missing": e.missing},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except processing.EmptyDataError:
+                return Response({"error": "The uploaded file is empty or corrupted."}, status=status.HTTP_400_BAD_REQUEST)
+
+            with timer.phase('aggregate'):
+                previous_records = dataset.summary_data.get('total_records', 0)
+                summary_data, part = processing.append_summary(
+                    dataset.summary_data, validation.frame, validation.counts
+                )
+
+            with timer.phase('outliers'):
+                outlier_index = processing.outliers.extend_index(
+                    dataset.outlier_index, validation.frame, previous_records
+                )
+
+            with timer.phase('correlation'):
+                correlation = processing.correlation.extend(dataset.correlation, validation.frame)
+
+            with timer.phase('save'):
+                # Raw rows (bad values included) in the stored file's column order, as for an upload.
+                # The leading newline guards against a stored file without a trailing one;
+                # pandas skips the blank line.
+                rows = raw.reindex(columns=[name.strip() for name in header]).to_csv(header=False, index=False)
+                appended = b"\n" + rows.encode()
+                dataset.rejected_path = processing.append_rejected(
+                    dataset.rejected_path, validation.rejected, dataset.name
+                )
+
+            with timer.phase('db'):
+                dataset.summary_data = summary_data
+                dataset.sync_summary_fields()
+                # What is added to the stored file, which is not the upload (header, column order).
+                dataset.file_size += len(appended)
+                dataset.content_hash = ''
+                dataset.outlier_index = outlier_index
+                dataset.correlation = correlation
+                dataset.save(update_fields=[
+                    'summary_data', 'record_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature',
+                    'file_size', 'content_hash', 'rejected_path', 'outlier_index', 'correlation',
+                ])
+                rollups.add(dataset.user_id, part, datasets=0)
+
+            # The stored file gets the rows only once the summary that counts them is committed,
+            # so a failed save never leaves rows in the file that summary_data does not include.
+            transaction.on_commit(lambda: storage.append(dataset.file_path, [appended]))
+
+        metrics.UPLOAD_BYTES.inc(uploaded_file.size)
+        metrics.UPLOAD_ROWS.inc(part['count'])
+
+        with timer.phase('serialize'):
+            data = UploadedDatasetSerializer(dataset).data
+        data['appended_records'] = part['count']
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SummaryView(RequestMetricsMixin, PhaseTimingMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk=None, *args, **kwargs):
@@ -187,11 +310,22 @@ class SummaryView(APIView):
         if not dataset_id:
             return Response({"error": "Dataset ID is required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        dataset = get_object_or_404(UploadedDataset, pk=dataset_id, user=request.user)
+        with self.timer.phase('db'):
+            # The outlier index and correlation data are served by their own endpoints.
+            dataset = get_object_or_404(
+                UploadedDataset.objects.defer('outlier_index', 'correlation'), pk=dataset_id, user=request.user
+            )
         
         summary = dataset.summary_data
         
-        response_data = {
+        with self.timer.phase('serialize'):
+            response_data = self.build_response(summary)
+        
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def build_response(summary):
+        return {
             "records": summary.get("total_records", 0),
             "categories": list(summary.get("type_distribution", {}).keys()),
             "bar": {
@@ -204,224 +338,365 @@ class SummaryView(APIView):
                 "counts": list(summary.get("type_distribution", {}).values())
             },
             "averages": summary.get("averages", {}),
-            "data_preview": summary.get("data_preview", [])
+            "data_preview": summary.get("data_preview", []),
+            "time_series": summary.get("time_series")
         }
-        
-        return Response(response_data, status=status.HTTP_200_OK)
 
 
-class PDFReportView(APIView):
+class DatasetRowsView(APIView):
+    """
+    Pages through the cleaned rows of a stored dataset.
+    Query params: offset, limit, ordering (column name, '-' prefix for descending), search.
+    """
     permission_classes = [IsAuthenticated]
-    
-    def create_bar_chart(self, distribution_data, title="Equipment Type Distribution"):
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=(8, 5))
-        fig.patch.set_facecolor('white')
-        
-        if not distribution_data:
-            ax.text(0.5, 0.5, 'No data available', ha='center', va='center', 
-                   transform=ax.transAxes, fontsize=14, color='gray')
-            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        else:
-            sorted_items = sorted(distribution_data.items(), key=lambda x: x[1], reverse=True)
-            labels, values = zip(*sorted_items) if sorted_items else ([], [])
-            
-            bars = ax.bar(labels, values, color=['#2563eb', '#7c3aed', '#dc2626', '#059669', '#d97706', '#0891b2', '#be185d'])
-            
-            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-            ax.set_xlabel('Equipment Type', fontsize=12, fontweight='bold')
-            ax.set_ylabel('Count', fontsize=12, fontweight='bold')
-            
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.05,
-                       f'{int(height)}', ha='center', va='bottom', fontweight='bold')
-            
-            plt.xticks(rotation=45, ha='right')
-            
-        plt.tight_layout()
-        
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
-    
-    def create_pie_chart(self, distribution_data, title="Equipment Type Distribution"):
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=(7, 7))
-        fig.patch.set_facecolor('white')
-        
-        if not distribution_data:
-            ax.text(0.5, 0.5, 'No data available', ha='center', va='center', 
-                   transform=ax.transAxes, fontsize=14, color='gray')
-            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        else:
-            labels = list(distribution_data.keys())
-            sizes = list(distribution_data.values())
-            
-            colors_palette = ['#2563eb', '#7c3aed', '#dc2626', '#059669', '#d97706', '#0891b2', '#be185d', '#6366f1']
-            
-            wedges, texts, autotexts = ax.pie(sizes, labels=labels, autopct='%1.1f%%', 
-                                            colors=colors_palette[:len(labels)],
-                                            startangle=90, textprops={'fontsize': 10})
-            
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-            
-            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-        
-        plt.tight_layout()
-        
-        # Save to BytesIO
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
-    
-    def create_averages_chart(self, averages_data, title="Parameter Averages"):
-        plt.style.use('default')
-        fig, ax = plt.subplots(figsize=(8, 4))
-        fig.patch.set_facecolor('white')
-        
-        if not averages_data:
-            ax.text(0.5, 0.5, 'No data available', ha='center', va='center', 
-                   transform=ax.transAxes, fontsize=14, color='gray')
-            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+
+    MAX_LIMIT = 1000
+
+    def get(self, request, pk, *args, **kwargs):
+        dataset = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
+
+        storage = get_storage()
+        if not storage.exists(dataset.file_path):
+            return Response({"error": "The dataset file is no longer available."}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            offset = max(int(request.GET.get('offset', 0)), 0)
+            limit = min(max(int(request.GET.get('limit', 100)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "offset and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ordering = request.GET.get('ordering', '')
+        if ordering and ordering.lstrip('-') not in CSVUploadView.REQUIRED_COLUMNS:
+            return Response({"error": f"Cannot order by '{ordering}'."}, status=status.HTTP_400_BAD_REQUEST)
+        search = request.GET.get('search', '').strip()
+
+        from . import processing
+
+        mtime = storage.modified_time(dataset.file_path)
+        hits = processing.load_rows_frame.cache_info().hits
+        df = processing.load_rows_frame(dataset.file_path, mtime)
+        metrics.record_cache_lookup('rows_frame', processing.load_rows_frame.cache_info().hits > hits)
+        hits = processing.ordered_row_positions.cache_info().hits
+        positions = processing.ordered_row_positions(dataset.file_path, mtime, ordering, search)
+        metrics.record_cache_lookup('row_positions', processing.ordered_row_positions.cache_info().hits > hits)
+        page = df.iloc[positions[offset:offset + limit]]
+
+        return Response({
+            "count": len(positions),
+            "offset": offset,
+            "columns": CSVUploadView.REQUIRED_COLUMNS,
+            "results": processing.records(page),
+        }, status=status.HTTP_200_OK)
+
+
+class TimeSeriesView(RequestMetricsMixin, PhaseTimingMixin, APIView):
+    """
+    Chart series of one parameter over time, for datasets with a time column.
+    Query params: column (flowrate/pressure/temperature), equipment (default:
+    every row), resample (pandas rule, e.g. '1h'), window (rolling mean,
+    e.g. '6h') and points (LTTB target, default 2000).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, *args, **kwargs):
+        from . import timeseries
+
+        column = request.GET.get('column', 'pressure').lower()
+        if column not in aggregates.COLUMNS:
+            return Response({"error": f"Unknown column '{column}'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            points = min(max(int(request.GET.get('points', timeseries.DEFAULT_POINTS)), 3), timeseries.MAX_POINTS)
+        except ValueError:
+            return Response({"error": "points must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        equipment = request.GET.get('equipment') or None
+        resample = request.GET.get('resample') or None
+        window = request.GET.get('window') or None
+
+        with self.timer.phase('db'):
+            dataset = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
+        time_series = (dataset.summary_data or {}).get('time_series')
+        if not time_series:
+            return Response({"error": "This dataset has no time column."}, status=status.HTTP_400_BAD_REQUEST)
+
+        storage = get_storage()
+        if not storage.exists(dataset.file_path):
+            return Response({"error": "The dataset file is no longer available."}, status=status.HTTP_404_NOT_FOUND)
+
+        with self.timer.phase('parse'):
+            hits = timeseries.load_series_frame.cache_info().hits
+            frame, groups = timeseries.load_series_frame(
+                dataset.file_path, storage.modified_time(dataset.file_path), time_series['column']
+            )
+            metrics.record_cache_lookup('series_frame', timeseries.load_series_frame.cache_info().hits > hits)
+
+        with self.timer.phase('aggregate'):
+            try:
+                data = timeseries.series(frame, groups, column.capitalize(), equipment, resample, window, points)
+            except KeyError:
+                return Response({"error": f"No equipment named '{equipment}'."}, status=status.HTTP_404_NOT_FOUND)
+            except ValueError as e:
+                return Response({"error": f"Invalid resample rule or window: {e}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "column": column,
+            "equipment": equipment,
+            "resample": resample,
+            "window": window,
+            **data,
+        }, status=status.HTTP_200_OK)
+
+
+class OutliersView(RequestMetricsMixin, APIView):
+    """
+    Readings flagged as outliers within their equipment type at upload.
+    Served from the dataset's stored outlier index; the data is never re-read.
+    Query params: type, column (flowrate/pressure/temperature), limit.
+    """
+    permission_classes = [IsAuthenticated]
+
+    MAX_LIMIT = 500
+
+    def get(self, request, pk, *args, **kwargs):
+        from . import outliers
+
+        column = request.GET.get('column', '').lower()
+        if column and column not in aggregates.COLUMNS:
+            return Response({"error": f"Unknown column '{column}'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.GET.get('limit', 100)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        dataset = get_object_or_404(
+            UploadedDataset.objects.only('id', 'user', 'outlier_index'), pk=pk, user=request.user
+        )
+        index = dataset.outlier_index
+        if not index:
+            return Response({"error": "No outlier index was built for this dataset."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "method": index["method"],
+            "threshold": index["threshold"],
+            "count": index["count"],
+            "truncated": index["truncated"],
+            "by_type": index["by_type"],
+            "by_column": index["by_column"],
+            "results": outliers.query(index, request.GET.get('type'), column, limit),
+        }, status=status.HTTP_200_OK)
+
+
+class CorrelationView(RequestMetricsMixin, APIView):
+    """
+    Covariance and correlation of flowrate, pressure and temperature, for the
+    whole dataset or one equipment type (query param: type), with a bounded
+    row sample for scatter plots. Served from the moments and samples stored
+    at upload; the data is never re-read.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, *args, **kwargs):
+        from . import correlation
+
+        dataset = get_object_or_404(
+            UploadedDataset.objects.only('id', 'user', 'correlation'), pk=pk, user=request.user
+        )
+        stored = dataset.correlation
+        if not stored:
+            return Response({"error": "No correlation data was built for this dataset."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        type_name = request.GET.get('type') or None
+        try:
+            data = correlation.view(stored, type_name)
+        except KeyError:
+            return Response({"error": f"Unknown type '{type_name}'."}, status=status.HTTP_404_NOT_FOUND)
+
+        types = sorted(stored["moments"]["types"].items(), key=lambda item: item[1]["count"], reverse=True)
+        return Response({
+            "type": type_name,
+            **data,
+            "types": [{"name": name, "count": entry["count"], "sampled": name in stored["samples"]["types"]}
+                      for name, entry in types],
+        }, status=status.HTTP_200_OK)
+
+
+class RejectedRowsView(APIView):
+    """
+    Downloads the rows validation dropped from a dataset, as CSV with a
+    'Reject Reason' column. Counts are in the dataset's summary_data['rejected'].
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, *args, **kwargs):
+        dataset = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
+
+        storage = get_storage()
+        if not dataset.rejected_path:
+            return Response({"error": "No rows were rejected from this dataset."}, status=status.HTTP_404_NOT_FOUND)
+        if not storage.exists(dataset.rejected_path):
+            return Response({"error": "The rejected rows file is no longer available."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        filename = f"{dataset.name.rsplit('.', 1)[0]}_rejected.csv"
+        # Streamed as it is decompressed; the sidecar is never loaded whole.
+        return FileResponse(storage.open(dataset.rejected_path), as_attachment=True, filename=filename,
+                            content_type='text/csv')
+
+
+class RollupView(RequestMetricsMixin, APIView):
+    """
+    Fleet statistics across all of the user's datasets, read from their
+    incrementally maintained UserRollup (one query, however many datasets).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        rollup = UserRollup.objects.filter(user=request.user).first()
+        totals = rollup.aggregates if rollup and rollup.aggregates else aggregates.empty()
+
+        return Response({
+            "datasets": rollup.dataset_count if rollup else 0,
+            "records": totals['count'],
+            "type_distribution": totals['type_counts'],
+            "stats": {name: aggregates.describe_column(column) for name, column in totals['columns'].items()},
+            "updated": rollup.updated if rollup else None,
+        }, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """Prometheus text exposition of the metrics merged across all workers."""
+
+    def get_permissions(self):
+        if settings.METRICS_PUBLIC:
+            return [AllowAny()]
+        return [IsAdminUser()]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(metrics.REGISTRY.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ExportView(RequestMetricsMixin, AdmissionControlMixin, APIView):
+    """
+    Streams a dataset's statistics as a spreadsheet (see data_api.exports).
+    The format (xlsx or csv) is part of the URL: DRF reserves the ?format= param.
+    Query params: rows=1 adds the cleaned rows to an XLSX workbook; for CSV,
+    part picks the table (summary, types or rows).
+    """
+    permission_classes = [IsAuthenticated]
+    admission_scope = 'report'
+
+    CONTENT_TYPES = {
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'csv': 'text/csv',
+    }
+
+    def get(self, request, pk, export_format, *args, **kwargs):
+        from . import exports
+
+        if export_format not in self.CONTENT_TYPES:
+            return Response({"error": "format must be 'xlsx' or 'csv'."}, status=status.HTTP_400_BAD_REQUEST)
+        part = request.GET.get('part', 'types')
+        if part not in exports.PARTS:
+            return Response({"error": f"part must be one of: {', '.join(exports.PARTS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        include_rows = request.GET.get('rows') in ('1', 'true')
+
+        dataset = get_object_or_404(UploadedDataset, pk=pk, user=request.user)
+        needs_file = include_rows if export_format == 'xlsx' else part == 'rows'
+        if needs_file and not get_storage().exists(dataset.file_path):
+            return Response({"error": "The dataset file is no longer available."}, status=status.HTTP_404_NOT_FOUND)
+
+        stem = dataset.name.rsplit('.', 1)[0]
+        if export_format == 'xlsx':
+            content = exports.xlsx_stream(dataset, include_rows)
+            filename = f"{stem}_export.xlsx"
         else:
-            parameters = list(averages_data.keys())
-            values = list(averages_data.values())
-            
-            bars = ax.barh(parameters, values, color=['#059669', '#dc2626', '#d97706'])
-            
-            ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-            ax.set_xlabel('Average Value', fontsize=12, fontweight='bold')
-            
-            for i, (bar, value) in enumerate(zip(bars, values)):
-                ax.text(bar.get_width() + max(values) * 0.01, bar.get_y() + bar.get_height()/2,
-                       f'{value:.2f}', ha='left', va='center', fontweight='bold')
-            
-            ax.set_yticklabels([param.capitalize() for param in parameters])
-        
-        plt.tight_layout()
-        
-        # Save to BytesIO
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
+            content = exports.csv_stream(dataset, part)
+            filename = f"{stem}_{part}.csv"
+        # The body is produced while it is sent, after this view has returned.
+        response = StreamingHttpResponse(content, content_type=self.CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 
+class PDFReportView(RequestMetricsMixin, PhaseTimingMixin, AdmissionControlMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    admission_scope = 'report'
+    
     def get(self, request, pk=None, *args, **kwargs):
         dataset_id = pk or request.GET.get('id')
         
         if not dataset_id:
             return Response({"error": "Dataset ID is required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        dataset = get_object_or_404(UploadedDataset, pk=dataset_id, user=request.user)
-        summary = dataset.summary_data
+        from . import reports
 
+        timer = self.timer
+        with timer.phase('db'):
+            dataset = get_object_or_404(UploadedDataset, pk=dataset_id, user=request.user)
+
+        render_started = time.perf_counter()
         response = HttpResponse(content_type='application/pdf')
         filename = f"Report_{dataset.name.split('.')[0]}_{dataset.timestamp.strftime('%Y%m%d')}.pdf"
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-        doc = SimpleDocTemplate(response, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-
-        styles.add(ParagraphStyle(name='ReportTitle', fontSize=18, spaceAfter=20, alignment=1, fontName='Helvetica-Bold'))
-        styles.add(ParagraphStyle(name='CustomHeading', fontSize=14, spaceBefore=15, spaceAfter=10, fontName='Helvetica-Bold'))
-        styles.add(ParagraphStyle(name='NormalStyle', fontSize=10, spaceAfter=5))
-        
-        title_text = f"Chemical Equipment Parameter Report"
-        story.append(Paragraph(title_text, styles['ReportTitle']))
-        
-        story.append(Paragraph(f"<b>Dataset Name:</b> {dataset.name}", styles['NormalStyle']))
-        story.append(Paragraph(f"<b>Uploaded By:</b> {request.user.username}", styles['NormalStyle']))
-        story.append(Paragraph(f"<b>Timestamp:</b> {dataset.timestamp.strftime('%Y-%m-%d %H:%M:%S')}", styles['NormalStyle']))
-        story.append(Paragraph(f"<b>Total Records Processed:</b> {summary.get('total_records', 'N/A')}", styles['NormalStyle']))
-        
-        story.append(Spacer(1, 0.3 * inch))
-        
-        # B. Parameter Averages Chart
-        story.append(Paragraph("Parameter Averages Analysis", styles['CustomHeading']))
-        
-        averages = summary.get('averages', {})
-        if averages:
-            # Create and add averages chart
-            avg_chart_buffer = self.create_averages_chart(averages, "Parameter Averages")
-            avg_chart_img = Image(avg_chart_buffer, width=6*inch, height=3*inch)
-            story.append(avg_chart_img)
-            story.append(Spacer(1, 0.2 * inch))
-            
-            # Add summary table below chart
-            avg_data = [
-                ['Parameter', 'Average Value', 'Unit'],
-                ['Flowrate', f"{averages.get('flowrate', 0.0):.2f}", 'L/min'],
-                ['Pressure', f"{averages.get('pressure', 0.0):.2f}", 'bar'],
-                ['Temperature', f"{averages.get('temperature', 0.0):.2f}", '°C'],
-            ]
-            
-            avg_table = Table(avg_data, colWidths=[2*inch, 1.5*inch, 1*inch])
-            avg_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ]))
-            story.append(avg_table)
+        reports.build_dataset_report(response, dataset, request.user.username, timer)
+        metrics.REPORT_RENDER.observe(time.perf_counter() - render_started)
         
-        story.append(Spacer(1, 0.4 * inch))
-        
-        # C. Equipment Type Distribution Charts
-        story.append(Paragraph("Equipment Type Distribution Analysis", styles['CustomHeading']))
-        
-        distribution = summary.get('type_distribution', {})
-        if distribution:
-            # Create bar chart
-            bar_chart_buffer = self.create_bar_chart(distribution, "Equipment Count by Type")
-            bar_chart_img = Image(bar_chart_buffer, width=6*inch, height=3.5*inch)
-            story.append(bar_chart_img)
-            story.append(Spacer(1, 0.3 * inch))
-            
-            # Create pie chart
-            pie_chart_buffer = self.create_pie_chart(distribution, "Equipment Type Distribution")
-            pie_chart_img = Image(pie_chart_buffer, width=5*inch, height=5*inch)
-            story.append(pie_chart_img)
-            story.append(Spacer(1, 0.2 * inch))
-            
-            # Add summary table below charts
-            dist_data = [['Equipment Type', 'Count', 'Percentage']]
-            total_count = sum(distribution.values())
-            sorted_distribution = sorted(distribution.items(), key=lambda item: item[1], reverse=True)
-            
-            for type_name, count in sorted_distribution:
-                percentage = (count / total_count * 100) if total_count > 0 else 0
-                dist_data.append([type_name, str(count), f"{percentage:.1f}%"])
-
-            dist_table = Table(dist_data, colWidths=[2.5*inch, 1*inch, 1*inch])
-            dist_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lavender),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ]))
-            story.append(dist_table)
-        
-        # 4. Build the PDF and return
-        doc.build(story)
-        
-        return response
\ No newline at end of file
+        return response
+
+class ConsolidatedReportView(RequestMetricsMixin, PhaseTimingMixin, AdmissionControlMixin, APIView):
+    """
+    One PDF covering the user's datasets, with trends across uploads.
+    Query param: days, to cover the datasets uploaded in the last `days` days
+    (default CONSOLIDATED_REPORT_DAYS; e.g. 7 for a weekly report). A period
+    holding more than CONSOLIDATED_REPORT_MAX_DATASETS datasets is refused.
+    """
+    permission_classes = [IsAuthenticated]
+    admission_scope = 'report'
+
+    MIN_DAYS = 1
+    MAX_DAYS = 36500
+
+    def get(self, request, *args, **kwargs):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from . import reports
+
+        # Only the outlier count is needed, so the database extracts it from outlier_index.
+        datasets = UploadedDataset.objects.filter(user=request.user).only(
+            'id', 'name', 'timestamp', 'summary_data'
+        ).annotate(outlier_count=F('outlier_index__count')).order_by('timestamp')
+        try:
+            days = int(request.GET.get('days') or settings.CONSOLIDATED_REPORT_DAYS)
+        except ValueError:
+            return Response({"error": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if not self.MIN_DAYS <= days <= self.MAX_DAYS:
+            return Response({"error": f"days must be between {self.MIN_DAYS} and {self.MAX_DAYS}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        datasets = datasets.filter(timestamp__gte=timezone.now() - timedelta(days=days))
+
+        limit = settings.CONSOLIDATED_REPORT_MAX_DATASETS
+        timer = self.timer
+        with timer.phase('db'):
+            # One row past the limit is enough to tell that the period holds too many.
+            datasets = list(datasets[:limit + 1])
+        if not datasets:
+            return Response({"error": "No datasets to report on."}, status=status.HTTP_404_NOT_FOUND)
+        if len(datasets) > limit:
+            return Response({"error": f"More than {limit} datasets in the last {days} days; ask for fewer days."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        render_started = time.perf_counter()
+        response = HttpResponse(content_type='application/pdf')
+        filename = f"Consolidated_Report_{timezone.now().strftime('%Y%m%d')}.pdf"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        reports.build_consolidated_report(response, datasets, request.user.username, timer)
+        metrics.REPORT_RENDER.observe(time.perf_counter() - render_started)
+
+        return response
@@ -0,0 +1,30 @@
+"""
+Pay the one-off cost of the heavy report and parsing libraries up front.
+
+data_api.views imports pandas, Matplotlib and ReportLab lazily, so a worker
+that never handles an upload or report never loads them. When every worker
+will need them anyway, call warm_up() once: from gunicorn's master before it
+forks (see gunicorn.conf.py), or from AppConfig.ready with DATA_API_WARMUP.
+"""
+import time
+
+
+def warm_up():
+    """Import the heavy modules and exercise their first-call caches. Returns elapsed seconds."""
+    started = time.perf_counter()
+
+    from . import processing, reports
+    from reportlab.lib.styles import getSampleStyleSheet
+    import matplotlib.pyplot as plt
+
+    # Font cache lookups and the Agg renderer are set up on the first figure.
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.bar(['a'], [1])
+    fig.canvas.draw()
+    plt.close(fig)
+
+    getSampleStyleSheet()
+    processing.summarize(processing.clean_frame(processing.pd.DataFrame(
+        [['warmup', 'Pump', 1.0, 1.0, 1.0]], columns=processing.REQUIRED_COLUMNS
+    )))
+    return time.perf_counter() - started
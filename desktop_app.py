@@ -1,17 +1,22 @@
 import sys
 import os
+import math
 import requests
 import json
 import base64
+from collections import OrderedDict
 import pandas as pd
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QListWidget, QPushButton, QLineEdit, QLabel, QSplitter,
     QFileDialog, QDialog, QMessageBox, QTabWidget, QGridLayout,
-    QListWidgetItem
+    QListWidgetItem, QTableView, QHeaderView, QAbstractItemView, QComboBox
 )
 from PyQt5.QtGui import QFont, QIcon, QColor
-from PyQt5.QtCore import Qt, QSize, QByteArray, QDateTime
+from PyQt5.QtCore import (
+    Qt, QSize, QByteArray, QDateTime, QAbstractTableModel, QModelIndex, QTimer,
+    QObject, QRunnable, QThreadPool, QEventLoop, pyqtSignal
+)
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
@@ -20,8 +25,63 @@ plt.style.use('dark_background')
 
 API_BASE_URL = 'http://127.0.0.1:8000/api'
 REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+# Bar charts keep the largest types and fold the long tail into one bar so
+# redraws stay cheap no matter how many distinct types a dataset has.
+BAR_CHART_TOP_N = 15
+OTHER_LABEL = 'Other'
+# Time-series charts ask the server for this many points (LTTB-downsampled), however long the series.
+TIME_SERIES_POINTS = 2000
+RESAMPLE_CHOICES = [('Raw', ''), ('15 min', '15min'), ('Hourly', '1h'), ('Daily', '1D')]
+# Uploads and reports may be refused with 429 while the server is busy; the request is
+# sent again after the Retry-After the server gives, up to this many times.
+MAX_BUSY_RETRIES = 3
+MAX_RETRY_WAIT_SECONDS = 30
+
+
+def retry_after_seconds(response):
+    try:
+        seconds = float(response.headers.get('Retry-After', 1))
+    except ValueError:
+        seconds = 1
+    return min(max(seconds, 0), MAX_RETRY_WAIT_SECONDS)
+
+
+def send_when_admitted(send):
+    """
+    Call send() (one request) again while the server answers 429, waiting out its
+    Retry-After in a local event loop so the window keeps repainting meanwhile.
+    Returns the last response.
+    """
+    for attempt in range(MAX_BUSY_RETRIES + 1):
+        response = send()
+        if response.status_code != 429 or attempt == MAX_BUSY_RETRIES:
+            return response
+        response.close()
+        loop = QEventLoop()
+        QTimer.singleShot(int(retry_after_seconds(response) * 1000), loop.quit)
+        loop.exec_()
+
+
+def busy_message(response):
+    return f"The server is busy; try again in {math.ceil(retry_after_seconds(response))} s."
+
+
+def aggregate_top_n(distribution, top_n=BAR_CHART_TOP_N):
+    """Return (label, count) pairs for the top_n - 1 largest types plus an 'Other' bucket."""
+    items = sorted(distribution.items(), key=lambda item: item[1], reverse=True)
+    if len(items) <= top_n:
+        return items
+    head = items[:top_n - 1]
+    other = sum(count for _, count in items[top_n - 1:])
+    return head + [(OTHER_LABEL, other)]
+
+
 class MplCanvas(FigureCanvas):
-    """A simple canvas class for embedding Matplotlib figures."""
+    """
+    A canvas for embedding Matplotlib figures.
+    Artists are created once and updated in place; when only their data changes
+    the canvas blits them over a cached background instead of redrawing everything.
+    """
     def __init__(self, parent=None, width=5, height=4, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         # Set figure background to match dark theme
@@ -31,29 +91,116 @@ class MplCanvas(FigureCanvas):
         self.setParent(parent)
         self.setMinimumHeight(300)
 
-    def update_bar_chart(self, distribution):
+        self._mode = None
+        self._bars = None
+        self._bar_labels = None
+        self._pie_wedges = []
+        self._pie_texts = []
+        self._pie_autotexts = []
+        self._pie_labels = None
+        self._lines = []
+        self._placeholder = None
+        self._background = None
+        self.mpl_connect('draw_event', self._on_draw)
+
+    # --- Blitting helpers ---
+
+    def _animated_artists(self):
+        artists = list(self._bars) if self._bars is not None else []
+        artists.extend(self._pie_wedges)
+        artists.extend(self._pie_texts)
+        artists.extend(self._pie_autotexts)
+        return [artist for artist in artists if artist.get_visible()]
+
+    def _on_draw(self, event):
+        # A full draw skips animated artists: cache the background, then paint them on top.
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        for artist in self._animated_artists():
+            self.fig.draw_artist(artist)
+
+    def _blit(self):
+        if self._background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self._background)
+        for artist in self._animated_artists():
+            self.fig.draw_artist(artist)
+        self.blit(self.fig.bbox)
+
+    def _set_mode(self, mode):
+        """Reset the axes only when switching between chart kinds."""
+        if self._mode == mode:
+            return
         self.axes.clear()
+        self._bars = None
+        self._bar_labels = None
+        self._pie_wedges, self._pie_texts, self._pie_autotexts = [], [], []
+        self._pie_labels = None
+        self._lines = []
+        self._placeholder = self.axes.text(
+            0.5, 0.5, '', ha='center', va='center', fontsize=12, color='gray',
+            transform=self.axes.transAxes, visible=False
+        )
+        self._mode = mode
+
+    def _show_placeholder(self, message):
+        if self._bars is not None:
+            for bar in self._bars:
+                bar.set_visible(False)
+        for artist in self._pie_wedges + self._pie_texts + self._pie_autotexts + self._lines:
+            artist.set_visible(False)
+        self._bar_labels = None
+        self._pie_labels = None
+        self._placeholder.set_text(message)
+        self._placeholder.set_visible(True)
+        self.axes.set_xticks([])
+        self.draw_idle()
+
+    # --- Charts ---
+
+    def update_bar_chart(self, distribution):
+        self._set_mode('bar')
         if not distribution:
-            self.axes.text(0.5, 0.5, "No data uploaded.", ha='center', va='center', fontsize=12, color='gray')
-            self.axes.set_xticks([])
-            self.draw()
+            self._show_placeholder("No data uploaded.")
             return
-        
-        types = list(distribution.keys())
-        counts = list(distribution.values())
-        
-        bars = self.axes.bar(types, counts, color='#8b5cf6')
+
+        items = aggregate_top_n(distribution)
+        types = [label for label, _ in items]
+        counts = [count for _, count in items]
+        top = max(counts) or 1
+
+        self._placeholder.set_visible(False)
+        if self._bars is not None and types == self._bar_labels:
+            for bar, count in zip(self._bars, counts):
+                bar.set_height(count)
+            ymax = self.axes.get_ylim()[1]
+            if top <= ymax and top > ymax * 0.5:
+                # Same categories and the current scale still fits: only the bars change.
+                self._blit()
+                return
+            self.axes.set_ylim(0, top * 1.1)
+            self.draw_idle()
+            return
+
+        if self._bars is not None:
+            self._bars.remove()
+        positions = range(len(types))
+        self._bars = self.axes.bar(positions, counts, color='#8b5cf6', animated=True)
+        self._bar_labels = types
+        self.axes.set_xticks(list(positions))
+        self.axes.set_xticklabels(types, rotation=45, ha='right')
+        self.axes.set_ylim(0, top * 1.1)
         self.axes.set_title('Equipment Type Distribution', color='white')
         self.axes.set_xlabel('Equipment Type', color='white')
         self.axes.set_ylabel('Count', color='white')
+        # Tick labels changed, so the layout has to be recomputed once.
         self.fig.tight_layout()
-        self.draw()
+        self.draw_idle()
 
     def update_pie_chart(self, averages):
-        self.axes.clear()
+        self._set_mode('pie')
         if not any(averages.values()):
-            self.axes.text(0.5, 0.5, "No numeric data found.", ha='center', va='center', fontsize=12, color='gray')
-            self.draw()
+            self._show_placeholder("No numeric data found.")
             return
             
         labels = ['Flowrate', 'Pressure', 'Temperature']
@@ -63,15 +210,234 @@ class MplCanvas(FigureCanvas):
         labels = [item[0] for item in valid_data]
         values = [item[1] for item in valid_data]
 
+        self._placeholder.set_visible(False)
+        if self._pie_wedges and labels == self._pie_labels:
+            total = sum(values)
+            theta = 90.0
+            for wedge, text, autotext, value in zip(self._pie_wedges, self._pie_texts, self._pie_autotexts, values):
+                span = 360.0 * value / total
+                wedge.set_theta1(theta)
+                wedge.set_theta2(theta + span)
+                mid = math.radians(theta + span / 2)
+                x, y = math.cos(mid), math.sin(mid)
+                text.set_position((1.1 * x, 1.1 * y))
+                text.set_horizontalalignment('left' if x > 0 else 'right')
+                autotext.set_position((0.6 * x, 0.6 * y))
+                autotext.set_text(f'{100.0 * value / total:.1f}%')
+                theta += span
+            self._blit()
+            return
+
+        for artist in self._pie_wedges + self._pie_texts + self._pie_autotexts:
+            artist.remove()
+
         colors = ['#f87171', '#34d399', '#60a5fa']
 
         wedges, texts, autotexts = self.axes.pie(
             values, labels=labels, autopct='%1.1f%%', startangle=90, 
-            colors=colors, wedgeprops={'edgecolor': 'white'}
+            colors=colors, wedgeprops={'edgecolor': 'white', 'animated': True},
+            textprops={'animated': True}
         )
+        self._pie_wedges, self._pie_texts, self._pie_autotexts = list(wedges), list(texts), list(autotexts)
+        self._pie_labels = labels
         self.axes.set_title('Relative Parameter Averages', color='white')
         self.axes.axis('equal')
-        self.draw()
+        self.draw_idle()
+
+    def update_line_chart(self, series, label):
+        """Plot a server-downsampled series ({'x': ISO times, 'y': values, 'rolling_mean'?: values})."""
+        self._set_mode('line')
+        if not series or not series.get('x'):
+            self._show_placeholder("No time series for this dataset.")
+            return
+
+        times = pd.to_datetime(series['x'], utc=True).tz_convert(None)
+        for line in self._lines:
+            line.remove()
+        self._placeholder.set_visible(False)
+        self._lines = self.axes.plot(times, series['y'], color='#60a5fa', linewidth=0.8, label=label)
+        if series.get('rolling_mean'):
+            rolling = [math.nan if value is None else value for value in series['rolling_mean']]
+            self._lines += self.axes.plot(times, rolling, color='#f59e0b', linewidth=1.5, label='Rolling mean')
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.axes.legend(loc='upper right')
+        self.axes.set_title(f"{label} over time ({series['points']} of {series['source_points']} points)",
+                            color='white')
+        self.fig.autofmt_xdate()
+        self.draw_idle()
+
+
+class PageFetchSignals(QObject):
+    # generation, page index, response payload (None if the request failed)
+    finished = pyqtSignal(int, int, object)
+
+
+class PageFetch(QRunnable):
+    """One GET of /rows/<id>/, run on the global thread pool so the UI thread never waits on the network."""
+
+    def __init__(self, url, headers, params, generation, page_index):
+        super().__init__()
+        self.url = url
+        self.headers = headers
+        self.params = params
+        self.generation = generation
+        self.page_index = page_index
+        self.signals = PageFetchSignals()
+
+    def run(self):
+        try:
+            response = requests.get(self.url, headers=self.headers, params=self.params, timeout=10)
+            response.raise_for_status()
+            payload = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            payload = None
+        self.signals.finished.emit(self.generation, self.page_index, payload)
+
+
+class DatasetRowsModel(QAbstractTableModel):
+    """
+    Table model backed by the /rows/<id>/ API.
+    Pages are fetched lazily as the view scrolls (canFetchMore/fetchMore) and only the
+    most recently used pages are kept, so memory stays constant however many rows exist.
+    Sorting and filtering are delegated to the server.
+
+    Requests run on a worker thread: a cell whose page is not cached shows a
+    placeholder, and dataChanged repaints it when the page arrives. Replies to
+    requests made before the last reload (new dataset, sort or filter) are dropped.
+    """
+    PAGE_SIZE = 200
+    MAX_CACHED_PAGES = 20
+    NUMERIC_COLUMNS = {'Flowrate', 'Pressure', 'Temperature'}
+    PLACEHOLDER = '…'
+
+    def __init__(self, get_headers, parent=None):
+        super().__init__(parent)
+        self.get_headers = get_headers
+        self.dataset_id = None
+        self.ordering = ''
+        self.search = ''
+        self.total_count = 0
+        self.loaded_count = 0
+        self._pages = OrderedDict()
+        self._pending = set()
+        self._generation = 0
+
+    def set_dataset(self, dataset_id):
+        self.dataset_id = dataset_id
+        self.reload()
+
+    def set_search(self, text):
+        self.search = text.strip()
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self._generation += 1
+        self._pages.clear()
+        self._pending.clear()
+        self.total_count = 0
+        self.loaded_count = 0
+        self.endResetModel()
+        if self.dataset_id is not None:
+            self._request_page(0)
+
+    def _request_page(self, page_index):
+        if page_index in self._pending:
+            return
+        self._pending.add(page_index)
+        job = PageFetch(
+            f"{API_BASE_URL}/rows/{self.dataset_id}/",
+            self.get_headers(),
+            {
+                'offset': page_index * self.PAGE_SIZE,
+                'limit': self.PAGE_SIZE,
+                'ordering': self.ordering,
+                'search': self.search,
+            },
+            self._generation,
+            page_index,
+        )
+        job.signals.finished.connect(self._page_fetched)
+        QThreadPool.globalInstance().start(job)
+
+    def _page_fetched(self, generation, page_index, payload):
+        if generation != self._generation:
+            return
+        self._pending.discard(page_index)
+        if payload is None:
+            return
+
+        self.total_count = payload.get('count', 0)
+        rows = [tuple(record.get(col) for col in REQUIRED_COLUMNS) for record in payload.get('results', [])]
+        self._pages[page_index] = rows
+        if len(self._pages) > self.MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+
+        first = page_index * self.PAGE_SIZE
+        last = first + len(rows)
+        shown = min(last, self.loaded_count)
+        if shown > first:
+            # A page evicted from the cache and fetched again for rows already on screen.
+            self.dataChanged.emit(self.index(first, 0), self.index(shown - 1, len(REQUIRED_COLUMNS) - 1))
+        if first <= self.loaded_count < last:
+            self.beginInsertRows(QModelIndex(), self.loaded_count, last - 1)
+            self.loaded_count = last
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(REQUIRED_COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded_count < self.total_count
+
+    def fetchMore(self, parent=QModelIndex()):
+        # Rows are inserted by _page_fetched() once the page arrives.
+        self._request_page(self.loaded_count // self.PAGE_SIZE)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = REQUIRED_COLUMNS[index.column()]
+        if role == Qt.TextAlignmentRole:
+            if column in self.NUMERIC_COLUMNS:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            return int(Qt.AlignLeft | Qt.AlignVCenter)
+        if role != Qt.DisplayRole:
+            return None
+
+        page_index, offset = divmod(index.row(), self.PAGE_SIZE)
+        rows = self._pages.get(page_index)
+        if rows is None:
+            self._request_page(page_index)
+            return self.PLACEHOLDER
+        self._pages.move_to_end(page_index)
+        if offset >= len(rows):
+            return None
+        value = rows[offset][index.column()]
+        if value is None:
+            return ''
+        if column in self.NUMERIC_COLUMNS:
+            return f"{value:.2f}"
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return REQUIRED_COLUMNS[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0:
+            self.ordering = ''
+        else:
+            prefix = '-' if order == Qt.DescendingOrder else ''
+            self.ordering = prefix + REQUIRED_COLUMNS[column]
+        self.reload()
 
 
 class LoginDialog(QDialog):
@@ -277,9 +643,62 @@ class MainWindow(QMainWindow):
 
         self.tab_widget.addTab(self.chart_widget, "Charts & Averages")
 
+        self.data_widget = QWidget()
+        self.data_layout = QVBoxLayout(self.data_widget)
+
         self.data_label = QLabel("Data Preview and Statistics will appear here.")
         self.data_label.setWordWrap(True)
-        self.tab_widget.addTab(self.data_label, "Data & Stats")
+        self.data_layout.addWidget(self.data_label)
+
+        self.row_filter_input = QLineEdit()
+        self.row_filter_input.setPlaceholderText("Filter by equipment name or type...")
+        self.data_layout.addWidget(self.row_filter_input)
+
+        # Debounce typing so the server only sees the final filter text.
+        self.row_filter_timer = QTimer(self)
+        self.row_filter_timer.setSingleShot(True)
+        self.row_filter_timer.setInterval(300)
+        self.row_filter_timer.timeout.connect(self.apply_row_filter)
+        self.row_filter_input.textChanged.connect(self.row_filter_timer.start)
+
+        self.rows_model = DatasetRowsModel(self.get_headers, self)
+        self.rows_table = QTableView()
+        self.rows_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.rows_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.rows_table.verticalHeader().setDefaultSectionSize(24)
+        self.rows_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.rows_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.rows_table.setModel(self.rows_model)
+        self.rows_table.setSortingEnabled(True)
+        self.rows_table.setStyleSheet(
+            """
+            QTableView { background-color: #1e1e1e; color: #d1d5db; gridline-color: #333333; }
+            QHeaderView::section { background-color: #374151; color: white; padding: 6px; border: 1px solid #333333; }
+            """
+        )
+        self.data_layout.addWidget(self.rows_table)
+
+        self.tab_widget.addTab(self.data_widget, "Data & Stats")
+
+        self.series_widget = QWidget()
+        self.series_layout = QVBoxLayout(self.series_widget)
+        series_controls = QHBoxLayout()
+        self.series_column = QComboBox()
+        self.series_column.addItems(['Pressure', 'Flowrate', 'Temperature'])
+        self.series_resample = QComboBox()
+        for label, rule in RESAMPLE_CHOICES:
+            self.series_resample.addItem(label, rule)
+        self.series_equipment = QLineEdit()
+        self.series_equipment.setPlaceholderText("Equipment name (blank for all)")
+        series_refresh = QPushButton("Plot")
+        series_refresh.clicked.connect(self.load_time_series)
+        for widget in (self.series_column, self.series_resample, self.series_equipment, series_refresh):
+            series_controls.addWidget(widget)
+        self.series_layout.addLayout(series_controls)
+        self.series_chart = MplCanvas(self)
+        self.series_layout.addWidget(self.series_chart)
+
+        self.tab_widget.addTab(self.series_widget, "Time Series")
 
         self.vis_layout.addWidget(self.tab_widget)
         
@@ -344,13 +763,17 @@ class MainWindow(QMainWindow):
         try:
             with open(file_path, 'rb') as f:
                 files = {'file': (os.path.basename(file_path), f, 'application/octet-stream')}
-                
-                response = requests.post(
-                    f"{API_BASE_URL}/upload/", 
-                    headers=self.get_headers(), 
-                    files=files, 
-                    timeout=30
-                )
+
+                def send():
+                    f.seek(0)
+                    return requests.post(
+                        f"{API_BASE_URL}/upload/",
+                        headers=self.get_headers(),
+                        files=files,
+                        timeout=30
+                    )
+
+                response = send_when_admitted(send)
                 response.raise_for_status()
                 
                 upload_data = response.json()
@@ -369,6 +792,9 @@ class MainWindow(QMainWindow):
                             break
 
         except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 429:
+                QMessageBox.warning(self, "Server Busy", busy_message(e.response))
+                return
             try:
                 error_data = e.response.json()
                 error_msg = error_data.get('error', str(e))
@@ -382,6 +808,9 @@ class MainWindow(QMainWindow):
         finally:
             self.upload_button.setEnabled(True)
 
+    def apply_row_filter(self):
+        self.rows_model.set_search(self.row_filter_input.text())
+
     def load_summary(self, item):
         dataset_id = item.data(Qt.UserRole)
         self.selected_dataset_id = dataset_id
@@ -392,6 +821,8 @@ class MainWindow(QMainWindow):
             
             self.current_summary = response.json()
             self.update_visualization()
+            self.load_time_series()
+            self.rows_model.set_dataset(dataset_id)
             self.pdf_button.setEnabled(True)
             self.title_label.setText(f"Visualization Summary: {item.text().splitlines()[0]}")
             
@@ -400,18 +831,45 @@ class MainWindow(QMainWindow):
             self.current_summary = {}
             self.pdf_button.setEnabled(False)
 
+    def load_time_series(self):
+        if not self.selected_dataset_id or not self.current_summary.get('time_series'):
+            self.series_chart.update_line_chart(None, '')
+            return
+
+        column = self.series_column.currentText()
+        params = {'column': column.lower(), 'points': TIME_SERIES_POINTS}
+        if self.series_resample.currentData():
+            params['resample'] = self.series_resample.currentData()
+        else:
+            params['window'] = '1h'
+        if self.series_equipment.text().strip():
+            params['equipment'] = self.series_equipment.text().strip()
+
+        try:
+            response = requests.get(
+                f"{API_BASE_URL}/timeseries/{self.selected_dataset_id}/",
+                headers=self.get_headers(), params=params, timeout=30
+            )
+            response.raise_for_status()
+            self.series_chart.update_line_chart(response.json(), column)
+        except requests.exceptions.RequestException as e:
+            QMessageBox.critical(self, "API Error", f"Failed to load time series: {e}")
+
     def download_pdf(self):
         if not self.selected_dataset_id:
             QMessageBox.warning(self, "Download Error", "Please select a dataset first.")
             return
 
         try:
-            response = requests.get(
-                f"{API_BASE_URL}/report/{self.selected_dataset_id}/", 
-                headers=self.get_headers(), 
-                stream=True, 
+            response = send_when_admitted(lambda: requests.get(
+                f"{API_BASE_URL}/report/{self.selected_dataset_id}/",
+                headers=self.get_headers(),
+                stream=True,
                 timeout=10
-            )
+            ))
+            if response.status_code == 429:
+                QMessageBox.warning(self, "Server Busy", busy_message(response))
+                return
             response.raise_for_status()
 
             filename = response.headers.get('Content-Disposition', 'report.pdf')
@@ -472,30 +930,6 @@ class MainWindow(QMainWindow):
                     <td style="border: 1px solid #333; padding: 8px; text-align: right; color: #34d399;">{value:.2f}</td>
                 </tr>
             """
-        html += "</table>"
-        
-        html += f"""
-            <h3 style="color: #4f46e5; margin-top: 20px;">Data Preview (First 5 Rows)</h3>
-            <table style="width: 100%; border-collapse: collapse; color: #d1d5db;">
-                <tr>
-                    <th style="border: 1px solid #333; padding: 8px; background-color: #374151; text-align: left;">Equipment Name</th>
-                    <th style="border: 1px solid #333; padding: 8px; background-color: #374151; text-align: left;">Type</th>
-                    <th style="border: 1px solid #333; padding: 8px; background-color: #374151; text-align: right;">Flowrate</th>
-                    <th style="border: 1px solid #333; padding: 8px; background-color: #374151; text-align: right;">Pressure</th>
-                    <th style="border: 1px solid #333; padding: 8px; background-color: #374151; text-align: right;">Temperature</th>
-                </tr>
-        """
-        preview = summary.get('data_preview', [])
-        for row in preview:
-            html += f"""
-                <tr>
-                    <td style="border: 1px solid #333; padding: 8px;">{row.get('Equipment Name', 'N/A')}</td>
-                    <td style="border: 1px solid #333; padding: 8px;">{row.get('Type', 'N/A')}</td>
-                    <td style="border: 1px solid #333; padding: 8px; text-align: right;">{row.get('Flowrate', 0.0):.2f}</td>
-                    <td style="border: 1px solid #333; padding: 8px; text-align: right;">{row.get('Pressure', 0.0):.2f}</td>
-                    <td style="border: 1px solid #333; padding: 8px; text-align: right;">{row.get('Temperature', 0.0):.2f}</td>
-                </tr>
-            """
         html += "</table></div>"
         
         return html
@@ -0,0 +1,49 @@
+"""
+Gunicorn settings for the Django backend.
+
+With preload_app the master imports the project and runs data_api.warmup
+before forking, so workers start with pandas, Matplotlib and ReportLab
+already loaded and share those pages copy-on-write. gc.freeze() moves the
+preloaded objects out of the collector's reach so the first collection in
+each worker does not touch (and copy) them.
+
+The master also keeps data_api.metrics' per-worker files in check: it
+empties METRICS_DIR on start and archives each worker's file when it exits.
+
+For the async views, serve the ASGI app with uvicorn workers:
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn chemical_viz_project.asgi:application
+"""
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from data_api.warmup import warm_up
+
+    elapsed = warm_up()
+    gc.freeze()
+    server.log.info("data_api warm-up finished in %.2fs; %d objects frozen", elapsed, gc.get_freeze_count())
+
+
+def _metrics_registry():
+    # Without preload_app the master has not loaded the Django settings yet.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chemical_viz_project.settings')
+    from data_api.metrics import REGISTRY
+
+    return REGISTRY
+
+
+def on_starting(server):
+    _metrics_registry().clear_dir()
+
+
+def child_exit(server, worker):
+    _metrics_registry().archive_worker(worker.pid)